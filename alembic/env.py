@@ -1,10 +1,10 @@
 import asyncio
 from logging.config import fileConfig
-from sqlalchemy import pool
+from sqlalchemy import inspect, pool, text
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
-from app.database import Base
+from app.database import Base, SCHEMA_LOCK_ID
 from app.models import *  # Import all models
 from app.config import settings
 
@@ -16,10 +16,14 @@ config = context.config
 config.set_main_option("sqlalchemy.url", settings.database_url)
 
 # Interpret the config file for Python logging.
-# This line sets up loggers basically.
-if config.config_file_name is not None:
+# This line sets up loggers basically. Skipped when invoked from the app CLI,
+# which has already configured logging for the process.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
+# Databases created by the old create_all startup match this revision
+BASELINE_REVISION = "0001"
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
@@ -55,10 +59,23 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
-
-    with context.begin_transaction():
-        context.run_migrations()
+    # One outer transaction, so the advisory lock is held until the stamp and
+    # every migration have committed
+    with connection.begin():
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        # Concurrent deploys wait here instead of racing each other's DDL
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_ID})
+
+        # Adopt databases that were created with create_all before migrations existed
+        tables = inspect(connection).get_table_names()
+        if "campaigns" in tables and "alembic_version" not in tables:
+            migration_context = context.get_context()
+            migration_context.stamp(migration_context.script, BASELINE_REVISION)
+
+        with context.begin_transaction():
+            context.run_migrations()
 
 
 async def run_async_migrations() -> None:
@@ -0,0 +1,90 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'campaigns',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('campaign_id', sa.String(length=14), nullable=False),
+        sa.Column('business_name', sa.String(length=255), nullable=False),
+        sa.Column('target_url', sa.Text(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=True),
+        sa.Column('client_access_enabled', sa.Boolean(), nullable=True),
+        sa.Column('archived', sa.Boolean(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_campaigns_campaign_id'), 'campaigns', ['campaign_id'], unique=True)
+
+    op.create_table(
+        'admin_users',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_admin_users_email'), 'admin_users', ['email'], unique=True)
+
+    op.create_table(
+        'privacy_requests',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('request_type', sa.String(length=50), nullable=True),
+        sa.Column('anonymous_user_id', sa.String(length=64), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'scans',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('campaign_id', sa.String(length=14), nullable=False),
+        sa.Column('anonymous_user_id', sa.String(length=64), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('city', sa.String(length=100), nullable=True),
+        sa.Column('country', sa.String(length=100), nullable=True),
+        sa.Column('device_type', sa.String(length=50), nullable=True),
+        sa.Column('user_agent_hash', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scans_campaign_id'), 'scans', ['campaign_id'], unique=False)
+    op.create_index(op.f('ix_scans_anonymous_user_id'), 'scans', ['anonymous_user_id'], unique=False)
+    op.create_index(op.f('ix_scans_created_at'), 'scans', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_scans_created_at'), table_name='scans')
+    op.drop_index(op.f('ix_scans_anonymous_user_id'), table_name='scans')
+    op.drop_index(op.f('ix_scans_campaign_id'), table_name='scans')
+    op.drop_table('scans')
+    op.drop_table('privacy_requests')
+    op.drop_index(op.f('ix_admin_users_email'), table_name='admin_users')
+    op.drop_table('admin_users')
+    op.drop_index(op.f('ix_campaigns_campaign_id'), table_name='campaigns')
+    op.drop_table('campaigns')
@@ -0,0 +1,69 @@
+"""Compact scan encoding tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'campaign_keys',
+        sa.Column('key', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('campaign_id', sa.String(length=14), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ),
+        sa.PrimaryKeyConstraint('key'),
+        sa.UniqueConstraint('campaign_id')
+    )
+    op.create_table(
+        'cities',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('country_code', sa.String(length=2), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name', 'country_code', name='uq_cities_name_country')
+    )
+    op.create_table(
+        'scans_compact',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        sa.Column('campaign_key', sa.Integer(), nullable=False),
+        sa.Column('city_id', sa.Integer(), nullable=True),
+        sa.Column('device', sa.SmallInteger(), nullable=False),
+        sa.Column('country_code', sa.String(length=2), nullable=True),
+        sa.Column('visitor_id', sa.LargeBinary(length=8), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_key'], ['campaign_keys.key'], ),
+        sa.ForeignKeyConstraint(['city_id'], ['cities.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scans_compact_campaign_occurred', 'scans_compact', ['campaign_key', 'occurred_at'], unique=False)
+    op.create_index(op.f('ix_scans_compact_visitor_id'), 'scans_compact', ['visitor_id'], unique=False)
+    op.create_table(
+        'job_checkpoints',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('position', sa.Text(), nullable=True),
+        sa.Column('rows_processed', sa.BigInteger(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_checkpoints')
+    op.drop_index(op.f('ix_scans_compact_visitor_id'), table_name='scans_compact')
+    op.drop_index('ix_scans_compact_campaign_occurred', table_name='scans_compact')
+    op.drop_table('scans_compact')
+    op.drop_table('cities')
+    op.drop_table('campaign_keys')
@@ -0,0 +1,42 @@
+"""Daily scan rollups for retention
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scan_daily_rollups',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('campaign_id', sa.String(length=14), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('device_type', sa.String(length=50), nullable=True),
+        sa.Column('city', sa.String(length=100), nullable=True),
+        sa.Column('country', sa.String(length=100), nullable=True),
+        sa.Column('scan_count', sa.Integer(), nullable=False),
+        sa.Column('visitor_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scan_daily_rollups_campaign_day', 'scan_daily_rollups', ['campaign_id', 'day'], unique=False)
+    op.create_index('ix_scans_campaign_timestamp', 'scans', ['campaign_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scans_campaign_timestamp', table_name='scans')
+    op.drop_index('ix_scan_daily_rollups_campaign_day', table_name='scan_daily_rollups')
+    op.drop_table('scan_daily_rollups')
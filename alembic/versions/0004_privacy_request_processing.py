@@ -0,0 +1,38 @@
+"""Privacy request processing columns
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('privacy_requests') as batch_op:
+        batch_op.add_column(sa.Column('claim_token', sa.String(length=36), nullable=True))
+        batch_op.add_column(sa.Column('claimed_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('rows_affected', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('result', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_privacy_requests_status'), 'privacy_requests', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_privacy_requests_status'), table_name='privacy_requests')
+    with op.batch_alter_table('privacy_requests') as batch_op:
+        batch_op.drop_column('error')
+        batch_op.drop_column('result')
+        batch_op.drop_column('rows_affected')
+        batch_op.drop_column('claimed_at')
+        batch_op.drop_column('claim_token')
@@ -0,0 +1,35 @@
+"""Incrementally maintained dashboard counters
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled from the existing data by the first reconciliation
+    op.create_table(
+        'stat_counters',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('bucket', sa.String(length=10), nullable=False),
+        sa.Column('shard', sa.SmallInteger(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('name', 'bucket', 'shard')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stat_counters')
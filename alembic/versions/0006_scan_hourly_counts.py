@@ -0,0 +1,50 @@
+"""Hourly scan counts and campaign timezone
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.add_column(sa.Column('timezone', sa.String(length=64), server_default='UTC', nullable=False))
+    op.create_table(
+        'scan_hourly_counts',
+        sa.Column('campaign_id', sa.String(length=14), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('scan_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ),
+        sa.PrimaryKeyConstraint('campaign_id', 'hour')
+    )
+
+    # Backfill from the raw scans still on hand; the hour must serialise exactly
+    # like the application's DateTime values so later upserts hit the same row
+    if op.get_bind().dialect.name == 'postgresql':
+        hour = "date_trunc('hour', timestamp)"
+    else:
+        hour = "strftime('%Y-%m-%d %H:00:00.000000', timestamp)"
+    op.execute(
+        "INSERT INTO scan_hourly_counts (campaign_id, hour, scan_count) "
+        f"SELECT campaign_id, {hour}, COUNT(*) FROM scans WHERE timestamp IS NOT NULL "
+        f"GROUP BY campaign_id, {hour}"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scan_hourly_counts')
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.drop_column('timezone')
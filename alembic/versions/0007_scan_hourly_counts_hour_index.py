@@ -0,0 +1,26 @@
+"""Index scan_hourly_counts by hour
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_scan_hourly_counts_hour', 'scan_hourly_counts', ['hour'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scan_hourly_counts_hour', table_name='scan_hourly_counts')
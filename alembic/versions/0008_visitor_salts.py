@@ -0,0 +1,35 @@
+"""Rotating visitor id salts
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'visitor_salts',
+        sa.Column('period', sa.String(length=16), nullable=False),
+        sa.Column('salt', sa.String(length=64), nullable=False),
+        sa.Column('starts_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('period')
+    )
+    op.create_index(op.f('ix_visitor_salts_starts_at'), 'visitor_salts', ['starts_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_visitor_salts_starts_at'), table_name='visitor_salts')
+    op.drop_table('visitor_salts')
@@ -0,0 +1,31 @@
+"""Keyset indexes on scans (timestamp, id)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Supersedes (campaign_id, timestamp): same prefix, plus a stable tie-breaker
+    op.create_index('ix_scans_campaign_timestamp_id', 'scans', ['campaign_id', 'timestamp', 'id'], unique=False)
+    op.drop_index('ix_scans_campaign_timestamp', table_name='scans')
+    op.create_index('ix_scans_timestamp_id', 'scans', ['timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scans_timestamp_id', table_name='scans')
+    op.create_index('ix_scans_campaign_timestamp', 'scans', ['campaign_id', 'timestamp'], unique=False)
+    op.drop_index('ix_scans_campaign_timestamp_id', table_name='scans')
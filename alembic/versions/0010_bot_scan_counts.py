@@ -0,0 +1,35 @@
+"""Bot traffic counts
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bot_scan_counts',
+        sa.Column('campaign_id', sa.String(length=14), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('reason', sa.String(length=16), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ),
+        sa.PrimaryKeyConstraint('campaign_id', 'day', 'reason')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('bot_scan_counts')
@@ -0,0 +1,73 @@
+"""Shard scan_hourly_counts
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-21 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _copy_table(primary_key, rows: str) -> None:
+    # SQLite cannot alter a primary key: copy into a new table and swap it in
+    op.create_table(
+        'scan_hourly_counts_new',
+        sa.Column('campaign_id', sa.String(length=14), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        *([sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False)] if 'shard' in primary_key else []),
+        sa.Column('scan_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ),
+        sa.PrimaryKeyConstraint(*primary_key)
+    )
+    columns = ", ".join(primary_key)
+    op.execute(
+        f"INSERT INTO scan_hourly_counts_new ({columns}, scan_count) {rows}"
+    )
+    op.drop_index('ix_scan_hourly_counts_hour', table_name='scan_hourly_counts')
+    op.drop_table('scan_hourly_counts')
+    op.rename_table('scan_hourly_counts_new', 'scan_hourly_counts')
+    op.create_index('ix_scan_hourly_counts_hour', 'scan_hourly_counts', ['hour'], unique=False)
+
+
+def upgrade() -> None:
+    # Existing rows become shard 0
+    if op.get_bind().dialect.name == 'postgresql':
+        op.add_column('scan_hourly_counts', sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False))
+        op.drop_constraint('scan_hourly_counts_pkey', 'scan_hourly_counts', type_='primary')
+        op.create_primary_key('scan_hourly_counts_pkey', 'scan_hourly_counts', ['campaign_id', 'hour', 'shard'])
+    else:
+        _copy_table(['campaign_id', 'hour', 'shard'], "SELECT campaign_id, hour, 0, scan_count FROM scan_hourly_counts")
+
+
+def downgrade() -> None:
+    # Shards of an hour are merged back into one row
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TEMPORARY TABLE scan_hourly_counts_merged AS "
+            "SELECT campaign_id, hour, SUM(scan_count) AS scan_count FROM scan_hourly_counts GROUP BY campaign_id, hour"
+        )
+        op.execute("DELETE FROM scan_hourly_counts")
+        op.drop_constraint('scan_hourly_counts_pkey', 'scan_hourly_counts', type_='primary')
+        op.drop_column('scan_hourly_counts', 'shard')
+        op.create_primary_key('scan_hourly_counts_pkey', 'scan_hourly_counts', ['campaign_id', 'hour'])
+        op.execute(
+            "INSERT INTO scan_hourly_counts (campaign_id, hour, scan_count) "
+            "SELECT campaign_id, hour, scan_count FROM scan_hourly_counts_merged"
+        )
+        op.execute("DROP TABLE scan_hourly_counts_merged")
+    else:
+        _copy_table(
+            ['campaign_id', 'hour'],
+            "SELECT campaign_id, hour, SUM(scan_count) FROM scan_hourly_counts GROUP BY campaign_id, hour"
+        )
@@ -1,3 +1,3 @@
-from . import public, auth, admin
+from . import public, auth, admin, metrics
 
-__all__ = ["public", "auth", "admin"]
\ No newline at end of file
+__all__ = ["public", "auth", "admin", "metrics"]
\ No newline at end of file
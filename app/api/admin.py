@@ -1,12 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from ..database import get_database
-from ..models import AdminUser
-from ..schemas import CampaignCreate, CampaignResponse, CampaignUpdate
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import select
+from ..config import settings
+from ..database import AsyncSessionLocal, get_database
+from ..models import AdminUser, PrivacyRequest
+from ..schemas import (
+    CampaignCreate, CampaignResponse, CampaignWithStats, CampaignUpdate, CampaignComparisonRequest,
+    CampaignBulkCreate, CampaignBulkResult, CampaignBulkAction, CampaignBulkActionResult,
+    PrivacyRequestCreate, PrivacyRequestResponse, PrivacyRequestDetail
+)
+from ..services.analytics_service import AnalyticsService
+from ..services.bulk_ingest import BulkScanIngestor, BulkIngestError
+from ..services.campaign_import import CampaignImportError, parse_campaign_csv
 from ..services.campaign_service import CampaignService
+from ..services.cohort_service import CohortService
+from ..services.comparison_service import CampaignComparisonService
 from ..services.qr_service import QRService
+from ..services.scan_feed import ScanFeedService
+from ..profiling import slow_query_table
 from .auth import get_current_user
 
 router = APIRouter()
@@ -20,7 +34,7 @@ async def get_admin_dashboard_stats(
     stats = await campaign_service.get_admin_dashboard_stats()
     return stats
 
-@router.get("/admin/campaigns")
+@router.get("/admin/campaigns", response_model=List[CampaignWithStats])
 async def get_all_campaigns(
     include_archived: bool = False,
     current_user: AdminUser = Depends(get_current_user),
@@ -40,6 +54,99 @@ async def create_campaign(
     campaign = await campaign_service.create_campaign(campaign_data)
     return campaign
 
+def _bulk_result(campaigns) -> dict:
+    return {
+        "created": len(campaigns),
+        "campaigns": [
+            {
+                **CampaignResponse.model_validate(campaign).model_dump(),
+                "tracking_url": QRService.get_tracking_url(campaign.campaign_id),
+                "qr_url": QRService.get_download_url(campaign.campaign_id),
+            }
+            for campaign in campaigns
+        ],
+    }
+
+@router.post("/admin/campaigns/bulk", response_model=CampaignBulkResult)
+async def create_campaigns(
+    bulk_data: CampaignBulkCreate,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Create many campaigns in one transaction, with their tracking and QR code URLs."""
+    if len(bulk_data.campaigns) > settings.bulk_campaign_max:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_campaign_max} campaigns per request")
+    campaign_service = CampaignService(db)
+    campaigns = await campaign_service.create_campaigns(bulk_data.campaigns)
+    return _bulk_result(campaigns)
+
+@router.post("/admin/campaigns/import", response_model=CampaignBulkResult)
+async def import_campaigns(
+    request: Request,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """CSV body with a header row: ``business_name``, ``target_url`` and optionally
+    ``description`` and ``timezone``. Nothing is created if any row is invalid.
+    """
+    try:
+        campaigns_data = parse_campaign_csv(await request.body(), settings.bulk_campaign_max)
+    except CampaignImportError as e:
+        raise HTTPException(status_code=e.status_code, detail={"message": str(e), "errors": e.errors})
+    campaign_service = CampaignService(db)
+    campaigns = await campaign_service.create_campaigns(campaigns_data)
+    return _bulk_result(campaigns)
+
+@router.post("/admin/campaigns/actions", response_model=CampaignBulkActionResult)
+async def apply_campaign_action(
+    bulk_action: CampaignBulkAction,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Archive, unarchive, enable or disable client access to, or deactivate
+    the listed campaigns or those matching a filter, in one UPDATE.
+
+    Only campaigns the action changed are returned.
+    """
+    if bulk_action.campaign_ids is not None and len(bulk_action.campaign_ids) > settings.bulk_campaign_max:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_campaign_max} campaign ids per request")
+    campaign_service = CampaignService(db)
+    try:
+        campaigns = await campaign_service.apply_action(
+            bulk_action.action,
+            campaign_ids=bulk_action.campaign_ids,
+            filters=bulk_action.filter.model_dump() if bulk_action.filter else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "action": bulk_action.action,
+        "updated": len(campaigns),
+        "campaign_ids": [campaign.campaign_id for campaign in campaigns],
+    }
+
+@router.post("/admin/campaigns/compare")
+async def compare_campaigns(
+    comparison: CampaignComparisonRequest,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    comparison_service = CampaignComparisonService(db)
+    try:
+        result = await comparison_service.compare(
+            comparison.campaign_ids,
+            start_date=comparison.start_date,
+            end_date=comparison.end_date,
+            granularity=comparison.granularity
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail="One or more campaigns not found")
+    
+    return result
+
 @router.get("/admin/campaigns/{campaign_id}", response_model=CampaignResponse)
 async def get_campaign(
     campaign_id: str,
@@ -132,6 +239,115 @@ async def get_campaign_admin_stats(
     
     return stats
 
+@router.get("/admin/campaigns/{campaign_id}/heatmap")
+async def get_campaign_admin_heatmap(
+    campaign_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    timezone: Optional[str] = None,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    analytics_service = AnalyticsService(db)
+    try:
+        heatmap = await analytics_service.get_scan_heatmap(
+            campaign_id, start_date, end_date, timezone, require_client_access=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not heatmap:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return heatmap
+
+@router.get("/admin/campaigns/{campaign_id}/cohorts")
+async def get_campaign_admin_cohorts(
+    campaign_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "week",
+    timezone: Optional[str] = None,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    cohort_service = CohortService(db)
+    try:
+        cohorts = await cohort_service.get_cohorts(
+            campaign_id, start_date, end_date, granularity, timezone, require_client_access=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not cohorts:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return cohorts
+
+@router.post("/admin/scans/bulk")
+async def bulk_ingest_scans(
+    request: Request,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """NDJSON scan events (optionally gzip/deflate encoded), one object per line.
+
+    Each event needs ``event_id``, ``campaign_id`` and ``timestamp``;
+    ``ip_address``, ``user_agent``, ``city`` and ``country`` are optional.
+    Events already ingested under the same ``event_id`` are skipped, and
+    events older than ``BULK_INGEST_MAX_AGE_DAYS`` are rejected; the
+    response's ``oldest_accepted`` is that bound.
+    """
+    ingestor = BulkScanIngestor(
+        db, batch_size=settings.bulk_ingest_batch_size, max_bytes=settings.bulk_ingest_max_bytes,
+        max_age_days=settings.bulk_ingest_max_age_days
+    )
+    try:
+        return await ingestor.ingest(request.stream(), request.headers.get("content-encoding"))
+    except BulkIngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.get("/admin/scans/feed")
+async def get_scan_feed(
+    campaign_id: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    format: str = "json",
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    """Raw scans in a stable ``(timestamp, id)`` order for incremental sync.
+
+    Pass the returned ``next_cursor`` (or, with ``format=ndjson``, the last
+    line's ``cursor``) to continue; ``since`` starts from a point in time.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    try:
+        campaign_ids = ScanFeedService.validate(campaign_id)
+        after = ScanFeedService.start_key(cursor, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "json":
+        feed_service = ScanFeedService(db, settle_seconds=settings.scan_feed_settle_seconds)
+        try:
+            return await feed_service.page(campaign_ids, cursor, since, limit if limit is not None else settings.scan_feed_page_size)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def lines():
+        # The request's session closes when the handler returns, before the body is sent
+        async with AsyncSessionLocal() as session:
+            feed_service = ScanFeedService(session, settle_seconds=settings.scan_feed_settle_seconds)
+            async for line in feed_service.stream(campaign_ids, after, settings.scan_feed_page_size, limit):
+                yield line
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.get("/admin/campaigns/{campaign_id}/qr")
 async def get_campaign_qr_code(
     campaign_id: str,
@@ -157,4 +373,66 @@ async def get_campaign_qr_code(
         qr_image,
         media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
\ No newline at end of file
+    )
+
+@router.get("/admin/profiling/queries")
+async def get_slow_queries(
+    limit: int = 20,
+    order_by: str = "total_time",
+    current_user: AdminUser = Depends(get_current_user)
+):
+    if order_by not in ("total_time", "max_time", "executions", "n_plus_one_requests"):
+        raise HTTPException(status_code=400, detail="Invalid order_by")
+    
+    return {
+        "enabled": settings.query_profiling_enabled,
+        "window_seconds": slow_query_table.window_seconds,
+        "n_plus_one_threshold": settings.query_profiling_n_plus_one_threshold,
+        "queries": slow_query_table.top(limit=limit, order_by=order_by)
+    }
+
+@router.delete("/admin/profiling/queries")
+async def reset_slow_queries(
+    current_user: AdminUser = Depends(get_current_user)
+):
+    slow_query_table.reset()
+    return {"message": "Query profile reset"}
+
+@router.post("/admin/privacy-requests", response_model=PrivacyRequestResponse)
+async def create_privacy_request(
+    request_data: PrivacyRequestCreate,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    # Queued for the privacy processor; poll the request for its status
+    privacy_request = PrivacyRequest(**request_data.model_dump(), status="pending")
+    db.add(privacy_request)
+    await db.commit()
+    await db.refresh(privacy_request)
+    return privacy_request
+
+@router.get("/admin/privacy-requests", response_model=List[PrivacyRequestResponse])
+async def list_privacy_requests(
+    status: Optional[str] = None,
+    limit: int = 100,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    query = select(PrivacyRequest).order_by(PrivacyRequest.created_at.desc()).limit(min(limit, 1000))
+    if status:
+        query = query.where(PrivacyRequest.status == status)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+@router.get("/admin/privacy-requests/{request_id}", response_model=PrivacyRequestDetail)
+async def get_privacy_request(
+    request_id: str,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_database)
+):
+    privacy_request = await db.get(PrivacyRequest, request_id)
+    
+    if not privacy_request:
+        raise HTTPException(status_code=404, detail="Privacy request not found")
+    
+    return privacy_request
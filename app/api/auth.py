@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -9,6 +10,8 @@ from ..schemas import UserLogin, Token, UserResponse
 from ..utils import verify_password, create_access_token, verify_token, get_password_hash
 from ..config import settings
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 security = HTTPBearer()
 
@@ -100,4 +103,4 @@ async def create_initial_admin(db: AsyncSession):
         )
         db.add(admin_user)
         await db.commit()
-        print(f"Initial admin user created: {settings.admin_email}")
\ No newline at end of file
+        logger.info("Initial admin user created", extra={"email": settings.admin_email})
\ No newline at end of file
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from ..config import settings
+from ..metrics import registry
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    if settings.metrics_token:
+        if request.headers.get("authorization") != f"Bearer {settings.metrics_token}":
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,14 +1,25 @@
+import logging
 from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-import io
-import pandas as pd
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 from ..database import get_database
+from ..schemas import AnalyticsData
 from ..services.analytics_service import AnalyticsService
 from ..services.campaign_service import CampaignService
+from ..services.cohort_service import CohortService
+from ..services.export_service import ExportService
+from ..services.bot_filter import bot_filter
+from ..services.rate_limit import SCAN_RATE_LIMITED
+from ..services.routing_table import routing_table
+from ..services.scan_dedup import scan_dedup
+from ..services.scan_ingest import ScanEvent, scan_ingestor
 from ..utils import is_valid_campaign_id
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/scan/{campaign_id}")
@@ -24,14 +35,34 @@ async def track_scan_and_redirect(
     # Get client IP and user agent
     client_ip = request.client.host
     user_agent = request.headers.get("user-agent", "")
+    # Over the rate limit: still redirected, but not recorded
+    record = not request.scope.get(SCAN_RATE_LIMITED)
     
     # Get campaign to check if it exists and get target URL
     campaign_service = CampaignService(db)
-    campaign = await campaign_service.get_campaign_by_id(campaign_id)
+    try:
+        campaign = await campaign_service.get_campaign_by_id(campaign_id)
+    except Exception:
+        location = routing_table.lookup(campaign_id) if scan_ingestor.spool is not None else None
+        if location is None:
+            raise
+        # Database down: redirect from the routing table and leave the scan to the spool
+        logger.warning("Campaign lookup failed, redirecting from the routing table", extra={"campaign_id": campaign_id})
+        if record and not bot_filter.is_bot(campaign_id, client_ip, user_agent) and not scan_dedup.is_duplicate(
+            campaign_id, client_ip, user_agent
+        ):
+            scan_ingestor.submit(ScanEvent(campaign_id, ip_address=client_ip, user_agent=user_agent))
+        return RedirectResponse(url=location.decode("latin-1"), status_code=302)
     
     if not campaign or not campaign.active or campaign.archived:
         raise HTTPException(status_code=404, detail="Campaign not found or inactive")
     
+    # Over-limit hits, bots, prefetches and double taps are redirected but not stored as scans
+    if not record or bot_filter.is_bot(campaign_id, client_ip, user_agent) or scan_dedup.is_duplicate(
+        campaign_id, client_ip, user_agent
+    ):
+        return RedirectResponse(url=campaign.target_url, status_code=302)
+    
     # Record the scan asynchronously (don't block the redirect)
     analytics_service = AnalyticsService(db)
     try:
@@ -40,9 +71,12 @@ async def track_scan_and_redirect(
             ip_address=client_ip,
             user_agent=user_agent
         )
-    except Exception as e:
+    except Exception:
         # Log error but don't block redirect
-        print(f"Error recording scan: {e}")
+        logger.exception("Error recording scan", extra={"campaign_id": campaign_id})
+        if scan_ingestor.spool is not None:
+            # Keep it on disk; the spool replays it once the database recovers
+            scan_ingestor.submit(ScanEvent(campaign_id, ip_address=client_ip, user_agent=user_agent))
     
     # Redirect to target URL
     return RedirectResponse(url=campaign.target_url, status_code=302)
@@ -67,7 +101,7 @@ async def validate_campaign(
         "business_name": campaign.business_name if campaign.client_access_enabled else None
     })
 
-@router.get("/api/campaigns/{campaign_id}/stats")
+@router.get("/api/campaigns/{campaign_id}/stats", response_model=AnalyticsData)
 async def get_campaign_stats(
     campaign_id: str,
     db: AsyncSession = Depends(get_database)
@@ -83,6 +117,51 @@ async def get_campaign_stats(
     
     return stats
 
+@router.get("/api/campaigns/{campaign_id}/heatmap")
+async def get_campaign_heatmap(
+    campaign_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    timezone: Optional[str] = None,
+    db: AsyncSession = Depends(get_database)
+):
+    if not is_valid_campaign_id(campaign_id):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    analytics_service = AnalyticsService(db)
+    try:
+        heatmap = await analytics_service.get_scan_heatmap(campaign_id, start_date, end_date, timezone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not heatmap:
+        raise HTTPException(status_code=404, detail="Campaign not found or access disabled")
+    
+    return heatmap
+
+@router.get("/api/campaigns/{campaign_id}/cohorts")
+async def get_campaign_cohorts(
+    campaign_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "week",
+    timezone: Optional[str] = None,
+    db: AsyncSession = Depends(get_database)
+):
+    if not is_valid_campaign_id(campaign_id):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    cohort_service = CohortService(db)
+    try:
+        cohorts = await cohort_service.get_cohorts(campaign_id, start_date, end_date, granularity, timezone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not cohorts:
+        raise HTTPException(status_code=404, detail="Campaign not found or access disabled")
+    
+    return cohorts
+
 @router.get("/api/campaigns/{campaign_id}/export")
 async def export_campaign_data(
     campaign_id: str,
@@ -105,71 +184,16 @@ async def export_campaign_data(
     if not stats:
         raise HTTPException(status_code=404, detail="No analytics data found")
     
-    # Create Excel file in memory
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        # Summary sheet
-        summary_data = {
-            'Metric': [
-                'Campaign ID',
-                'Business Name', 
-                'Total Scans',
-                'Unique Visitors',
-                'Export Date'
-            ],
-            'Value': [
-                campaign_id,
-                campaign.business_name,
-                stats.get('total_scans', 0),
-                stats.get('unique_visitors', 0),
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            ]
-        }
-        summary_df = pd.DataFrame(summary_data)
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        
-        # Daily data sheet
-        if 'daily_data' in stats and stats['daily_data']:
-            daily_df = pd.DataFrame(stats['daily_data'])
-            daily_df.to_excel(writer, sheet_name='Daily Scans', index=False)
-        
-        # Hourly data sheet  
-        if 'hourly_data' in stats and stats['hourly_data']:
-            hourly_df = pd.DataFrame(stats['hourly_data'])
-            hourly_df.to_excel(writer, sheet_name='Hourly Breakdown', index=False)
-        
-        # Geographic data sheet
-        if 'geographic_data' in stats and stats['geographic_data']:
-            geo_df = pd.DataFrame(stats['geographic_data'])
-            geo_df.to_excel(writer, sheet_name='Geographic Distribution', index=False)
-        
-        # Device breakdown sheet
-        if 'device_breakdown' in stats and stats['device_breakdown']:
-            device_data = [{'Device': k, 'Scans': v} for k, v in stats['device_breakdown'].items()]
-            device_df = pd.DataFrame(device_data)
-            device_df.to_excel(writer, sheet_name='Device Types', index=False)
-        
-        # Recent scans sheet (if available)
-        if 'recent_activity' in stats and stats['recent_activity']:
-            recent_df = pd.DataFrame([
-                {
-                    'Timestamp': scan.get('timestamp', ''),
-                    'City': scan.get('city', 'Unknown'),
-                    'Country': scan.get('country', 'Unknown'), 
-                    'Device': scan.get('device_type', 'Unknown')
-                }
-                for scan in stats['recent_activity']
-            ])
-            recent_df.to_excel(writer, sheet_name='Recent Scans', index=False)
-    
-    output.seek(0)
+    # Create Excel file in memory, off the event loop since it is CPU bound
+    output = await run_in_threadpool(
+        ExportService.build_campaign_workbook, campaign_id, campaign.business_name, stats
+    )
     
     # Return as downloadable file
     filename = f"campaign-{campaign_id}-analytics-{datetime.now().strftime('%Y%m%d')}.xlsx"
     
     return StreamingResponse(
-        io.BytesIO(output.read()),
+        output,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""One-shot database commands, run before the API workers start.
+
+    python -m app.cli migrate        # alembic upgrade head
+    python -m app.cli create-admin   # seed the initial admin user if none exists
+    python -m app.cli init           # both of the above
+    python -m app.cli check          # exit 1 unless the schema is at the head revision
+    python -m app.cli compact-scans  # copy scans into the compact encoding, resumable
+    python -m app.cli storage-report # bytes per row and index sizes per scan table
+    python -m app.cli apply-retention # fold old raw scans into daily rollups and purge them
+    python -m app.cli process-privacy-requests # run pending GDPR access/delete requests now
+    python -m app.cli reconcile-counters # recount the dashboard counters and fix any drift
+    python -m app.cli rebuild-hourly-counts --since 2026-01-01 # recount hourly aggregates from raw scans
+    python -m app.cli replay-spool   # drain scan spool slots no running worker holds into the database
+
+Schema changes and seeding hold a Postgres advisory lock, so running these
+from several replicas at once is safe: the others wait and then find
+nothing left to do.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def migrate(revision: str = "head") -> None:
+    # Alembic is only needed here, never on the worker startup path
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, revision)
+    logger.info("Database migrated", extra={"revision": revision})
+
+async def create_admin() -> None:
+    from .database import AsyncSessionLocal, acquire_schema_lock, engine
+    from .api.auth import create_initial_admin
+
+    try:
+        async with AsyncSessionLocal() as db:
+            # Released when create_initial_admin commits
+            await acquire_schema_lock(db)
+            await create_initial_admin(db)
+    finally:
+        # Connections are bound to this event loop; the server will run its own
+        await engine.dispose()
+
+async def check() -> bool:
+    from .database import engine, get_current_revision, get_expected_revision
+
+    try:
+        current = await get_current_revision()
+    finally:
+        await engine.dispose()
+    expected = get_expected_revision()
+    print(f"current revision: {current}\nexpected revision: {expected}")
+    return current == expected
+
+async def compact_scans(batch_size: int, pause: float, max_rows: Optional[int] = None) -> None:
+    from .database import AsyncSessionLocal, engine
+    from .services.scan_storage import CompactScanConverter
+
+    try:
+        async with AsyncSessionLocal() as db:
+            summary = await CompactScanConverter(db, batch_size=batch_size, pause=pause).run(max_rows)
+    finally:
+        await engine.dispose()
+    print(json.dumps(summary, indent=2, default=str))
+
+async def report_storage() -> None:
+    from .database import AsyncSessionLocal, engine
+    from .services.scan_storage import storage_report
+
+    try:
+        async with AsyncSessionLocal() as db:
+            report = await storage_report(db)
+    finally:
+        await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+async def apply_retention(args: argparse.Namespace) -> None:
+    from .config import settings
+    from .database import AsyncSessionLocal, engine
+    from .services.retention import ScanRetentionService
+
+    try:
+        async with AsyncSessionLocal() as db:
+            service = ScanRetentionService(
+                db,
+                raw_days=settings.retention_raw_days if args.raw_days is None else args.raw_days,
+                archived_days=settings.retention_archived_days if args.archived_days is None else args.archived_days,
+                batch_size=args.batch_size or settings.retention_batch_size,
+                pause=settings.retention_pause if args.pause is None else args.pause,
+            )
+            summary = await service.run(dry_run=args.dry_run)
+    finally:
+        await engine.dispose()
+    print(json.dumps(summary, indent=2))
+
+async def process_privacy_requests(args: argparse.Namespace) -> None:
+    from .config import settings
+    from .database import AsyncSessionLocal, engine
+    from .services.privacy_service import PrivacyRequestProcessor
+
+    processor = PrivacyRequestProcessor(
+        group_size=args.group_size or settings.privacy_group_size,
+        batch_size=args.batch_size or settings.privacy_batch_size,
+        max_rows_per_second=settings.privacy_max_rows_per_second if args.max_rows_per_second is None
+            else args.max_rows_per_second,
+    )
+    try:
+        summary = await processor.run_once(AsyncSessionLocal)
+    finally:
+        await engine.dispose()
+    print(json.dumps(summary, indent=2))
+
+async def reconcile_counters() -> None:
+    from .database import AsyncSessionLocal, engine
+    from .services.counters import counter_reconciler
+
+    try:
+        summary = await counter_reconciler.run_once(AsyncSessionLocal)
+    finally:
+        await engine.dispose()
+    print(json.dumps(summary, indent=2))
+
+async def rebuild_hourly_counts(since: str, campaign_id: Optional[str]) -> None:
+    from datetime import datetime
+    from .database import AsyncSessionLocal, engine
+    from .services.hourly_counts import rebuild_hourly_counts as rebuild
+
+    try:
+        async with AsyncSessionLocal() as db:
+            summary = await rebuild(db, datetime.fromisoformat(since), campaign_id)
+    finally:
+        await engine.dispose()
+    print(json.dumps(summary, indent=2, default=str))
+
+async def replay_spool(directory: Optional[str]) -> None:
+    from .config import settings
+    from .database import AsyncSessionLocal, engine
+    from .services.scan_spool import ScanSpool
+
+    root = Path(directory or settings.scan_spool_dir)
+    summary = {}
+    try:
+        for slot in sorted(root.glob("slot-*")):
+            spool = ScanSpool(str(root), segment_size=settings.scan_spool_segment_bytes)
+            try:
+                spool.open(int(slot.name.split("-", 1)[1]))
+            except BlockingIOError:
+                summary[slot.name] = "in use"
+                continue
+            replayed = 0
+            try:
+                while True:
+                    written = await spool.replay(AsyncSessionLocal, settings.scan_batch_size)
+                    if not written:
+                        break
+                    replayed += written
+            finally:
+                spool.close()
+            summary[slot.name] = replayed
+    finally:
+        await engine.dispose()
+    print(json.dumps(summary, indent=2))
+
+def init_database() -> None:
+    migrate()
+    asyncio.run(create_admin())
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="QR Analytics database commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="apply Alembic migrations")
+    migrate_parser.add_argument("--revision", default="head")
+    subparsers.add_parser("create-admin", help="create the initial admin user if none exists")
+    subparsers.add_parser("init", help="migrate, then create the initial admin user")
+    subparsers.add_parser("check", help="verify the database is at the migration head")
+    compact_parser = subparsers.add_parser("compact-scans", help="convert scans to the compact encoding in batches")
+    compact_parser.add_argument("--batch-size", type=int, default=5000)
+    compact_parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between batches")
+    compact_parser.add_argument("--max-rows", type=int, help="stop after this many rows (resume later)")
+    subparsers.add_parser("storage-report", help="table and index sizes of the scan tables")
+    retention_parser = subparsers.add_parser("apply-retention", help="compact raw scans past the retention window")
+    retention_parser.add_argument("--raw-days", type=int, help="default: RETENTION_RAW_DAYS")
+    retention_parser.add_argument("--archived-days", type=int, help="default: RETENTION_ARCHIVED_DAYS")
+    retention_parser.add_argument("--batch-size", type=int, help="default: RETENTION_BATCH_SIZE")
+    retention_parser.add_argument("--pause", type=float, help="default: RETENTION_PAUSE")
+    retention_parser.add_argument("--dry-run", action="store_true", help="only count the rows that would be compacted")
+    privacy_parser = subparsers.add_parser("process-privacy-requests", help="process pending privacy requests")
+    privacy_parser.add_argument("--group-size", type=int, help="default: PRIVACY_GROUP_SIZE")
+    privacy_parser.add_argument("--batch-size", type=int, help="default: PRIVACY_BATCH_SIZE")
+    privacy_parser.add_argument("--max-rows-per-second", type=float, help="default: PRIVACY_MAX_ROWS_PER_SECOND, 0 = unthrottled")
+    subparsers.add_parser("reconcile-counters", help="recount the dashboard counters from the tables")
+    hourly_parser = subparsers.add_parser("rebuild-hourly-counts", help="recount hourly aggregates from raw scans")
+    hourly_parser.add_argument("--since", required=True, help="UTC date or datetime; keep within the retention window")
+    hourly_parser.add_argument("--campaign-id", help="only this campaign")
+    spool_parser = subparsers.add_parser("replay-spool", help="write spooled scans to the database")
+    spool_parser.add_argument("--dir", help="default: SCAN_SPOOL_DIR")
+    args = parser.parse_args()
+
+    from .log import configure_logging
+    configure_logging()
+
+    if args.command == "migrate":
+        migrate(args.revision)
+    elif args.command == "create-admin":
+        asyncio.run(create_admin())
+    elif args.command == "init":
+        init_database()
+    elif args.command == "check":
+        return 0 if asyncio.run(check()) else 1
+    elif args.command == "compact-scans":
+        asyncio.run(compact_scans(args.batch_size, args.pause, args.max_rows))
+    elif args.command == "storage-report":
+        asyncio.run(report_storage())
+    elif args.command == "apply-retention":
+        asyncio.run(apply_retention(args))
+    elif args.command == "process-privacy-requests":
+        asyncio.run(process_privacy_requests(args))
+    elif args.command == "reconcile-counters":
+        asyncio.run(reconcile_counters())
+    elif args.command == "rebuild-hourly-counts":
+        asyncio.run(rebuild_hourly_counts(args.since, args.campaign_id))
+    elif args.command == "replay-spool":
+        asyncio.run(replay_spool(args.dir))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
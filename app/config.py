@@ -24,6 +24,124 @@ class Settings(BaseSettings):
     # CORS configuration
     frontend_url: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
     
+    # Scan redirect path: 'standard' (FastAPI handler, synchronous insert) or
+    # 'fast' (raw ASGI redirect from the in-memory routing table, batched inserts)
+    redirect_mode: str = os.getenv("REDIRECT_MODE", "standard")
+    routing_table_refresh_seconds: float = float(os.getenv("ROUTING_TABLE_REFRESH_SECONDS", "30"))
+    scan_batch_size: int = int(os.getenv("SCAN_BATCH_SIZE", "500"))
+    scan_flush_interval: float = float(os.getenv("SCAN_FLUSH_INTERVAL", "0.25"))
+    scan_queue_max: int = int(os.getenv("SCAN_QUEUE_MAX", "100000"))
+    # Bulk scan uploads (POST /admin/scans/bulk): rows per insert transaction
+    # and the largest accepted body after decompression
+    bulk_ingest_batch_size: int = int(os.getenv("BULK_INGEST_BATCH_SIZE", "5000"))
+    bulk_ingest_max_bytes: int = int(os.getenv("BULK_INGEST_MAX_BYTES", str(256 * 1024 * 1024)))
+    # Oldest scan a bulk upload may backfill; visitor salts are kept at least this long
+    bulk_ingest_max_age_days: int = int(os.getenv("BULK_INGEST_MAX_AGE_DAYS", "7"))
+    # Bulk campaign creation (POST /admin/campaigns/bulk and /admin/campaigns/import)
+    bulk_campaign_max: int = int(os.getenv("BULK_CAMPAIGN_MAX", "1000"))
+    
+    # Per-campaign in-memory store of the last 48 hours of scans written by this
+    # process: latest scans kept per campaign and campaigns held before eviction.
+    # Only for a single app process; ignored when several workers are detected
+    recent_scans_enabled: bool = os.getenv("RECENT_SCANS_ENABLED", "false").lower() == "true"
+    recent_scans_per_campaign: int = int(os.getenv("RECENT_SCANS_PER_CAMPAIGN", "50"))
+    recent_scans_max_campaigns: int = int(os.getenv("RECENT_SCANS_MAX_CAMPAIGNS", "5000"))
+    
+    # Bot hits on tracking URLs (by user agent, crawler IP range or per-IP rate)
+    # are counted per campaign in bot_scan_counts instead of stored as scans
+    bot_filter_enabled: bool = os.getenv("BOT_FILTER_ENABLED", "true").lower() == "true"
+    bot_ip_ranges_file: str = os.getenv("BOT_IP_RANGES_FILE", "")
+    bot_max_hits_per_minute: int = int(os.getenv("BOT_MAX_HITS_PER_MINUTE", "120"))
+    bot_flush_interval: float = float(os.getenv("BOT_FLUSH_INTERVAL", "10"))
+    
+    # Repeat hits of one visitor on one campaign within SCAN_DEDUP_WINDOW_SECONDS
+    # (prefetches, double taps) are redirected but stored once (0 disables)
+    scan_dedup_window_seconds: float = float(os.getenv("SCAN_DEDUP_WINDOW_SECONDS", "2"))
+    scan_dedup_max_entries: int = int(os.getenv("SCAN_DEDUP_MAX_ENTRIES", "100000"))
+    
+    # Raw scan feed: default page size, and how old a scan must be before the
+    # feed hands it out (so in-flight writes are not skipped by a cursor)
+    scan_feed_page_size: int = int(os.getenv("SCAN_FEED_PAGE_SIZE", "1000"))
+    scan_feed_settle_seconds: float = float(os.getenv("SCAN_FEED_SETTLE_SECONDS", "30"))
+    # Durable scan spool: when set, scans are appended to memory-mapped segment
+    # files under this directory and replayed into the database from there
+    scan_spool_dir: str = os.getenv("SCAN_SPOOL_DIR", "")
+    scan_spool_segment_bytes: int = int(os.getenv("SCAN_SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+    scan_spool_max_bytes: int = int(os.getenv("SCAN_SPOOL_MAX_BYTES", str(1024 * 1024 * 1024)))
+    scan_spool_fsync_interval: float = float(os.getenv("SCAN_SPOOL_FSYNC_INTERVAL", "0.05"))
+    
+    # Logging
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_format: str = os.getenv("LOG_FORMAT", "json")  # 'json' or 'text'
+    log_scan_sample_rate: float = float(os.getenv("LOG_SCAN_SAMPLE_RATE", "0.01"))
+    log_requests: bool = os.getenv("LOG_REQUESTS", "true").lower() == "true"
+    
+    # Rate limits on the public endpoints, as COUNT/SECONDS per client IP and
+    # per campaign (empty = no limit); buckets are per worker unless
+    # RATE_LIMIT_SHARED_PATH names a file (e.g. under /dev/shm) they share
+    rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    rate_limit_scan_per_ip: str = os.getenv("RATE_LIMIT_SCAN_PER_IP", "120/60")
+    rate_limit_scan_per_campaign: str = os.getenv("RATE_LIMIT_SCAN_PER_CAMPAIGN", "")
+    rate_limit_analytics_per_ip: str = os.getenv("RATE_LIMIT_ANALYTICS_PER_IP", "60/60")
+    rate_limit_analytics_per_campaign: str = os.getenv("RATE_LIMIT_ANALYTICS_PER_CAMPAIGN", "600/60")
+    rate_limit_export_per_ip: str = os.getenv("RATE_LIMIT_EXPORT_PER_IP", "5/60")
+    rate_limit_export_per_campaign: str = os.getenv("RATE_LIMIT_EXPORT_PER_CAMPAIGN", "20/60")
+    rate_limit_max_keys: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    rate_limit_shared_path: str = os.getenv("RATE_LIMIT_SHARED_PATH", "")
+    
+    # Proxies in front of the app that append to X-Forwarded-For (1 on Railway);
+    # the client IP is read from that header instead of the socket (0 = off)
+    trusted_proxy_hops: int = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+    
+    # Responses: JSON bodies of at least RESPONSE_COMPRESSION_MIN_BYTES are gzip
+    # or brotli compressed for clients that accept it (0 disables compression)
+    response_compression_min_bytes: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    response_gzip_level: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    response_brotli_quality: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+    
+    # Metrics
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    metrics_token: Optional[str] = os.getenv("METRICS_TOKEN")
+    event_loop_lag_interval: float = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+    
+    # Query profiling (opt-in, adds per-request overhead)
+    query_profiling_enabled: bool = os.getenv("QUERY_PROFILING_ENABLED", "false").lower() == "true"
+    query_profiling_n_plus_one_threshold: int = int(os.getenv("QUERY_PROFILING_N_PLUS_ONE_THRESHOLD", "5"))
+    query_profiling_window_seconds: int = int(os.getenv("QUERY_PROFILING_WINDOW_SECONDS", "300"))
+    
+    # Database startup: 'verify' only checks the schema is at the migration head
+    # (one query per worker); 'create' runs create_all and seeds the admin on every boot
+    db_startup_mode: str = os.getenv("DB_STARTUP_MODE", "verify")
+    # `python main.py` runs migrations and admin seeding once before starting uvicorn
+    run_migrations_on_start: bool = os.getenv("RUN_MIGRATIONS_ON_START", "true").lower() == "true"
+    
+    # Retention: raw scans older than RETENTION_RAW_DAYS, or of campaigns archived
+    # for longer than RETENTION_ARCHIVED_DAYS, are folded into daily rollups and
+    # purged by `python -m app.cli apply-retention`; 0 disables a rule
+    retention_raw_days: int = int(os.getenv("RETENTION_RAW_DAYS", "0"))
+    retention_archived_days: int = int(os.getenv("RETENTION_ARCHIVED_DAYS", "0"))
+    retention_batch_size: int = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))
+    retention_pause: float = float(os.getenv("RETENTION_PAUSE", "0.1"))
+    
+    # Privacy requests: pending requests are picked up every PRIVACY_PROCESSOR_INTERVAL
+    # seconds (0 disables the in-process worker; use `python -m app.cli process-privacy-requests`)
+    privacy_processor_interval: float = float(os.getenv("PRIVACY_PROCESSOR_INTERVAL", "60"))
+    privacy_group_size: int = int(os.getenv("PRIVACY_GROUP_SIZE", "100"))
+    privacy_batch_size: int = int(os.getenv("PRIVACY_BATCH_SIZE", "1000"))
+    privacy_max_rows_per_second: float = float(os.getenv("PRIVACY_MAX_ROWS_PER_SECOND", "5000"))
+    
+    # Dashboard counters are kept in step with writes and recounted every
+    # COUNTER_RECONCILE_INTERVAL seconds to correct any drift (0 disables)
+    counter_reconcile_interval: float = float(os.getenv("COUNTER_RECONCILE_INTERVAL", "300"))
+    # IANA timezone of the admin dashboard's "scans today"; campaigns have their own
+    dashboard_timezone: str = os.getenv("DASHBOARD_TIMEZONE", "UTC")
+    
+    # Anonymous visitor ids are salted per day, week or month; a visitor keeps
+    # one id within a period, and expired salts are deleted so ids cannot be
+    # linked across periods (cohort retention is therefore bounded by it)
+    visitor_id_rotation: str = os.getenv("VISITOR_ID_ROTATION", "week")
+    visitor_salt_refresh_seconds: float = float(os.getenv("VISITOR_SALT_REFRESH_SECONDS", "300"))
+    
     jwt_algorithm: str = "HS256"
     jwt_expire_hours: int = 24
     
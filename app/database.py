@@ -1,11 +1,21 @@
+import logging
+import re
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import Column, MetaData, PrimaryKeyConstraint, String, Table, inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
+# SQL echo goes through the logging pipeline; echo=True would attach its own
+# synchronous stdout handler to the engine logger
+if settings.environment == "development":
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
 engine = create_async_engine(
     settings.database_url,
-    echo=settings.environment == "development",
     future=True
 )
 
@@ -22,6 +32,78 @@ async def get_database():
         finally:
             await session.close()
 
+# Shared by every process that changes the schema or seeds data, so concurrent
+# deploys take turns instead of racing each other's DDL and inserts
+SCHEMA_LOCK_ID = 727_001
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+# Same layout Alembic uses, kept out of Base.metadata so create_all/drop_all ignore it
+alembic_version = Table(
+    "alembic_version",
+    MetaData(),
+    Column("version_num", String(32), nullable=False),
+    PrimaryKeyConstraint("version_num", name="alembic_version_pkc"),
+)
+
+_REVISION = re.compile(r"^revision\b[^=]*=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision\b[^=]*=(.*)$", re.M)
+
+def get_expected_revision() -> Optional[str]:
+    """Head revision of the migrations shipped with this build.
+
+    Read straight from the version files: loading Alembic's ScriptDirectory
+    costs about half a second of imports on every worker boot.
+    """
+    revisions, parents = set(), set()
+    for path in MIGRATIONS_DIR.glob("*.py"):
+        source = path.read_text()
+        revision = _REVISION.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION.search(source)
+        if down_revision:
+            parents.update(re.findall(r"['\"]([^'\"]+)['\"]", down_revision.group(1)))
+
+    heads = revisions - parents
+    if len(heads) > 1:
+        raise RuntimeError(f"Multiple migration heads: {sorted(heads)}")
+    return heads.pop() if heads else None
+
+async def get_current_revision() -> Optional[str]:
+    """Revision recorded by Alembic, or None if the database is not migrated."""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except DBAPIError:
+            return None
+        return result.scalar()
+
+async def acquire_schema_lock(conn) -> None:
+    """Take the schema advisory lock until the current transaction ends.
+
+    Only Postgres supports it; elsewhere this is a no-op.
+    """
+    if engine.dialect.name == "postgresql":
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_ID})
+
+def stamp_revision(sync_conn, revision: Optional[str] = None) -> None:
+    """Record ``revision`` (default: the head) as the applied migration."""
+    revision = revision or get_expected_revision()
+    alembic_version.create(sync_conn, checkfirst=True)
+    sync_conn.execute(alembic_version.delete())
+    if revision:
+        sync_conn.execute(alembic_version.insert().values(version_num=revision))
+
 async def create_tables():
+    """Legacy startup path: create missing tables directly from the models.
+
+    A database created from scratch here is stamped with the migration head so
+    it can later switch to ``DB_STARTUP_MODE=verify`` and Alembic upgrades.
+    """
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await acquire_schema_lock(conn)
+        fresh = not await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("campaigns"))
+        await conn.run_sync(Base.metadata.create_all)
+        if fresh:
+            await conn.run_sync(stamp_revision)
\ No newline at end of file
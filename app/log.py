@@ -0,0 +1,160 @@
+"""Structured, non-blocking logging.
+
+Records are handed to a bounded in-memory queue on the calling thread and
+formatted as JSON and written to stdout by a ``QueueListener`` thread, so
+the event loop never blocks on terminal or pipe I/O. The queue handler only
+does the work that must happen on the caller's thread: rendering the message,
+capturing tracebacks, stamping the request id from the contextvar and
+sampling high-volume events.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        payload["pid"] = record.process
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-5s [%(name)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{line} request_id={request_id}" if request_id else line
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of records tagged with ``extra={"sample": name}``.
+
+    Untagged records always pass. Kept records carry ``sample_rate`` so
+    counts can be scaled back up downstream.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        name = getattr(record, "sample", None)
+        if name is None:
+            return True
+        rate = self.rates.get(name, 1.0)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0 or random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks and defers JSON encoding to the listener."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        # Resolve everything that is not safe to touch from another thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, "request_id", None) is None:
+            request_id = request_id_var.get()
+            if request_id is not None:
+                record.request_id = request_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Shedding log lines beats stalling requests behind stdout
+            NonBlockingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    scan_sample_rate: Optional[float] = None,
+    queue_size: int = 10000,
+) -> None:
+    """Route all logging (including uvicorn's) through the queue handler."""
+    global _listener
+
+    try:
+        from .config import settings
+        level = level or settings.log_level
+        fmt = fmt or settings.log_format
+        scan_sample_rate = settings.log_scan_sample_rate if scan_sample_rate is None else scan_sample_rate
+    except Exception:
+        level = level or os.getenv("LOG_LEVEL", "INFO")
+        fmt = fmt or os.getenv("LOG_FORMAT", "json")
+        scan_sample_rate = 1.0 if scan_sample_rate is None else scan_sample_rate
+
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter({"scan": scan_sample_rate}))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+    # Let uvicorn's loggers flow into the same pipeline instead of their own handlers
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread (runs at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
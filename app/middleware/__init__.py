@@ -0,0 +1,12 @@
+from .compression import CompressionMiddleware
+from .forwarded import ForwardedForMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import QueryProfilerMiddleware
+from .rate_limit import RateLimitMiddleware
+from .request_context import RequestContextMiddleware
+from .scan_redirect import ScanRedirectMiddleware
+
+__all__ = [
+    "CompressionMiddleware", "ForwardedForMiddleware", "MetricsMiddleware", "QueryProfilerMiddleware",
+    "RateLimitMiddleware", "RequestContextMiddleware", "ScanRedirectMiddleware"
+]
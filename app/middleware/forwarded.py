@@ -0,0 +1,36 @@
+from typing import Optional
+
+class ForwardedForMiddleware:
+    """Takes the client address from ``X-Forwarded-For`` behind ``trusted_hops`` proxies.
+
+    Each proxy appends the address it received the request from, so with N
+    trusted proxies in front of the app the client is the N-th entry from
+    the right; anything further left was sent by the client and can be
+    forged. Rate limits, bot detection, visitor ids and logs then see the
+    real client instead of the proxy. Requests without the header keep the
+    socket address.
+    """
+
+    def __init__(self, app, trusted_hops: int = 1):
+        self.app = app
+        self.trusted_hops = trusted_hops
+
+    def _client_host(self, header: bytes) -> Optional[str]:
+        hosts = [host.strip() for host in header.decode("latin-1").split(",")]
+        hosts = [host for host in hosts if host]
+        if not hosts:
+            return None
+        return hosts[-min(self.trusted_hops, len(hosts))]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            forwarded = None
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    # Several headers are one comma-separated list
+                    forwarded = value if forwarded is None else forwarded + b"," + value
+            if forwarded is not None:
+                host = self._client_host(forwarded)
+                if host is not None:
+                    scope["client"] = (host, 0)
+        await self.app(scope, receive, send)
@@ -0,0 +1,47 @@
+import time
+from ..metrics import (
+    RequestStats, current_request_stats, http_requests_total, http_request_duration_seconds,
+    db_queries_per_request, db_time_per_request_seconds
+)
+
+class MetricsMiddleware:
+    """Raw ASGI middleware recording latency and SQL usage per route template.
+
+    Routes are labelled by their template (``/scan/{campaign_id}``), never by
+    the raw path, so label cardinality stays bounded. Requests that match no
+    route are grouped under ``unmatched``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request_stats.reset(token)
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+
+            http_requests_total.labels(method, route_path, str(status_code)).inc()
+            http_request_duration_seconds.labels(method, route_path).observe(elapsed)
+            db_queries_per_request.labels(route_path).observe(stats.queries)
+            db_time_per_request_seconds.labels(route_path).observe(stats.db_time)
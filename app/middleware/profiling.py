@@ -0,0 +1,56 @@
+import logging
+from ..profiling import RequestProfile, current_profile, slow_query_table
+
+logger = logging.getLogger(__name__)
+
+class QueryProfilerMiddleware:
+    """Collects the SQL run by each request and reports it.
+
+    Adds an ``X-Query-Profile`` header summarising the request's queries and
+    feeds the rolling slow-query table served at ``/admin/profiling/queries``.
+    Requests that repeat a statement ``n_plus_one_threshold`` times or more
+    are reported as N+1 suspects.
+    """
+
+    header_name = b"x-query-profile"
+
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                profile.route = getattr(route, "path", None)
+                headers = list(message.get("headers", []))
+                headers.append((self.header_name, profile.header_value(self.n_plus_one_threshold).encode()))
+                message = {**message, "headers": headers}
+
+                repeated = profile.repeated(self.n_plus_one_threshold)
+                if repeated:
+                    logger.warning(
+                        "Possible N+1 query pattern",
+                        extra={
+                            "method": scope["method"],
+                            "route": profile.route or scope["path"],
+                            "repeated_statements": repeated,
+                        }
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            if profile.route is None:
+                profile.route = getattr(scope.get("route"), "path", None)
+            if profile.total_queries:
+                slow_query_table.add_profile(profile, self.n_plus_one_threshold)
@@ -0,0 +1,100 @@
+import math
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+from ..metrics import registry
+from ..services.rate_limit import Limit, SCAN_RATE_LIMITED
+
+requests_rate_limited_total = registry.counter(
+    "requests_rate_limited_total", "Requests over a rate limit (429, or an unrecorded scan)", ("route_class", "limit")
+)
+
+SCAN = "scan"
+ANALYTICS = "analytics"
+EXPORT = "export"
+
+_SCAN_PATH = re.compile(r"/scan/([A-Za-z0-9_-]{14})")
+_CAMPAIGN_PATH = re.compile(r"/api/campaigns/([A-Za-z0-9_-]{14})/(stats|heatmap|cohorts|validate|export)")
+
+# Templates for rejected requests, which never reach the router
+_ROUTES = {
+    name: SimpleNamespace(path=f"/api/campaigns/{{campaign_id}}/{name}", name=f"rate_limited_{name}")
+    for name in ("stats", "heatmap", "cohorts", "validate", "export")
+}
+_ROUTES["scan"] = SimpleNamespace(path="/scan/{campaign_id}", name="rate_limited_scan")
+
+_BODY = b'{"detail":"Too many requests"}'
+
+class RateLimitMiddleware:
+    """Per-IP and per-campaign token buckets on the unauthenticated endpoints.
+
+    Public paths fall into three route classes: ``scan`` (the redirect),
+    ``analytics`` (stats, heatmap, cohorts, validate) and ``export`` (XLSX
+    generation). ``limits`` maps each class to its per-IP and per-campaign
+    ``Limit`` (None for no limit). A request must get a token from both
+    buckets; otherwise it is answered with 429 and ``Retry-After`` right
+    here, before routing, dependency injection or a DB session. Scans are
+    the exception: a person behind a busy shared IP must still get the
+    redirect, so an over-limit scan is passed on with ``SCAN_RATE_LIMITED``
+    set in its scope and is redirected without being recorded. Other paths
+    pass straight through.
+    """
+
+    def __init__(self, app, buckets, limits: Dict[str, Tuple[Optional[Limit], Optional[Limit]]]):
+        self.app = app
+        self.buckets = buckets
+        self.limits = limits
+
+    def _classify(self, path: str) -> Optional[Tuple[str, str, str]]:
+        if path.startswith("/scan/"):
+            match = _SCAN_PATH.fullmatch(path)
+            return (SCAN, match.group(1), "scan") if match else None
+        if path.startswith("/api/campaigns/"):
+            match = _CAMPAIGN_PATH.fullmatch(path)
+            if match:
+                action = match.group(2)
+                return (EXPORT if action == "export" else ANALYTICS), match.group(1), action
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        target = self._classify(scope["path"])
+        if target is None:
+            await self.app(scope, receive, send)
+            return
+
+        route_class, campaign_id, action = target
+        ip_limit, campaign_limit = self.limits.get(route_class, (None, None))
+        checks, kinds = [], []
+        client = scope.get("client")
+        if ip_limit is not None and client:
+            checks.append((f"{route_class}:ip:{client[0]}", ip_limit))
+            kinds.append("ip")
+        if campaign_limit is not None:
+            checks.append((f"{route_class}:campaign:{campaign_id}", campaign_limit))
+            kinds.append("campaign")
+        denied = self.buckets.acquire(checks, time.time()) if checks else None
+        if denied is None:
+            await self.app(scope, receive, send)
+            return
+
+        index, wait = denied
+        requests_rate_limited_total.labels(route_class, kinds[index]).inc()
+        if route_class == SCAN:
+            scope[SCAN_RATE_LIMITED] = True
+            await self.app(scope, receive, send)
+            return
+        scope["route"] = _ROUTES[action]
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_BODY)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _BODY})
@@ -0,0 +1,69 @@
+import logging
+import re
+import time
+import uuid
+from ..log import request_id_var
+
+logger = logging.getLogger("app.requests")
+
+# Accept caller supplied ids only if they look like ids, to keep logs clean
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+class RequestContextMiddleware:
+    """Assigns a correlation id to every request and logs its completion.
+
+    The id comes from an incoming ``X-Request-ID`` header when present,
+    otherwise a new one is generated. It is stored in a contextvar so every
+    log record emitted while handling the request carries it, and echoed
+    back in the response headers. Completion logs for the scan redirect are
+    sampled like the other per-scan events.
+    """
+
+    def __init__(self, app, log_requests: bool = True):
+        self.app = app
+        self.log_requests = log_requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.log_requests:
+                route = getattr(scope.get("route"), "path", None)
+                extra = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                }
+                if route == "/scan/{campaign_id}":
+                    extra["sample"] = "scan"
+                logger.info("request completed", extra=extra)
+            request_id_var.reset(token)
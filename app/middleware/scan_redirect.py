@@ -0,0 +1,77 @@
+import re
+from types import SimpleNamespace
+from typing import Optional
+from ..services.bot_filter import BotFilter
+from ..services.rate_limit import SCAN_RATE_LIMITED
+from ..services.routing_table import CampaignRoutingTable
+from ..services.scan_dedup import ScanDeduplicator
+from ..services.scan_ingest import ScanEvent, ScanIngestor
+
+_CAMPAIGN_ID = re.compile(r"[A-Za-z0-9_-]{14}")
+_SCAN_PREFIX = "/scan/"
+
+# Lets the metrics and logging middleware label fast-path hits like the regular route
+FAST_PATH_ROUTE = SimpleNamespace(path="/scan/{campaign_id}", name="scan_fast_path")
+
+class ScanRedirectMiddleware:
+    """Serves ``GET /scan/{campaign_id}`` straight from the routing table.
+
+    On a hit the scan is queued for the background writer (unless it is over
+    its rate limit, ``bots`` classifies it as a bot or ``dedup`` says it
+    repeats one just seen) and a bare 302 is sent without entering FastAPI's
+    router, dependency injection or a DB session. ``HEAD`` gets the same
+    302 but is never recorded. Anything else - other paths, malformed ids, campaigns
+    missing from the table - falls through to the regular app, whose handler
+    still does a database lookup, so a stale table can delay but never lose
+    a redirect.
+    """
+
+    def __init__(
+        self,
+        app,
+        routing_table: CampaignRoutingTable,
+        ingestor: ScanIngestor,
+        bots: Optional[BotFilter] = None,
+        dedup: Optional[ScanDeduplicator] = None
+    ):
+        self.app = app
+        self.routing_table = routing_table
+        self.ingestor = ingestor
+        self.bots = bots
+        self.dedup = dedup
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            path = scope["path"]
+            if path.startswith(_SCAN_PREFIX) and self.ingestor.running:
+                campaign_id = path[len(_SCAN_PREFIX):]
+                if _CAMPAIGN_ID.fullmatch(campaign_id):
+                    location = self.routing_table.lookup(campaign_id)
+                    if location is not None:
+                        await self._redirect(scope, send, campaign_id, location)
+                        return
+
+        await self.app(scope, receive, send)
+
+    async def _redirect(self, scope, send, campaign_id: str, location: bytes) -> None:
+        user_agent = None
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+                break
+        client = scope.get("client")
+        ip_address = client[0] if client else None
+
+        # HEAD comes from link unfurlers and uptime checks; it is redirected but never a scan
+        if scope["method"] == "GET" and not scope.get(SCAN_RATE_LIMITED):
+            bot = self.bots is not None and self.bots.is_bot(campaign_id, ip_address, user_agent)
+            if not bot and (self.dedup is None or not self.dedup.is_duplicate(campaign_id, ip_address, user_agent)):
+                self.ingestor.submit(ScanEvent(campaign_id, ip_address=ip_address, user_agent=user_agent))
+
+        scope["route"] = FAST_PATH_ROUTE
+        await send({
+            "type": "http.response.start",
+            "status": 302,
+            "headers": [(b"location", location), (b"content-length", b"0")],
+        })
+        await send({"type": "http.response.body", "body": b""})
@@ -3,8 +3,17 @@ from .campaign import Campaign
 from .scan import Scan
 from .user import AdminUser
 from .privacy import PrivacyRequest
+from .compact_scan import CampaignKey, City, CompactScan
+from .checkpoint import JobCheckpoint
+from .rollup import ScanDailyRollup, CampaignVisitorSketch, ScanHourlyCount, BotScanCount
+from .counter import StatCounter
+from .visitor_salt import VisitorSalt
 
 # Add relationship to Campaign model
 Campaign.scans = relationship("Scan", back_populates="campaign")
 
-__all__ = ["Campaign", "Scan", "AdminUser", "PrivacyRequest"]
\ No newline at end of file
+__all__ = [
+    "Campaign", "Scan", "AdminUser", "PrivacyRequest",
+    "CampaignKey", "City", "CompactScan", "JobCheckpoint", "ScanDailyRollup",
+    "CampaignVisitorSketch", "ScanHourlyCount", "BotScanCount", "StatCounter", "VisitorSalt"
+]
\ No newline at end of file
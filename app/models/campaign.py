@@ -15,4 +15,5 @@ class Campaign(Base):
     active = Column(Boolean, default=True)
     client_access_enabled = Column(Boolean, default=True)
     archived = Column(Boolean, default=False)
-    archived_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    archived_at = Column(DateTime, nullable=True)
+    timezone = Column(String(64), nullable=False, default="UTC", server_default="UTC")  # IANA name for local-time analytics
\ No newline at end of file
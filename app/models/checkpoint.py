@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Text, BigInteger, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class JobCheckpoint(Base):
+    """Resume position of a long-running batch job, committed with each batch."""
+    __tablename__ = "job_checkpoints"
+    
+    name = Column(String(64), primary_key=True)
+    position = Column(Text)  # JSON
+    rows_processed = Column(BigInteger, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
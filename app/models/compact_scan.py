@@ -0,0 +1,42 @@
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, BigInteger, LargeBinary, DateTime,
+    ForeignKey, Index, UniqueConstraint
+)
+from ..database import Base
+
+# SQLite only auto-increments INTEGER PRIMARY KEY columns
+BigIntegerPK = BigInteger().with_variant(Integer, "sqlite")
+
+class CampaignKey(Base):
+    """Integer surrogate for ``campaigns.campaign_id`` used by compact scan rows."""
+    __tablename__ = "campaign_keys"
+    
+    key = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(14), ForeignKey("campaigns.campaign_id"), unique=True, nullable=False)
+
+class City(Base):
+    """City dictionary; country_code is '' when the country is unknown."""
+    __tablename__ = "cities"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(100), nullable=False)
+    country_code = Column(String(2), nullable=False, default="")
+    
+    __table_args__ = (UniqueConstraint("name", "country_code", name="uq_cities_name_country"),)
+
+class CompactScan(Base):
+    """Narrow encoding of ``Scan``: see ``app.utils.encoding`` for the codecs.
+
+    Fixed-width columns come first so Postgres does not pad between them.
+    """
+    __tablename__ = "scans_compact"
+    
+    id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
+    occurred_at = Column(DateTime, nullable=False)
+    campaign_key = Column(Integer, ForeignKey("campaign_keys.key"), nullable=False)
+    city_id = Column(Integer, ForeignKey("cities.id"), nullable=True)
+    device = Column(SmallInteger, nullable=False, default=0)
+    country_code = Column(String(2), nullable=True)
+    visitor_id = Column(LargeBinary(8), nullable=False, index=True)
+    
+    __table_args__ = (Index("ix_scans_compact_campaign_occurred", "campaign_key", "occurred_at"),)
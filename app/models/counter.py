@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, SmallInteger, BigInteger, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class StatCounter(Base):
+    """One shard of an incrementally maintained dashboard counter.
+
+    ``bucket`` is ``""`` for all-time values or an ISO date for per-UTC-day
+    values. Writers add to a random shard so concurrent scan inserts do not
+    queue on a single row; readers sum the shards.
+    """
+    __tablename__ = "stat_counters"
+    
+    name = Column(String(64), primary_key=True)
+    bucket = Column(String(10), primary_key=True, default="")
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, Integer, Text, DateTime
 from sqlalchemy.sql import func
 from ..database import Base
 import uuid
@@ -10,6 +10,13 @@ class PrivacyRequest(Base):
     email = Column(String(255))
     request_type = Column(String(50))  # 'access', 'delete', 'export'
     anonymous_user_id = Column(String(64))
-    status = Column(String(50), default="pending")
+    status = Column(String(50), default="pending", index=True)  # pending, processing, completed, failed
     created_at = Column(DateTime, server_default=func.now())
-    processed_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    processed_at = Column(DateTime, nullable=True)
+    
+    # Set by the processor that picked the request up
+    claim_token = Column(String(36), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    rows_affected = Column(Integer, nullable=True)
+    result = Column(Text, nullable=True)  # JSON export for access/export requests
+    error = Column(Text, nullable=True)
@@ -0,0 +1,69 @@
+from sqlalchemy import Column, String, Integer, SmallInteger, Date, DateTime, ForeignKey, Index, LargeBinary
+from sqlalchemy.sql import func
+from ..database import Base
+
+class ScanDailyRollup(Base):
+    """Daily aggregate of scans that have been purged from the raw table.
+
+    A campaign-day can have several rows per device/city/country when it was
+    compacted in more than one batch; readers always sum. ``visitor_count``
+    is distinct per row only and must not be summed into unique visitors;
+    ``CampaignVisitorSketch`` holds the campaign-wide set.
+    """
+    __tablename__ = "scan_daily_rollups"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(14), ForeignKey("campaigns.campaign_id"), nullable=False)
+    day = Column(Date, nullable=False)
+    device_type = Column(String(50))
+    city = Column(String(100))
+    country = Column(String(100))
+    scan_count = Column(Integer, nullable=False, default=0)
+    visitor_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (Index("ix_scan_daily_rollups_campaign_day", "campaign_id", "day"),)
+
+class CampaignVisitorSketch(Base):
+    """HyperLogLog registers of every visitor compacted out of ``scans`` for a campaign.
+
+    Merged with the raw visitors of the campaign when unique visitors are
+    read, so a visitor is counted once across days, devices, compaction
+    batches and the raw/compacted boundary.
+    """
+    __tablename__ = "campaign_visitor_sketches"
+    
+    campaign_id = Column(String(14), ForeignKey("campaigns.campaign_id"), primary_key=True)
+    registers = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class ScanHourlyCount(Base):
+    """Scans per campaign per UTC hour, kept in step with scan writes.
+
+    Survives retention compaction, so time-of-day and local-day views can be
+    derived for any timezone and range without touching raw scans. Like
+    ``StatCounter``, writers add to a random shard so concurrent scans of
+    one campaign do not queue on a single row; readers sum the shards.
+    """
+    __tablename__ = "scan_hourly_counts"
+    
+    campaign_id = Column(String(14), ForeignKey("campaigns.campaign_id"), primary_key=True)
+    hour = Column(DateTime, primary_key=True)  # UTC, truncated to the hour
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    scan_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Cross-campaign "today" for the admin dashboard in a non-UTC timezone
+    __table_args__ = (Index("ix_scan_hourly_counts_hour", "hour"),)
+
+class BotScanCount(Base):
+    """Hits on a campaign's tracking URL classified as bots, per UTC day and reason.
+
+    Bot traffic is counted here instead of being stored in ``scans``.
+    """
+    __tablename__ = "bot_scan_counts"
+    
+    campaign_id = Column(String(14), ForeignKey("campaigns.campaign_id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    reason = Column(String(16), primary_key=True)  # user_agent, ip_range or rate
+    hit_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
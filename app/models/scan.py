@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -18,4 +18,11 @@ class Scan(Base):
     user_agent_hash = Column(String(64))
     created_at = Column(DateTime, server_default=func.now(), index=True)
     
-    campaign = relationship("Campaign", back_populates="scans")
\ No newline at end of file
+    campaign = relationship("Campaign", back_populates="scans")
+    
+    # Every per-campaign time-range query (dashboards, retention) seeks on the
+    # first; with ``id`` as tie-breaker both also serve the keyset scan feed
+    __table_args__ = (
+        Index("ix_scans_campaign_timestamp_id", "campaign_id", "timestamp", "id"),
+        Index("ix_scans_timestamp_id", "timestamp", "id"),
+    )
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class VisitorSalt(Base):
+    """Random salt for anonymous visitor ids during one rotation period.
+
+    Rows are deleted shortly after their period ends, after which the ids
+    issued during it can no longer be recomputed from an IP and user agent.
+    """
+    __tablename__ = "visitor_salts"
+    
+    period = Column(String(16), primary_key=True)  # e.g. 2026-10-19, 2026-W42, 2026-10
+    salt = Column(String(64), nullable=False)  # hex
+    starts_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, server_default=func.now())
@@ -0,0 +1,187 @@
+"""Opt-in SQL profiling scoped to individual requests.
+
+Every statement is reduced to a fingerprint (literals and ``IN`` lists
+collapsed) and accumulated in the current request's profile, found through
+a contextvar. A fingerprint that repeats many times within one request is
+the signature of an N+1 loop. Completed profiles also feed a rolling table
+of the most expensive fingerprints across requests.
+"""
+import contextvars
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_POSTCOMPILE = re.compile(r"\(?\s*\[POSTCOMPILE_\w+\]\s*\)?")
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_NUMBERED_PARAM = re.compile(r"\$\d+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so executions of the same query compare equal."""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _POSTCOMPILE.sub("(...)", normalized)
+    normalized = _NUMBERED_PARAM.sub("?", normalized)
+    normalized = _PARAM_LIST.sub("(...)", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    return normalized
+
+
+class RequestProfile:
+    __slots__ = ("route", "statements", "total_queries", "total_time")
+
+    def __init__(self):
+        self.route: Optional[str] = None
+        # fingerprint -> [count, total seconds, max seconds]
+        self.statements: Dict[str, List[float]] = {}
+        self.total_queries = 0
+        self.total_time = 0.0
+
+    def record(self, statement: str, elapsed: float) -> None:
+        key = fingerprint(statement)
+        entry = self.statements.get(key)
+        if entry is None:
+            self.statements[key] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+        self.total_queries += 1
+        self.total_time += elapsed
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Fingerprints executed at least ``threshold`` times (likely N+1)."""
+        return {
+            key: int(entry[0])
+            for key, entry in self.statements.items()
+            if entry[0] >= threshold
+        }
+
+    def header_value(self, threshold: int) -> str:
+        return (
+            f"queries={self.total_queries}; "
+            f"db_ms={self.total_time * 1000:.2f}; "
+            f"distinct={len(self.statements)}; "
+            f"n_plus_one={len(self.repeated(threshold))}"
+        )
+
+
+current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "current_query_profile", default=None
+)
+
+
+class SlowQueryTable:
+    """Rolling aggregate of fingerprint cost across requests.
+
+    Two windows are kept: the current one and the one before it. Reports
+    merge both, so entries age out after one to two windows without any
+    per-entry timestamps. The table is capped at ``capacity`` fingerprints
+    per window; when full the cheapest entry is evicted.
+    """
+
+    def __init__(self, capacity: int = 500, window_seconds: float = 300.0):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self._current: Dict[str, Dict[str, Any]] = {}
+        self._previous: Dict[str, Dict[str, Any]] = {}
+        self._window_started = time.monotonic()
+
+    def _rotate_if_needed(self) -> None:
+        now = time.monotonic()
+        if now - self._window_started >= self.window_seconds:
+            self._previous = self._current
+            self._current = {}
+            self._window_started = now
+
+    def add_profile(self, profile: RequestProfile, n_plus_one_threshold: int) -> None:
+        self._rotate_if_needed()
+        for key, (count, total, longest) in profile.statements.items():
+            entry = self._current.get(key)
+            if entry is None:
+                if len(self._current) >= self.capacity:
+                    cheapest = min(self._current, key=lambda k: self._current[k]["total_time"])
+                    if self._current[cheapest]["total_time"] >= total:
+                        continue
+                    del self._current[cheapest]
+                entry = self._current[key] = {
+                    "executions": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "requests": 0,
+                    "n_plus_one_requests": 0,
+                    "routes": set(),
+                }
+            entry["executions"] += count
+            entry["total_time"] += total
+            entry["max_time"] = max(entry["max_time"], longest)
+            entry["requests"] += 1
+            if count >= n_plus_one_threshold:
+                entry["n_plus_one_requests"] += 1
+            if profile.route and len(entry["routes"]) < 10:
+                entry["routes"].add(profile.route)
+
+    def top(self, limit: int = 20, order_by: str = "total_time") -> List[Dict[str, Any]]:
+        self._rotate_if_needed()
+        merged: Dict[str, Dict[str, Any]] = {}
+        for window in (self._previous, self._current):
+            for key, entry in window.items():
+                target = merged.get(key)
+                if target is None:
+                    merged[key] = {**entry, "routes": set(entry["routes"])}
+                    continue
+                for field in ("executions", "total_time", "requests", "n_plus_one_requests"):
+                    target[field] += entry[field]
+                target["max_time"] = max(target["max_time"], entry["max_time"])
+                target["routes"] |= entry["routes"]
+
+        ranked = sorted(merged.items(), key=lambda item: item[1][order_by], reverse=True)[:limit]
+        return [
+            {
+                "fingerprint": key,
+                "executions": entry["executions"],
+                "requests": entry["requests"],
+                "executions_per_request": round(entry["executions"] / entry["requests"], 2),
+                "n_plus_one_requests": entry["n_plus_one_requests"],
+                "total_ms": round(entry["total_time"] * 1000, 3),
+                "mean_ms": round(entry["total_time"] / entry["executions"] * 1000, 3),
+                "max_ms": round(entry["max_time"] * 1000, 3),
+                "routes": sorted(entry["routes"]),
+            }
+            for key, entry in ranked
+        ]
+
+    def reset(self) -> None:
+        self._current = {}
+        self._previous = {}
+        self._window_started = time.monotonic()
+
+
+slow_query_table = SlowQueryTable()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement, time.perf_counter() - context._profile_started)
+
+
+def install_query_profiler(engine) -> None:
+    """Attach the profiling hooks to an (async) SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,9 +1,21 @@
-from .campaign import CampaignCreate, CampaignUpdate, CampaignResponse, CampaignStats
-from .analytics import ScanCreate, ScanResponse, AnalyticsData, ExportRequest
+from .campaign import (
+    CampaignCreate, CampaignUpdate, CampaignResponse, CampaignWithStats, CampaignStats,
+    CampaignBulkCreate, CampaignCreated, CampaignBulkResult,
+    CampaignFilter, CampaignBulkAction, CampaignBulkActionResult
+)
+from .analytics import (
+    ScanCreate, ScanResponse, RecentScan, CityCount, DailyCount, HourlyCount, AnalyticsData,
+    ExportRequest, CampaignComparisonRequest
+)
 from .auth import UserLogin, UserCreate, UserResponse, Token, TokenData
+from .privacy import PrivacyRequestCreate, PrivacyRequestResponse, PrivacyRequestDetail
 
 __all__ = [
-    "CampaignCreate", "CampaignUpdate", "CampaignResponse", "CampaignStats",
-    "ScanCreate", "ScanResponse", "AnalyticsData", "ExportRequest", 
-    "UserLogin", "UserCreate", "UserResponse", "Token", "TokenData"
+    "CampaignCreate", "CampaignUpdate", "CampaignResponse", "CampaignWithStats", "CampaignStats",
+    "CampaignBulkCreate", "CampaignCreated", "CampaignBulkResult",
+    "CampaignFilter", "CampaignBulkAction", "CampaignBulkActionResult",
+    "ScanCreate", "ScanResponse", "RecentScan", "CityCount", "DailyCount", "HourlyCount", "AnalyticsData",
+    "ExportRequest", "CampaignComparisonRequest",
+    "UserLogin", "UserCreate", "UserResponse", "Token", "TokenData",
+    "PrivacyRequestCreate", "PrivacyRequestResponse", "PrivacyRequestDetail"
 ]
\ No newline at end of file
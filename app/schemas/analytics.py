@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any, Literal
 
 class ScanCreate(BaseModel):
     campaign_id: str
@@ -22,20 +22,50 @@ class ScanResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class RecentScan(BaseModel):
+    timestamp: datetime
+    city: Optional[str]
+    country: Optional[str]
+    device_type: Optional[str]
+
+class CityCount(BaseModel):
+    city: str
+    count: int
+
+class DailyCount(BaseModel):
+    date: date
+    count: int
+
+class HourlyCount(BaseModel):
+    hour: int
+    count: int
+
 class AnalyticsData(BaseModel):
     campaign_id: str
+    business_name: str
+    target_url: str
+    created_at: Optional[datetime]
+    timezone: str
     total_scans: int
     unique_visitors: int
+    unique_visitors_estimated: bool = False  # HyperLogLog estimate once scans have been compacted
     scans_today: int
     scans_this_week: int
-    recent_activity: List[ScanResponse]
-    geographic_data: List[Dict[str, Any]]
+    scans_last_hour: int
+    recent_activity: List[RecentScan]
+    geographic_data: List[CityCount]
     device_breakdown: Dict[str, int]
-    hourly_data: List[Dict[str, Any]]
-    daily_data: List[Dict[str, Any]]
+    daily_data: List[DailyCount]  # campaign-local days, days without scans omitted
+    hourly_data: List[HourlyCount]  # today's campaign-local hours, likewise
 
 class ExportRequest(BaseModel):
     campaign_id: str
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
-    include_raw_data: bool = True
\ No newline at end of file
+    include_raw_data: bool = True
+
+class CampaignComparisonRequest(BaseModel):
+    campaign_ids: List[str] = Field(..., min_length=1, max_length=50)
+    start_date: Optional[date] = None  # default: 30 days up to end_date
+    end_date: Optional[date] = None  # default: today (UTC)
+    granularity: Literal["day", "week", "month"] = "day"
@@ -1,12 +1,21 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, field_validator, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
+from ..utils.timezones import is_valid_timezone
+
+def _check_timezone(value: Optional[str]) -> Optional[str]:
+    if value is not None and not is_valid_timezone(value):
+        raise ValueError("Unknown timezone, use an IANA name such as Australia/Sydney")
+    return value
 
 class CampaignCreate(BaseModel):
     business_name: str
     target_url: HttpUrl
     description: Optional[str] = None
+    timezone: str = "UTC"
+    
+    _valid_timezone = field_validator("timezone")(_check_timezone)
 
 class CampaignUpdate(BaseModel):
     business_name: Optional[str] = None
@@ -14,6 +23,9 @@ class CampaignUpdate(BaseModel):
     description: Optional[str] = None
     active: Optional[bool] = None
     client_access_enabled: Optional[bool] = None
+    timezone: Optional[str] = None
+    
+    _valid_timezone = field_validator("timezone")(_check_timezone)
 
 class CampaignResponse(BaseModel):
     id: UUID
@@ -26,10 +38,51 @@ class CampaignResponse(BaseModel):
     client_access_enabled: bool
     archived: bool
     archived_at: Optional[datetime]
+    timezone: str = "UTC"
     
     class Config:
         from_attributes = True
 
+class CampaignWithStats(CampaignResponse):
+    total_scans: int
+    unique_visitors: int
+    unique_visitors_estimated: bool = False  # HyperLogLog estimate once scans have been compacted
+
+class CampaignBulkCreate(BaseModel):
+    campaigns: List[CampaignCreate] = Field(min_length=1)
+
+class CampaignCreated(CampaignResponse):
+    tracking_url: str
+    qr_url: str
+
+class CampaignBulkResult(BaseModel):
+    created: int
+    campaigns: List[CampaignCreated]
+
+class CampaignFilter(BaseModel):
+    business_name: Optional[str] = None  # case-insensitive substring
+    active: Optional[bool] = None
+    archived: Optional[bool] = None
+    client_access_enabled: Optional[bool] = None
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+
+class CampaignBulkAction(BaseModel):
+    action: Literal["archive", "unarchive", "enable_access", "disable_access", "deactivate"]
+    campaign_ids: Optional[List[str]] = Field(default=None, min_length=1)
+    filter: Optional[CampaignFilter] = None
+
+    @model_validator(mode="after")
+    def _one_target(self):
+        if (self.campaign_ids is None) == (self.filter is None):
+            raise ValueError("Give either campaign_ids or filter")
+        return self
+
+class CampaignBulkActionResult(BaseModel):
+    action: str
+    updated: int
+    campaign_ids: List[str]
+
 class CampaignStats(BaseModel):
     total_scans: int
     unique_visitors: int
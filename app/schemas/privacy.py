@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Literal
+
+class PrivacyRequestCreate(BaseModel):
+    request_type: Literal["access", "delete", "export"]
+    anonymous_user_id: str
+    email: Optional[str] = None
+
+class PrivacyRequestResponse(BaseModel):
+    id: str
+    email: Optional[str]
+    request_type: str
+    anonymous_user_id: Optional[str]
+    status: str
+    created_at: Optional[datetime]
+    processed_at: Optional[datetime]
+    rows_affected: Optional[int]
+    error: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+class PrivacyRequestDetail(PrivacyRequestResponse):
+    result: Optional[str] = None  # JSON export, once an access/export request has completed
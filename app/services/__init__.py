@@ -1,5 +1,6 @@
 from .analytics_service import AnalyticsService
 from .campaign_service import CampaignService  
+from .export_service import ExportService
 from .qr_service import QRService
 
-__all__ = ["AnalyticsService", "CampaignService", "QRService"]
\ No newline at end of file
+__all__ = ["AnalyticsService", "CampaignService", "ExportService", "QRService"]
\ No newline at end of file
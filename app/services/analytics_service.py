@@ -1,10 +1,21 @@
-from datetime import datetime, timedelta
+import logging
+from datetime import date, datetime, timedelta
 from typing import Optional, Dict, List, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, desc
 from sqlalchemy.orm import selectinload
-from ..models import Campaign, Scan
-from ..utils import generate_anonymous_user_id, parse_device_type, get_city_from_ip, get_country_from_ip
+from ..models import Campaign, Scan, ScanDailyRollup
+from ..metrics import scans_recorded_total
+from ..utils import get_zone
+from ..utils.timezones import local_range_utc, local_today, to_local_hours, epoch_day
+from .scan_ingest import ScanEvent, build_scan_row
+from .retention import rollup_totals, rollup_breakdown
+from .counters import record_scans
+from .hourly_counts import record_hourly_counts, load_hourly_counts, hour_start
+from .recent_scans import recent_scans
+from .visitor_sketch import load_sketches, count_unique_visitors
+
+logger = logging.getLogger(__name__)
 
 class AnalyticsService:
     def __init__(self, db: AsyncSession):
@@ -26,33 +37,22 @@ class AnalyticsService:
         if not campaign:
             return None
 
-        # Generate anonymous user ID
-        timestamp = datetime.utcnow()
-        anonymous_user_id = generate_anonymous_user_id(ip_address or "unknown", user_agent or "unknown", timestamp)
-        
-        # Parse device type
-        device_type = parse_device_type(user_agent or "")
-        
-        # Skip location data for now to avoid blocking HTTP requests
+        # Location data is skipped to avoid blocking HTTP requests
         # TODO: Implement proper async geolocation or use a background task
-        city = None
-        country = None
-        
-        # Create scan record
-        scan = Scan(
-            campaign_id=campaign_id,
-            anonymous_user_id=anonymous_user_id,
-            timestamp=timestamp,
-            ip_address=ip_address,
-            city=city,
-            country=country,
-            device_type=device_type,
-            user_agent_hash=user_agent[:64] if user_agent else None
-        )
+        row = build_scan_row(ScanEvent(campaign_id, ip_address=ip_address, user_agent=user_agent))
+        scan = Scan(**row)
         
         self.db.add(scan)
+        await record_scans(self.db, [scan.timestamp])
+        await record_hourly_counts(self.db, [(campaign_id, scan.timestamp)])
         await self.db.commit()
         await self.db.refresh(scan)
+        scans_recorded_total.inc()
+        recent_scans.add(campaign_id, scan.timestamp, scan.city, scan.country, scan.device_type)
+        logger.info(
+            "scan recorded",
+            extra={"campaign_id": campaign_id, "device_type": scan.device_type, "sample": "scan"}
+        )
         
         return scan
 
@@ -65,41 +65,42 @@ class AnalyticsService:
         if not campaign or not campaign.client_access_enabled:
             return None
 
-        # Get basic stats
-        total_scans = await self._get_total_scans(campaign_id)
-        unique_visitors = await self._get_unique_visitors(campaign_id)
-        scans_today = await self._get_scans_today(campaign_id)
-        scans_this_week = await self._get_scans_this_week(campaign_id)
+        # Get basic stats; scans past the retention window only exist as daily rollups
+        sketch = (await load_sketches(self.db, campaign_id)).get(campaign_id)
+        total_scans = await self._get_total_scans(campaign_id) + await rollup_totals(self.db, campaign_id)
+        unique_visitors = await count_unique_visitors(self.db, campaign_id, sketch)
+        
+        # Today, this week and the daily/hourly charts are in the campaign's timezone
+        zone_name = campaign.timezone or "UTC"
+        local_activity = await self._get_local_activity(campaign_id, get_zone(zone_name), days=30)
         
-        # Get recent activity (last 10 scans)
+        # Get recent activity (last 10 scans) and the last hour
         recent_activity = await self._get_recent_activity(campaign_id, limit=10)
+        scans_last_hour = await self._get_scans_since(campaign_id, datetime.utcnow() - timedelta(hours=1))
         
         # Get geographic breakdown
         geographic_data = await self._get_geographic_breakdown(campaign_id)
         
         # Get device breakdown
         device_breakdown = await self._get_device_breakdown(campaign_id)
-        
-        # Get daily data for charts (last 30 days)
-        daily_data = await self._get_daily_scan_data(campaign_id, days=30)
-        
-        # Get hourly data for today
-        hourly_data = await self._get_hourly_scan_data(campaign_id)
 
         return {
             "campaign_id": campaign_id,
             "business_name": campaign.business_name,
             "target_url": campaign.target_url,
             "created_at": campaign.created_at,
+            "timezone": zone_name,
             "total_scans": total_scans,
             "unique_visitors": unique_visitors,
-            "scans_today": scans_today,
-            "scans_this_week": scans_this_week,
+            "unique_visitors_estimated": sketch is not None,
+            "scans_today": local_activity["scans_today"],
+            "scans_this_week": local_activity["scans_this_week"],
+            "scans_last_hour": scans_last_hour,
             "recent_activity": recent_activity,
             "geographic_data": geographic_data,
             "device_breakdown": device_breakdown,
-            "daily_data": daily_data,
-            "hourly_data": hourly_data
+            "daily_data": local_activity["daily_data"],
+            "hourly_data": local_activity["hourly_data"]
         }
 
     async def _get_total_scans(self, campaign_id: str) -> int:
@@ -108,40 +109,67 @@ class AnalyticsService:
         )
         return result.scalar() or 0
 
-    async def _get_unique_visitors(self, campaign_id: str) -> int:
-        result = await self.db.execute(
-            select(func.count(func.distinct(Scan.anonymous_user_id))).where(Scan.campaign_id == campaign_id)
-        )
-        return result.scalar() or 0
+    async def _get_local_activity(self, campaign_id: str, zone, days: int = 30) -> Dict[str, Any]:
+        """Today, this week, daily and today's hourly counts in the campaign's timezone.
 
-    async def _get_scans_today(self, campaign_id: str) -> int:
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
-        
-        result = await self.db.execute(
-            select(func.count(Scan.id)).where(
-                and_(
-                    Scan.campaign_id == campaign_id,
-                    Scan.timestamp >= today_start,
-                    Scan.timestamp < today_end
-                )
-            )
-        )
-        return result.scalar() or 0
+        All four come from one read of ``scan_hourly_counts`` over the last
+        ``days`` local days: UTC hours are shifted to local time (DST aware)
+        and binned, so no raw scans are touched and any timezone costs the same.
+        """
+        import numpy as np
+
+        today = local_today(zone)
+        first_day = today - timedelta(days=days - 1)
+        start, end = local_range_utc(zone, first_day, today)
+        if recent_scans.covers(campaign_id):
+            # Today is in the recent scan store; only earlier days are read.
+            # Split on a UTC hour so a half-hour zone's bucket is not counted twice
+            today_start = local_range_utc(zone, today, today)[0]
+            split = hour_start(today_start)
+            if split < today_start:
+                split += timedelta(hours=1)
+            hours, counts = await load_hourly_counts(self.db, campaign_id, start, split)
+            recent_hours, recent_counts = recent_scans.hourly(campaign_id, split, end)
+            hours, counts = hours + recent_hours, counts + recent_counts
+        else:
+            hours, counts = await load_hourly_counts(self.db, campaign_id, start, end)
+
+        daily = np.zeros(days, dtype=np.int64)
+        hourly = np.zeros(24, dtype=np.int64)
+        if hours:
+            local_hours = to_local_hours(zone, hours, start, end)
+            day_index = local_hours // 24 - epoch_day(first_day)
+            keep = (day_index >= 0) & (day_index < days)
+            day_index, local_hours = day_index[keep], local_hours[keep]
+            counts = np.array(counts, dtype=np.int64)[keep]
+            daily = np.bincount(day_index, weights=counts, minlength=days).astype(np.int64)
+            today_mask = day_index == days - 1
+            hourly = np.bincount(local_hours[today_mask] % 24, weights=counts[today_mask], minlength=24).astype(np.int64)
+
+        return {
+            "scans_today": int(daily[-1]),
+            "scans_this_week": int(daily[-7:].sum()),
+            "daily_data": [
+                {"date": (first_day + timedelta(days=offset)).isoformat(), "count": int(count)}
+                for offset, count in enumerate(daily.tolist()) if count
+            ],
+            "hourly_data": [
+                {"hour": hour, "count": count}
+                for hour, count in enumerate(hourly.tolist()) if count
+            ],
+        }
 
-    async def _get_scans_this_week(self, campaign_id: str) -> int:
-        week_ago = datetime.utcnow() - timedelta(days=7)
+    async def _get_scans_since(self, campaign_id: str, since: datetime) -> int:
+        if recent_scans.covers(campaign_id):
+            return recent_scans.count(campaign_id, since)
         result = await self.db.execute(
-            select(func.count(Scan.id)).where(
-                and_(
-                    Scan.campaign_id == campaign_id,
-                    Scan.timestamp >= week_ago
-                )
-            )
+            select(func.count(Scan.id)).where(and_(Scan.campaign_id == campaign_id, Scan.timestamp >= since))
         )
         return result.scalar() or 0
 
     async def _get_recent_activity(self, campaign_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        if recent_scans.covers(campaign_id):
+            return recent_scans.latest(campaign_id, limit)
         result = await self.db.execute(
             select(Scan).where(Scan.campaign_id == campaign_id)
             .order_by(desc(Scan.timestamp))
@@ -164,13 +192,16 @@ class AnalyticsService:
             select(Scan.city, func.count(Scan.id).label('count'))
             .where(and_(Scan.campaign_id == campaign_id, Scan.city.isnot(None)))
             .group_by(Scan.city)
-            .order_by(desc('count'))
-            .limit(10)
         )
+        city_counts = dict(result.all())
+        for city, count in (await rollup_breakdown(self.db, campaign_id, ScanDailyRollup.city)).items():
+            if city is not None:
+                city_counts[city] = city_counts.get(city, 0) + count
         
+        top_cities = sorted(city_counts.items(), key=lambda item: item[1], reverse=True)[:10]
         return [
-            {"city": row.city, "count": row.count}
-            for row in result.all()
+            {"city": city, "count": count}
+            for city, count in top_cities
         ]
 
     async def _get_device_breakdown(self, campaign_id: str) -> Dict[str, int]:
@@ -180,76 +211,70 @@ class AnalyticsService:
             .group_by(Scan.device_type)
         )
         
-        return {row.device_type or "unknown": row.count for row in result.all()}
-
-    async def _get_daily_scan_data(self, campaign_id: str, days: int = 30) -> List[Dict[str, Any]]:
-        try:
-            start_datetime = datetime.utcnow() - timedelta(days=days)
-            
-            # Get all scans within the date range
-            result = await self.db.execute(
-                select(Scan.timestamp)
-                .where(
-                    and_(
-                        Scan.campaign_id == campaign_id,
-                        Scan.timestamp >= start_datetime
-                    )
-                )
-                .order_by(Scan.timestamp)
-            )
-            
-            scans = result.scalars().all()
-            
-            # Group by date in Python to avoid database-specific date functions
-            daily_counts = {}
-            for scan in scans:
-                date_key = scan.date().isoformat()
-                daily_counts[date_key] = daily_counts.get(date_key, 0) + 1
-            
-            # Convert to sorted list
-            return [
-                {"date": date, "count": count}
-                for date, count in sorted(daily_counts.items())
-            ]
-            
-        except Exception as e:
-            # Return empty data if there's an error
-            print(f"Error getting daily scan data: {e}")
-            return []
-
-    async def _get_hourly_scan_data(self, campaign_id: str) -> List[Dict[str, Any]]:
-        try:
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            
-            # Get all scans from today
-            result = await self.db.execute(
-                select(Scan.timestamp)
-                .where(
-                    and_(
-                        Scan.campaign_id == campaign_id,
-                        Scan.timestamp >= today_start,
-                        Scan.timestamp < today_end
-                    )
-                )
-                .order_by(Scan.timestamp)
-            )
-            
-            scans = result.scalars().all()
-            
-            # Group by hour in Python
-            hourly_counts = {}
-            for scan in scans:
-                hour = scan.hour
-                hourly_counts[hour] = hourly_counts.get(hour, 0) + 1
-            
-            # Convert to sorted list
-            return [
-                {"hour": hour, "count": count}
-                for hour, count in sorted(hourly_counts.items())
-            ]
-            
-        except Exception as e:
-            # Return empty data if there's an error
-            print(f"Error getting hourly scan data: {e}")
-            return []
\ No newline at end of file
+        device_counts: Dict[str, int] = {}
+        compacted = await rollup_breakdown(self.db, campaign_id, ScanDailyRollup.device_type)
+        for device_type, count in [(row.device_type, row.count) for row in result.all()] + list(compacted.items()):
+            key = device_type or "unknown"
+            device_counts[key] = device_counts.get(key, 0) + count
+        return device_counts
+
+    async def get_scan_heatmap(
+        self,
+        campaign_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        timezone_name: Optional[str] = None,
+        require_client_access: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Scans by local weekday x hour over ``start_date``..``end_date`` (local days).
+
+        Built from ``scan_hourly_counts``, so a year-long range reads at most
+        8,784 rows per campaign regardless of scan volume. Each UTC hour is
+        shifted by the offset in effect at that instant (DST included) and
+        folded into the 7x24 grid with one ``bincount``. In half-hour zones a
+        UTC hour is attributed to the local hour it starts in.
+        """
+        import numpy as np
+
+        result = await self.db.execute(select(Campaign).where(Campaign.campaign_id == campaign_id))
+        campaign = result.scalar_one_or_none()
+        if not campaign or (require_client_access and not campaign.client_access_enabled):
+            return None
+
+        zone_name = timezone_name or campaign.timezone or "UTC"
+        zone = get_zone(zone_name)
+        end_date = end_date or local_today(zone)
+        start_date = start_date or end_date - timedelta(days=89)
+        if start_date > end_date:
+            raise ValueError("start_date must not be after end_date")
+        if (end_date - start_date).days > 366 * 3:
+            raise ValueError("Heatmap range is limited to three years")
+
+        start, end = local_range_utc(zone, start_date, end_date)
+        hours, counts = await load_hourly_counts(self.db, campaign_id, start, end)
+        grid = np.zeros(7 * 24, dtype=np.int64)
+        if hours:
+            local_hours = to_local_hours(zone, hours, start, end)
+            local_days = local_hours // 24
+            keep = (local_days >= epoch_day(start_date)) & (local_days <= epoch_day(end_date))
+            local_hours, local_days = local_hours[keep], local_days[keep]
+            # Day 0 of the epoch was a Thursday; shift so Monday is row 0
+            cells = ((local_days + 3) % 7) * 24 + local_hours % 24
+            weights = np.array(counts, dtype=np.int64)[keep]
+            grid = np.bincount(cells, weights=weights, minlength=7 * 24).astype(np.int64)
+        matrix = grid.reshape(7, 24)
+        peak = int(grid.argmax())
+
+        return {
+            "campaign_id": campaign_id,
+            "timezone": zone_name,
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
+            "hours": list(range(24)),
+            "matrix": matrix.tolist(),
+            "day_totals": matrix.sum(axis=1).tolist(),
+            "hour_totals": matrix.sum(axis=0).tolist(),
+            "total_scans": int(grid.sum()),
+            "peak": {"day": peak // 24, "hour": peak % 24, "count": int(grid[peak])} if grid.any() else None
+        }
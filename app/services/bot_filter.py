@@ -0,0 +1,249 @@
+import asyncio
+import ipaddress
+import logging
+import re
+import socket
+import time
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import BotScanCount
+from ..metrics import registry
+from .counters import add_counts
+
+logger = logging.getLogger(__name__)
+
+bot_scans_total = registry.counter(
+    "bot_scans_total", "Hits on tracking URLs classified as bots and not stored as scans", ("reason",)
+)
+
+USER_AGENT = "user_agent"
+IP_RANGE = "ip_range"
+RATE = "rate"
+
+# Link unfurlers, crawlers, HTTP libraries, headless browsers, monitors and
+# security scanners; matched before the (slower) user_agents device parser.
+# Only bot tokens and named tools: generic words like "scanner", "preview" or
+# "monitor" appear in the webviews of QR scanner apps, which are real scans.
+# "bot" must end a word, and Cubot phones are not bots
+_BOT_USER_AGENT = re.compile(
+    r"(?<!cu)bot\b|crawl|spider|slurp|facebookexternalhit|embedly|iframely|^whatsapp/|"
+    r"skypeuripreview|microsoftpreview|slack-imgproxy|google-pagerenderer|vkshare|"
+    r"curl/|wget/|python-requests|python-urllib|aiohttp|httpx|go-http-client|java/|libwww|"
+    r"headlesschrome|phantomjs|pingdom|statuscake|site24x7|newrelicpinger|uptime-kuma|"
+    r"nmap|zgrab|masscan|nessus|nikto|sqlmap|censysinspect|qualys|openvas|nuclei|wpscan|acunetix",
+    re.IGNORECASE
+)
+
+# Published search crawler ranges (Googlebot, Bingbot); extend with BOT_IP_RANGES_FILE
+DEFAULT_CRAWLER_RANGES = (
+    "66.249.64.0/19",
+    "2001:4860:4801::/48",
+    "40.77.167.0/24",
+    "157.55.39.0/24",
+    "207.46.13.0/24",
+)
+
+@lru_cache(maxsize=4096)
+def is_bot_user_agent(user_agent: str) -> bool:
+    # Every phone browser sends one; its absence is a script
+    if not user_agent:
+        return True
+    if _BOT_USER_AGENT.search(user_agent):
+        return True
+    from user_agents import parse
+    return parse(user_agent).is_bot
+
+class IPRangeSet:
+    """CIDR ranges merged into sorted, disjoint integer intervals per IP version.
+
+    A lookup is one address parse and a binary search, whatever the number
+    of ranges.
+    """
+
+    def __init__(self, networks: Iterable[str] = ()):
+        intervals: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for network in networks:
+            parsed = ipaddress.ip_network(network.strip(), strict=False)
+            intervals[parsed.version].append((int(parsed.network_address), int(parsed.broadcast_address)))
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        for version, ranges in intervals.items():
+            merged: List[List[int]] = []
+            for start, end in sorted(ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+
+    @classmethod
+    def from_file(cls, path: str, extra: Iterable[str] = ()) -> "IPRangeSet":
+        """One CIDR per line; blank lines and ``#`` comments are ignored."""
+        with open(path) as f:
+            networks = [line.split("#", 1)[0].strip() for line in f]
+        return cls([network for network in networks if network] + list(extra))
+
+    def __contains__(self, ip_address: Optional[str]) -> bool:
+        if not ip_address:
+            return False
+        # inet_pton is several times faster than ipaddress.ip_address
+        try:
+            version, packed = 4, socket.inet_pton(socket.AF_INET, ip_address)
+        except OSError:
+            try:
+                version, packed = 6, socket.inet_pton(socket.AF_INET6, ip_address)
+            except OSError:
+                return False
+        value = int.from_bytes(packed, "big")
+        index = bisect_right(self._starts[version], value) - 1
+        return index >= 0 and value <= self._ends[version][index]
+
+class IPRateTracker:
+    """Hits per IP over a sliding minute, from two fixed-window counts.
+
+    The previous minute's count is weighted by how much of it still falls
+    inside the sliding window. At most ``max_ips`` addresses are tracked
+    per minute; beyond that new ones are not rate limited (fail open).
+    """
+
+    def __init__(self, max_ips: int = 50_000):
+        self.max_ips = max_ips
+        self._window = 0
+        self._current: Dict[str, int] = {}
+        self._previous: Dict[str, int] = {}
+
+    def hit(self, ip_address: str, now: float) -> float:
+        window = int(now // 60)
+        if window != self._window:
+            self._previous = self._current if window == self._window + 1 else {}
+            self._current = {}
+            self._window = window
+        count = self._current.get(ip_address)
+        if count is None:
+            if len(self._current) >= self.max_ips:
+                return 0.0
+            count = 0
+        self._current[ip_address] = count = count + 1
+        return count + self._previous.get(ip_address, 0) * (1 - (now % 60) / 60)
+
+class BotFilter:
+    """Classifies tracking URL hits as bots before they become scans.
+
+    A hit is a bot when its user agent says so (cached per distinct user
+    agent), when it comes from a known crawler range, or when its IP has
+    sent more than ``max_hits_per_minute`` hits across all campaigns.
+    Shared IPs (venue wifi, carrier NAT) carry many real visitors, so the
+    rate threshold is deliberately generous.
+
+    Bot hits are not stored; they are counted per campaign, UTC day and
+    reason in memory and added to ``bot_scan_counts`` every
+    ``flush_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        ip_ranges: Optional[IPRangeSet] = None,
+        max_hits_per_minute: int = 120,
+        flush_interval: float = 10.0,
+        max_tracked_ips: int = 50_000
+    ):
+        self.enabled = True
+        self.ip_ranges = ip_ranges if ip_ranges is not None else IPRangeSet(DEFAULT_CRAWLER_RANGES)
+        self.max_hits_per_minute = max_hits_per_minute
+        self.flush_interval = flush_interval
+        self.rates = IPRateTracker(max_tracked_ips)
+        self._pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def classify(self, ip_address: Optional[str], user_agent: Optional[str], now: Optional[float] = None) -> Optional[str]:
+        """The reason a hit is a bot, or None for a human."""
+        if is_bot_user_agent(user_agent or ""):
+            return USER_AGENT
+        if ip_address in self.ip_ranges:
+            return IP_RANGE
+        if self.max_hits_per_minute > 0 and ip_address:
+            rate = self.rates.hit(ip_address, time.time() if now is None else now)
+            if rate > self.max_hits_per_minute:
+                return RATE
+        return None
+
+    def is_bot(self, campaign_id: str, ip_address: Optional[str], user_agent: Optional[str]) -> bool:
+        """Classify a hit and count it if it is a bot."""
+        if not self.enabled:
+            return False
+        reason = self.classify(ip_address, user_agent)
+        if reason is None:
+            return False
+        bot_scans_total.labels(reason).inc()
+        self._pending[(campaign_id, datetime.utcnow().date(), reason)] += 1
+        return True
+
+    async def flush(self, session_factory) -> int:
+        pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+        try:
+            async with session_factory() as db:
+                await add_counts(db, BotScanCount, ("campaign_id", "day", "reason"), "hit_count", [
+                    {"campaign_id": campaign_id, "day": day, "reason": reason, "hit_count": count}
+                    for (campaign_id, day, reason), count in pending.items()
+                ])
+                await db.commit()
+        except BaseException:
+            # Counted again with the next flush
+            self._pending.update(pending)
+            raise
+        return sum(pending.values())
+
+    async def _loop(self, session_factory) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush(session_factory)
+            except Exception:
+                logger.exception("Bot traffic flush failed")
+
+    def start(self, session_factory) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop(session_factory))
+
+    async def stop(self, session_factory) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush(session_factory)
+        except Exception:
+            logger.warning("Could not flush bot traffic counts on shutdown", exc_info=True)
+
+async def bot_traffic(db: AsyncSession, campaign_id: str) -> Dict[str, object]:
+    """All-time bot hits for a campaign, by reason, and those of the last 7 UTC days."""
+    since = datetime.utcnow().date() - timedelta(days=6)
+    result = await db.execute(
+        select(BotScanCount.reason, func.sum(BotScanCount.hit_count), func.sum(BotScanCount.hit_count).filter(
+            BotScanCount.day >= since
+        ))
+        .where(BotScanCount.campaign_id == campaign_id)
+        .group_by(BotScanCount.reason)
+    )
+    by_reason = {}
+    recent = 0
+    for reason, total, in_window in result.all():
+        by_reason[reason] = int(total or 0)
+        recent += int(in_window or 0)
+    return {"total": sum(by_reason.values()), "last_7_days": recent, "by_reason": by_reason}
+
+bot_filter = BotFilter()
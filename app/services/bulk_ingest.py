@@ -0,0 +1,280 @@
+import hashlib
+import json
+import logging
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Campaign, Scan
+from ..metrics import registry, scans_recorded_total
+from ..utils import is_valid_campaign_id
+from .counters import record_scans
+from .hourly_counts import record_hourly_counts
+from .recent_scans import recent_scans
+from .scan_ingest import ScanEvent, build_scan_row
+from .visitor_identity import visitor_salts
+
+logger = logging.getLogger(__name__)
+
+bulk_scan_events_total = registry.counter(
+    "bulk_scan_events_total", "Events received by the bulk scan endpoint", ("result",)
+)
+
+# Scan ids of bulk events are uuid5(EVENT_NAMESPACE, event_id), so a
+# re-sent event hits the primary key instead of needing its own index
+EVENT_NAMESPACE = uuid.UUID("6f1c2b7e-4d1a-5b8e-9c3f-2a7d0e5b1c44")
+MAX_EVENT_ID = 128
+MAX_LINE_BYTES = 16 * 1024
+MAX_ERRORS = 100
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+COLUMNS = (
+    "id", "campaign_id", "anonymous_user_id", "timestamp", "ip_address",
+    "city", "country", "device_type", "user_agent_hash"
+)
+
+class BulkIngestError(ValueError):
+    """The request as a whole cannot be processed (encoding, size)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def event_scan_id(event_id: str) -> str:
+    """``str(uuid.uuid5(EVENT_NAMESPACE, event_id))`` without building UUID objects."""
+    digest = bytearray(hashlib.sha1(EVENT_NAMESPACE.bytes + event_id.encode()).digest()[:16])
+    digest[6] = (digest[6] & 0x0F) | 0x50
+    digest[8] = (digest[8] & 0x3F) | 0x80
+    value = digest.hex()
+    return f"{value[:8]}-{value[8:12]}-{value[12:16]}-{value[16:20]}-{value[20:]}"
+
+def _decompressor(content_encoding: Optional[str]):
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return None
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.decompressobj()
+    raise BulkIngestError(f"Unsupported Content-Encoding: {content_encoding}", status_code=415)
+
+def _optional_string(event: Dict[str, Any], field: str, limit: int) -> Optional[str]:
+    value = event.get(field)
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value[:limit]
+
+def _timestamp(value: Any, now: datetime, oldest: Optional[datetime] = None) -> datetime:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            moment = datetime.fromtimestamp(value, tz=timezone.utc)
+        except (OverflowError, OSError):
+            raise ValueError("timestamp out of range")
+    elif isinstance(value, str):
+        moment = datetime.fromisoformat(value)
+    else:
+        raise ValueError("timestamp must be an ISO 8601 string or epoch seconds")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    if moment > now + MAX_CLOCK_SKEW:
+        raise ValueError("timestamp is in the future")
+    if oldest is not None and moment < oldest:
+        raise ValueError(f"timestamp is before {oldest.isoformat()}, the start of the backfill window")
+    return moment
+
+def parse_event(line: bytes, now: datetime, oldest: Optional[datetime] = None) -> Dict[str, Any]:
+    """Validate one NDJSON line and build its ``scans`` row; raises ValueError.
+
+    Events before ``oldest`` are rejected; the visitor salts cover
+    everything from there on.
+    """
+    try:
+        event = json.loads(line)
+    except ValueError:
+        raise ValueError("invalid JSON")
+    if not isinstance(event, dict):
+        raise ValueError("expected a JSON object")
+
+    event_id = event.get("event_id")
+    if isinstance(event_id, int) and not isinstance(event_id, bool):
+        event_id = str(event_id)
+    if not isinstance(event_id, str) or not 0 < len(event_id) <= MAX_EVENT_ID:
+        raise ValueError(f"event_id must be a string of 1 to {MAX_EVENT_ID} characters")
+    campaign_id = event.get("campaign_id")
+    if not isinstance(campaign_id, str) or not is_valid_campaign_id(campaign_id):
+        raise ValueError("invalid campaign_id")
+    if "timestamp" not in event:
+        raise ValueError("timestamp is required")
+    moment = _timestamp(event["timestamp"], now, oldest)
+    # A salt made up here would differ per worker and upload and split visitors
+    salt = visitor_salts.shared_salt(moment)
+    if salt is None:
+        raise ValueError("no shared visitor salt is loaded for this timestamp, retry later")
+
+    row = build_scan_row(ScanEvent(
+        campaign_id,
+        ip_address=_optional_string(event, "ip_address", 45),
+        user_agent=_optional_string(event, "user_agent", 1024),
+        timestamp=moment
+    ), salt)
+    row["id"] = event_scan_id(event_id)
+    row["city"] = _optional_string(event, "city", 100)
+    row["country"] = _optional_string(event, "country", 100)
+    return row
+
+class BulkScanIngestor:
+    """Streams an NDJSON upload of scan events into ``scans``.
+
+    The body is decompressed and split into lines as it arrives, each line
+    is validated on its own (bad lines are reported, not fatal), and valid
+    rows are written every ``batch_size`` events in one transaction with
+    their counter and hourly aggregate updates. On Postgres a batch is
+    COPY'd into a temporary staging table and moved over with
+    ``INSERT ... ON CONFLICT DO NOTHING RETURNING``; elsewhere it is a
+    single executemany with the same conflict clause. Either way only rows
+    that were actually new feed the aggregates, so re-sending an upload
+    (or part of one) is safe. Events older than ``max_age_days`` are
+    rejected; the summary reports that bound as ``oldest_accepted``.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        batch_size: int = 5000,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_days: int = 7
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._oldest: Optional[datetime] = None
+        self._campaigns: Set[str] = set()
+        self._missing: Set[str] = set()
+        self._pending: List[Tuple[int, Dict[str, Any]]] = []
+        self._errors: List[Dict[str, Any]] = []
+        self._summary = {"received": 0, "inserted": 0, "duplicates": 0, "rejected": 0}
+
+    async def ingest(self, chunks: AsyncIterator[bytes], content_encoding: Optional[str] = None) -> Dict[str, Any]:
+        decompressor = _decompressor(content_encoding)
+        now = datetime.utcnow()
+        self._oldest = now - timedelta(days=self.max_age_days)
+        buffer = b""
+        size = 0
+        number = 0
+        async for chunk in chunks:
+            if decompressor is not None:
+                data, chunk = chunk, b""
+                while data:
+                    try:
+                        chunk += decompressor.decompress(data, self.max_bytes - size - len(chunk) + 1)
+                    except zlib.error:
+                        raise BulkIngestError("Body could not be decompressed")
+                    # Concatenated gzip members (appended batches) are read one after another
+                    data = decompressor.unused_data if decompressor.eof else b""
+                    if data:
+                        decompressor = _decompressor(content_encoding)
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise BulkIngestError(f"Body exceeds {self.max_bytes} bytes", status_code=413)
+            lines = (buffer + chunk).split(b"\n")
+            buffer = lines.pop()
+            if len(buffer) > MAX_LINE_BYTES:
+                raise BulkIngestError(f"Line {number + len(lines) + 1} exceeds {MAX_LINE_BYTES} bytes", status_code=413)
+            for line in lines:
+                number += 1
+                await self._accept(number, line, now)
+        if decompressor is not None and not decompressor.eof:
+            raise BulkIngestError("Compressed body is truncated")
+        if buffer.strip():
+            await self._accept(number + 1, buffer, now)
+        await self._flush()
+
+        for result in ("inserted", "duplicates", "rejected"):
+            bulk_scan_events_total.labels(result).inc(self._summary[result])
+        return {**self._summary, "oldest_accepted": self._oldest, "errors": self._errors}
+
+    async def _accept(self, number: int, line: bytes, now: datetime) -> None:
+        if not line.strip():
+            return
+        self._summary["received"] += 1
+        try:
+            self._pending.append((number, parse_event(line, now, self._oldest)))
+        except ValueError as e:
+            self._reject(number, str(e))
+            return
+        if len(self._pending) >= self.batch_size:
+            await self._flush()
+
+    def _reject(self, number: int, error: str) -> None:
+        self._summary["rejected"] += 1
+        if len(self._errors) < MAX_ERRORS:
+            self._errors.append({"line": number, "error": error})
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        unknown = {row["campaign_id"] for _, row in pending} - self._campaigns - self._missing
+        if unknown:
+            result = await self.db.execute(select(Campaign.campaign_id).where(Campaign.campaign_id.in_(unknown)))
+            found = set(result.scalars().all())
+            self._campaigns |= found
+            self._missing |= unknown - found
+
+        rows: Dict[str, Dict[str, Any]] = {}
+        for number, row in pending:
+            if row["campaign_id"] in self._missing:
+                self._reject(number, "campaign not found")
+            elif row["id"] in rows:
+                self._summary["duplicates"] += 1
+            else:
+                rows[row["id"]] = row
+        if not rows:
+            return
+
+        if self.db.bind.dialect.name == "postgresql":
+            inserted_ids = await self._copy(list(rows.values()))
+        else:
+            inserted_ids = await self._insert(list(rows.values()))
+        inserted = [rows[scan_id] for scan_id in inserted_ids]
+        await record_scans(self.db, [row["timestamp"] for row in inserted])
+        await record_hourly_counts(self.db, [(row["campaign_id"], row["timestamp"]) for row in inserted])
+        await self.db.commit()
+        scans_recorded_total.inc(len(inserted))
+        recent_scans.add_rows(inserted)
+        self._summary["inserted"] += len(inserted)
+        self._summary["duplicates"] += len(rows) - len(inserted)
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> List[str]:
+        dialect = self.db.bind.dialect.name
+        if dialect != "sqlite":
+            raise RuntimeError(f"Bulk scan ingestion is not supported on {dialect}")
+        from sqlalchemy.dialects.sqlite import insert as upsert
+
+        # Core table, not the entity: skips the ORM's per-row bulk insert bookkeeping
+        table = Scan.__table__
+        statement = upsert(table).on_conflict_do_nothing(index_elements=[table.c.id]).returning(table.c.id)
+        result = await self.db.execute(statement, rows)
+        return list(result.scalars().all())
+
+    async def _copy(self, rows: List[Dict[str, Any]]) -> List[str]:
+        columns = ", ".join(f'"{column}"' for column in COLUMNS)
+        await self.db.execute(text(
+            "CREATE TEMPORARY TABLE IF NOT EXISTS scan_ingest_stage "
+            "(LIKE scans INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        ))
+        connection = await (await self.db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            "scan_ingest_stage",
+            records=[tuple(row[column] for column in COLUMNS) for row in rows],
+            columns=list(COLUMNS)
+        )
+        result = await self.db.execute(text(
+            f"INSERT INTO scans ({columns}) SELECT {columns} FROM scan_ingest_stage "
+            "ON CONFLICT (id) DO NOTHING RETURNING id"
+        ))
+        return list(result.scalars().all())
@@ -0,0 +1,65 @@
+import csv
+import io
+from typing import Dict, List, Union
+from pydantic import ValidationError
+from ..schemas import CampaignCreate
+
+COLUMNS = ("business_name", "target_url", "description", "timezone")
+REQUIRED_COLUMNS = ("business_name", "target_url")
+MAX_ERRORS = 100
+
+class CampaignImportError(ValueError):
+    """The CSV cannot be imported; ``errors`` lists the offending rows."""
+
+    def __init__(self, message: str, errors: List[Dict[str, Union[int, str]]] = (), status_code: int = 400):
+        super().__init__(message)
+        self.errors = list(errors)
+        self.status_code = status_code
+
+def parse_campaign_csv(data: bytes, max_rows: int) -> List[CampaignCreate]:
+    """Campaigns from a CSV with a header row, validated all-or-nothing.
+
+    ``business_name`` and ``target_url`` are required columns,
+    ``description`` and ``timezone`` optional; other columns are ignored.
+    Row numbers in errors count the header as row 1, as spreadsheets do.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise CampaignImportError("CSV must be UTF-8 encoded")
+
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    header = [name.strip().lower() for name in reader.fieldnames or ()]
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise CampaignImportError(f"CSV header is missing: {', '.join(missing)}")
+    reader.fieldnames = header
+
+    campaigns: List[CampaignCreate] = []
+    errors: List[Dict[str, Union[int, str]]] = []
+    for row in reader:
+        if len(campaigns) + len(errors) >= max_rows:
+            raise CampaignImportError(f"At most {max_rows} campaigns per import", status_code=413)
+        values = {
+            column: row[column].strip()
+            for column in COLUMNS if isinstance(row.get(column), str) and row[column].strip()
+        }
+        if not values:
+            continue
+        try:
+            campaigns.append(CampaignCreate(**values))
+        except ValidationError as e:
+            error = e.errors()[0]
+            errors.append({
+                "row": reader.line_num,
+                "field": ".".join(str(part) for part in error["loc"]),
+                "error": error["msg"],
+            })
+            if len(errors) >= MAX_ERRORS:
+                break
+
+    if errors:
+        raise CampaignImportError(f"{len(errors)} invalid row(s), nothing was imported", errors, status_code=422)
+    if not campaigns:
+        raise CampaignImportError("CSV has no campaigns")
+    return campaigns
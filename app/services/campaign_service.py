@@ -1,38 +1,108 @@
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence, Set
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func
+from sqlalchemy import select, update, desc, func, and_
 from ..models import Campaign, Scan
 from ..schemas import CampaignCreate, CampaignUpdate
 from ..utils import generate_campaign_id, sanitize_url
+from .routing_table import routing_table
+from .retention import rollup_totals, rollup_totals_by_campaign
+from .visitor_sketch import load_sketches, count_unique_visitors
+from .counters import record_campaign_change, dashboard_counters
+from .hourly_counts import hourly_total
+from .bot_filter import bot_traffic
+from ..config import settings
+from ..utils import get_zone
+from ..utils.timezones import local_range_utc, local_today
+
+MAX_ID_ROUNDS = 5
+
+ARCHIVE = "archive"
+UNARCHIVE = "unarchive"
+ENABLE_ACCESS = "enable_access"
+DISABLE_ACCESS = "disable_access"
+DEACTIVATE = "deactivate"
+
+# action: (condition that the action would change the row, values to set,
+# (was_live, is_live, which returned rows changed live state) or None)
+_ACTIONS = {
+    ARCHIVE: (
+        Campaign.archived == False,
+        lambda: {"archived": True, "archived_at": datetime.utcnow()},
+        (True, False, lambda campaign: campaign.active)
+    ),
+    UNARCHIVE: (
+        Campaign.archived == True,
+        lambda: {"archived": False, "archived_at": None},
+        (False, True, lambda campaign: campaign.active)
+    ),
+    ENABLE_ACCESS: (Campaign.client_access_enabled == False, lambda: {"client_access_enabled": True}, None),
+    DISABLE_ACCESS: (Campaign.client_access_enabled == True, lambda: {"client_access_enabled": False}, None),
+    DEACTIVATE: (
+        Campaign.active == True,
+        lambda: {"active": False},
+        (True, False, lambda campaign: not campaign.archived)
+    ),
+}
 
 class CampaignService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def create_campaign(self, campaign_data: CampaignCreate) -> Campaign:
-        # Generate unique campaign ID
-        campaign_id = generate_campaign_id()
-        
-        # Ensure campaign ID is unique
-        while await self.get_campaign_by_id(campaign_id):
-            campaign_id = generate_campaign_id()
-
-        campaign = Campaign(
-            campaign_id=campaign_id,
-            business_name=campaign_data.business_name,
-            target_url=sanitize_url(str(campaign_data.target_url)),
-            description=campaign_data.description,
-            created_at=datetime.utcnow(),
-            active=True,
-            client_access_enabled=True,
-            archived=False
-        )
+        campaigns = await self.create_campaigns([campaign_data])
+        return campaigns[0]
+
+    async def create_campaigns(self, campaigns_data: Sequence[CampaignCreate]) -> List[Campaign]:
+        """Create campaigns in one transaction, in the order given."""
+        campaign_ids = await self._unused_campaign_ids(len(campaigns_data))
+        now = datetime.utcnow()
+        campaigns = [
+            Campaign(
+                id=str(uuid.uuid4()),
+                campaign_id=campaign_id,
+                business_name=campaign_data.business_name,
+                target_url=sanitize_url(str(campaign_data.target_url)),
+                description=campaign_data.description,
+                timezone=campaign_data.timezone,
+                created_at=now,
+                active=True,
+                client_access_enabled=True,
+                archived=False
+            )
+            for campaign_id, campaign_data in zip(campaign_ids, campaigns_data)
+        ]
 
-        self.db.add(campaign)
+        # Every column is set here, so the rows go out as one batched INSERT
+        # and nothing needs to be read back after the commit
+        self.db.add_all(campaigns)
+        await record_campaign_change(self.db, None, True, count=len(campaigns))
         await self.db.commit()
-        await self.db.refresh(campaign)
-        return campaign
+        for campaign in campaigns:
+            routing_table.sync(campaign)
+        return campaigns
+
+    async def _unused_campaign_ids(self, count: int) -> List[str]:
+        # One existence check per round for the whole batch; a random id is
+        # almost never taken, so the first round nearly always suffices
+        campaign_ids: List[str] = []
+        chosen: Set[str] = set()
+        for _ in range(MAX_ID_ROUNDS):
+            candidates: Set[str] = set()
+            while len(candidates) < count - len(campaign_ids):
+                candidate = generate_campaign_id()
+                if candidate not in chosen:
+                    candidates.add(candidate)
+            result = await self.db.execute(
+                select(Campaign.campaign_id).where(Campaign.campaign_id.in_(candidates))
+            )
+            fresh = candidates.difference(result.scalars())
+            campaign_ids.extend(fresh)
+            chosen.update(fresh)
+            if len(campaign_ids) == count:
+                return campaign_ids
+        raise RuntimeError("Could not generate unused campaign ids")
 
     async def get_campaign_by_id(self, campaign_id: str) -> Optional[Campaign]:
         result = await self.db.execute(
@@ -48,6 +118,8 @@ class CampaignService:
         query = query.order_by(desc(Campaign.created_at))
         result = await self.db.execute(query)
         campaigns = list(result.scalars().all())
+        compacted = await rollup_totals_by_campaign(self.db)
+        sketches = await load_sketches(self.db)
         
         # Add stats to each campaign
         campaigns_with_stats = []
@@ -58,10 +130,11 @@ class CampaignService:
             )
             total_scans = total_scans.scalar() or 0
 
-            unique_visitors = await self.db.execute(
-                select(func.count(func.distinct(Scan.anonymous_user_id))).where(Scan.campaign_id == campaign.campaign_id)
-            )
-            unique_visitors = unique_visitors.scalar() or 0
+            sketch = sketches.get(campaign.campaign_id)
+            unique_visitors = await count_unique_visitors(self.db, campaign.campaign_id, sketch)
+            
+            # Scans past the retention window only exist as daily rollups
+            total_scans += compacted.get(campaign.campaign_id, 0)
             
             # Convert campaign to dict and add stats
             campaign_dict = {
@@ -75,8 +148,10 @@ class CampaignService:
                 'client_access_enabled': campaign.client_access_enabled,
                 'archived': campaign.archived,
                 'archived_at': campaign.archived_at,
+                'timezone': campaign.timezone,
                 'total_scans': total_scans,
-                'unique_visitors': unique_visitors
+                'unique_visitors': unique_visitors,
+                'unique_visitors_estimated': sketch is not None
             }
             
             campaigns_with_stats.append(campaign_dict)
@@ -84,71 +159,104 @@ class CampaignService:
         return campaigns_with_stats
 
     async def update_campaign(self, campaign_id: str, campaign_data: CampaignUpdate) -> Optional[Campaign]:
-        result = await self.db.execute(
-            select(Campaign).where(Campaign.campaign_id == campaign_id)
-        )
-        campaign = result.scalar_one_or_none()
-        
-        if not campaign:
-            return None
-
         update_data = campaign_data.dict(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            if field == "target_url" and value:
-                value = sanitize_url(str(value))
-            setattr(campaign, field, value)
+        if update_data.get("target_url"):
+            update_data["target_url"] = sanitize_url(str(update_data["target_url"]))
+        if not update_data:
+            return await self.get_campaign_by_id(campaign_id)
 
+        where = Campaign.campaign_id == campaign_id
+        if "active" in update_data:
+            # Only matches if ``active`` actually flips, so the row says
+            # whether the campaign went live or stopped being live
+            campaigns = await self._update_returning(where, Campaign.active != update_data["active"], update_data)
+            if campaigns:
+                campaign = campaigns[0]
+                if not campaign.archived:
+                    await record_campaign_change(self.db, not campaign.active, bool(campaign.active))
+                await self.db.commit()
+                routing_table.sync(campaign)
+                return campaign
+
+        campaigns = await self._update_returning(where, None, update_data)
         await self.db.commit()
-        await self.db.refresh(campaign)
-        return campaign
+        for campaign in campaigns:
+            routing_table.sync(campaign)
+        return campaigns[0] if campaigns else None
 
     async def archive_campaign(self, campaign_id: str) -> Optional[Campaign]:
-        result = await self.db.execute(
-            select(Campaign).where(Campaign.campaign_id == campaign_id)
-        )
-        campaign = result.scalar_one_or_none()
-        
-        if not campaign:
-            return None
-
-        campaign.archived = True
-        campaign.archived_at = datetime.utcnow()
-        
-        await self.db.commit()
-        await self.db.refresh(campaign)
-        return campaign
+        return await self._apply_one(ARCHIVE, campaign_id)
 
     async def unarchive_campaign(self, campaign_id: str) -> Optional[Campaign]:
-        result = await self.db.execute(
-            select(Campaign).where(Campaign.campaign_id == campaign_id)
-        )
-        campaign = result.scalar_one_or_none()
-        
-        if not campaign:
-            return None
+        return await self._apply_one(UNARCHIVE, campaign_id)
 
-        campaign.archived = False
-        campaign.archived_at = None
-        
+    async def toggle_client_access(self, campaign_id: str, enabled: bool) -> Optional[Campaign]:
+        return await self._apply_one(ENABLE_ACCESS if enabled else DISABLE_ACCESS, campaign_id)
+
+    async def apply_action(
+        self,
+        action: str,
+        campaign_ids: Optional[Sequence[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Campaign]:
+        """Apply a bulk action to the listed campaigns or to those matching ``filters``.
+
+        Returns only the campaigns the action changed; ones already in the
+        target state are left alone.
+        """
+        if campaign_ids is not None:
+            where = Campaign.campaign_id.in_(campaign_ids)
+        else:
+            where = and_(*self._filter_clauses(filters or {}))
+        return await self._apply(action, where)
+
+    @staticmethod
+    def _filter_clauses(filters: Dict[str, Any]) -> List[Any]:
+        clauses = []
+        if filters.get("business_name"):
+            clauses.append(Campaign.business_name.ilike(f"%{filters['business_name']}%"))
+        for field in ("active", "archived", "client_access_enabled"):
+            if filters.get(field) is not None:
+                clauses.append(getattr(Campaign, field) == filters[field])
+        if filters.get("created_before") is not None:
+            clauses.append(Campaign.created_at < filters["created_before"])
+        if filters.get("created_after") is not None:
+            clauses.append(Campaign.created_at >= filters["created_after"])
+        if not clauses:
+            raise ValueError("A filter needs at least one condition")
+        return clauses
+
+    async def _apply_one(self, action: str, campaign_id: str) -> Optional[Campaign]:
+        campaigns = await self._apply(action, Campaign.campaign_id == campaign_id)
+        if campaigns:
+            return campaigns[0]
+        # Already in the target state, or no such campaign
+        return await self.get_campaign_by_id(campaign_id)
+
+    async def _apply(self, action: str, where: Any) -> List[Campaign]:
+        unchanged, values, live_change = _ACTIONS[action]
+        campaigns = await self._update_returning(where, unchanged, values())
+        if live_change is not None:
+            # Every returned row made the same transition, e.g. archive: rows
+            # that were active went from live to not live
+            was_live, now_live, counts = live_change
+            changed = sum(1 for campaign in campaigns if counts(campaign))
+            if changed:
+                await record_campaign_change(self.db, was_live, now_live, count=changed)
         await self.db.commit()
-        await self.db.refresh(campaign)
-        return campaign
+        for campaign in campaigns:
+            routing_table.sync(campaign)
+        return campaigns
 
-    async def toggle_client_access(self, campaign_id: str, enabled: bool) -> Optional[Campaign]:
+    async def _update_returning(self, where: Any, condition: Any, values: Dict[str, Any]) -> List[Campaign]:
+        # One UPDATE ... RETURNING round trip instead of SELECT, UPDATE and refresh
+        if condition is not None:
+            where = and_(where, condition)
         result = await self.db.execute(
-            select(Campaign).where(Campaign.campaign_id == campaign_id)
+            update(Campaign).where(where).values(**values).returning(Campaign),
+            execution_options={"synchronize_session": False, "populate_existing": True}
         )
-        campaign = result.scalar_one_or_none()
-        
-        if not campaign:
-            return None
-
-        campaign.client_access_enabled = enabled
-        
-        await self.db.commit()
-        await self.db.refresh(campaign)
-        return campaign
+        return list(result.scalars().all())
 
     async def get_campaign_stats(self, campaign_id: str) -> Optional[Dict[str, Any]]:
         campaign = await self.get_campaign_by_id(campaign_id)
@@ -161,29 +269,24 @@ class CampaignService:
         )
         total_scans = total_scans.scalar() or 0
 
-        unique_visitors = await self.db.execute(
-            select(func.count(func.distinct(Scan.anonymous_user_id))).where(Scan.campaign_id == campaign_id)
-        )
-        unique_visitors = unique_visitors.scalar() or 0
+        sketch = (await load_sketches(self.db, campaign_id)).get(campaign_id)
+        unique_visitors = await count_unique_visitors(self.db, campaign_id, sketch)
 
-        # Get recent scans (last 7 days)
+        # Get recent scans (last 7 days), from the hourly aggregates
         seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        recent_scans = await self.db.execute(
-            select(func.count(Scan.id)).where(
-                and_(
-                    Scan.campaign_id == campaign_id,
-                    Scan.timestamp >= seven_days_ago
-                )
-            )
-        )
-        recent_scans = recent_scans.scalar() or 0
+        recent_scans = await hourly_total(self.db, seven_days_ago, campaign_id=campaign_id)
+
+        # Scans past the retention window only exist as daily rollups
+        total_scans += await rollup_totals(self.db, campaign_id)
 
         return {
             "campaign_id": campaign_id,
             "business_name": campaign.business_name,
             "total_scans": total_scans,
             "unique_visitors": unique_visitors,
+            "unique_visitors_estimated": sketch is not None,
             "recent_scans": recent_scans,
+            "bot_traffic": await bot_traffic(self.db, campaign_id),
             "created_at": campaign.created_at,
             "active": campaign.active,
             "client_access_enabled": campaign.client_access_enabled,
@@ -191,28 +294,13 @@ class CampaignService:
         }
 
     async def get_admin_dashboard_stats(self) -> Dict[str, Any]:
-        # Total campaigns
-        total_campaigns = await self.db.execute(select(func.count(Campaign.id)))
-        total_campaigns = total_campaigns.scalar() or 0
-
-        # Active campaigns
-        active_campaigns = await self.db.execute(
-            select(func.count(Campaign.id)).where(
-                and_(Campaign.active == True, Campaign.archived == False)
-            )
-        )
-        active_campaigns = active_campaigns.scalar() or 0
-
-        # Total scans across all campaigns
-        total_scans = await self.db.execute(select(func.count(Scan.id)))
-        total_scans = total_scans.scalar() or 0
-
-        # Scans today
-        today = datetime.utcnow().date()
-        scans_today = await self.db.execute(
-            select(func.count(Scan.id)).where(func.date(Scan.timestamp) == today)
-        )
-        scans_today = scans_today.scalar() or 0
+        # Campaign and scan totals are maintained incrementally (see services/counters.py)
+        counters = await dashboard_counters(self.db)
+        zone = get_zone(settings.dashboard_timezone)
+        if zone.key != "UTC":
+            # Counter day buckets are UTC days; a local day comes from the hourly aggregates
+            today = local_today(zone)
+            counters["scans_today"] = await hourly_total(self.db, *local_range_utc(zone, today, today))
 
         # Recent campaigns
         recent_campaigns_result = await self.db.execute(
@@ -223,10 +311,11 @@ class CampaignService:
         recent_campaigns = recent_campaigns_result.scalars().all()
 
         return {
-            "total_campaigns": total_campaigns,
-            "active_campaigns": active_campaigns,
-            "total_scans": total_scans,
-            "scans_today": scans_today,
+            "total_campaigns": counters["total_campaigns"],
+            "active_campaigns": counters["active_campaigns"],
+            "total_scans": counters["total_scans"],
+            "scans_today": counters["scans_today"],
+            "timezone": zone.key,
             "recent_campaigns": [
                 {
                     "campaign_id": c.campaign_id,
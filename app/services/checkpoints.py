@@ -0,0 +1,29 @@
+import json
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import JobCheckpoint
+
+async def load_checkpoint(db: AsyncSession, name: str) -> Optional[Dict[str, Any]]:
+    result = await db.execute(select(JobCheckpoint.position).where(JobCheckpoint.name == name))
+    position = result.scalar_one_or_none()
+    return json.loads(position) if position else None
+
+async def save_checkpoint(db: AsyncSession, name: str, position: Dict[str, Any], rows: int) -> None:
+    """Stage the new position in the caller's transaction; the caller commits.
+
+    Committing it together with the batch it describes is what makes jobs
+    resumable without double-processing.
+    """
+    checkpoint = await db.get(JobCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=name, rows_processed=0)
+        db.add(checkpoint)
+    checkpoint.position = json.dumps(position, default=str)
+    checkpoint.rows_processed = (checkpoint.rows_processed or 0) + rows
+
+async def reset_checkpoint(db: AsyncSession, name: str) -> None:
+    checkpoint = await db.get(JobCheckpoint, name)
+    if checkpoint is not None:
+        await db.delete(checkpoint)
+        await db.commit()
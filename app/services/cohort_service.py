@@ -0,0 +1,164 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Campaign, Scan
+from ..utils import get_zone
+from ..utils.timezones import local_range_utc, local_today, to_local_hours, epoch_day
+from .hourly_counts import hour_expression
+from .visitor_identity import visitor_salts, period_bounds
+
+GRANULARITIES = ("day", "week")
+MAX_DAYS = 366
+MAX_OFFSETS = 60
+
+def _salt_period(day: date) -> str:
+    return period_bounds(datetime.combine(day, datetime.min.time()), visitor_salts.rotation)[0]
+
+class CohortService:
+    """Returning-visitor rates and retention cohorts for a campaign.
+
+    Scans are read once, grouped by visitor and UTC hour, and turned into
+    integer arrays: visitor ids become dense codes via ``np.unique`` and
+    hours become local epoch days. Every metric is then a ``unique`` or
+    ``bincount`` over ``code * periods + period`` keys, so nothing loops over
+    visitors in Python.
+
+    Visitor ids are only stable within one salt rotation period
+    (``VISITOR_ID_ROTATION``), so a visitor coming back after the salt
+    changed counts as new. Retention cells whose cohort and return periods
+    do not fall in the same salt period cannot be measured and are null.
+    Scans already compacted by retention carry no visitor id and are not
+    included.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_cohorts(
+        self,
+        campaign_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        granularity: str = "week",
+        timezone_name: Optional[str] = None,
+        require_client_access: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Returns None for a missing (or, for clients, hidden) campaign; raises ValueError on bad input."""
+        import numpy as np
+
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        result = await self.db.execute(select(Campaign).where(Campaign.campaign_id == campaign_id))
+        campaign = result.scalar_one_or_none()
+        if not campaign or (require_client_access and not campaign.client_access_enabled):
+            return None
+
+        zone_name = timezone_name or campaign.timezone or "UTC"
+        zone = get_zone(zone_name)
+        end_date = end_date or local_today(zone)
+        start_date = start_date or end_date - timedelta(days=(27 if granularity == "day" else 83))
+        if start_date > end_date:
+            raise ValueError("start_date must not be after end_date")
+        if (end_date - start_date).days >= MAX_DAYS:
+            raise ValueError(f"Cohort range is limited to {MAX_DAYS} days")
+
+        start, end = local_range_utc(zone, start_date, end_date)
+        hour = hour_expression(self.db.bind.dialect.name)
+        result = await self.db.execute(
+            select(Scan.anonymous_user_id, hour, func.count(Scan.id))
+            .where(and_(Scan.campaign_id == campaign_id, Scan.timestamp >= start, Scan.timestamp < end))
+            .group_by(Scan.anonymous_user_id, hour)
+        )
+        rows = result.all()
+
+        first_day, last_day = epoch_day(start_date), epoch_day(end_date)
+        if granularity == "day":
+            first_period, last_period = first_day, last_day
+            labels = [start_date + timedelta(days=i) for i in range(last_day - first_day + 1)]
+        else:
+            # Weeks start on Monday; 1970-01-01 was a Thursday
+            first_period, last_period = (first_day + 3) // 7, (last_day + 3) // 7
+            monday = start_date - timedelta(days=start_date.weekday())
+            labels = [monday + timedelta(weeks=i) for i in range(last_period - first_period + 1)]
+        periods = len(labels)
+        offsets = min(periods, MAX_OFFSETS)
+
+        matrix = np.zeros((periods, offsets), dtype=np.int64)
+        visitors = scans = repeat_visitors = returning_visitors = 0
+        if rows:
+            ids, hours, counts = zip(*rows)
+            local_days = to_local_hours(zone, hours, start, end) // 24
+            keep = (local_days >= first_day) & (local_days <= last_day)
+            _, codes = np.unique(np.array(ids, dtype=object)[keep].astype(str), return_inverse=True)
+            local_days = local_days[keep]
+            counts = np.array(counts, dtype=np.int64)[keep]
+            visitors = int(codes.max()) + 1 if len(codes) else 0
+
+        if visitors:
+            scans_per_visitor = np.bincount(codes, weights=counts, minlength=visitors)
+            scans = int(scans_per_visitor.sum())
+            repeat_visitors = int((scans_per_visitor > 1).sum())
+
+            day_span = last_day - first_day + 1
+            visitor_days = np.unique(codes * day_span + (local_days - first_day))
+            returning_visitors = int((np.bincount(visitor_days // day_span, minlength=visitors) > 1).sum())
+
+            period = local_days - first_day if granularity == "day" else (local_days + 3) // 7 - first_period
+            pairs = np.unique(codes * periods + period)
+            pair_codes, pair_periods = pairs // periods, pairs % periods
+            # Pairs are sorted by visitor then period, so a visitor's first pair is their cohort
+            _, first_index = np.unique(pair_codes, return_index=True)
+            cohort = pair_periods[first_index][pair_codes]
+            offset = pair_periods - cohort
+            within = offset < offsets
+            matrix = np.bincount(
+                cohort[within] * offsets + offset[within], minlength=periods * offsets
+            ).reshape(periods, offsets)
+
+        sizes = matrix[:, 0]
+        # A cell is observable only if its period falls inside the range
+        target = np.arange(periods)[:, None] + np.arange(offsets)[None, :]
+        observable = target < periods
+        # and measurable only if the cohort's first day and the return period's
+        # last day share a salt (salt periods are UTC dates, compared as local dates)
+        last_day_offset = timedelta(days=0 if granularity == "day" else 6)
+        first_salt = np.array([_salt_period(label) for label in labels])
+        last_salt = np.array([_salt_period(label + last_day_offset) for label in labels])
+        measurable = first_salt[:, None] == last_salt[np.minimum(target, periods - 1)]
+        measurable[:, 0] = True
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(sizes[:, None] > 0, matrix / np.maximum(sizes[:, None], 1), 0.0)
+
+        def share(part: int) -> float:
+            return round(part / visitors, 4) if visitors else 0.0
+
+        return {
+            "campaign_id": campaign_id,
+            "timezone": zone_name,
+            "start_date": start_date,
+            "end_date": end_date,
+            "granularity": granularity,
+            "visitor_id_rotation": visitor_salts.rotation,
+            "visitors": visitors,
+            "scans": scans,
+            "scans_per_visitor": round(scans / visitors, 4) if visitors else 0.0,
+            "repeat_visitors": repeat_visitors,
+            "repeat_scan_rate": share(repeat_visitors),
+            "returning_visitors": returning_visitors,
+            "returning_visitor_rate": share(returning_visitors),
+            "cohorts": [
+                {
+                    "period": labels[i],
+                    "size": int(sizes[i]),
+                    "retained": [
+                        int(matrix[i, j]) if measurable[i, j] else None for j in range(offsets) if observable[i, j]
+                    ],
+                    "retention": [
+                        round(float(rates[i, j]), 4) if measurable[i, j] else None
+                        for j in range(offsets) if observable[i, j]
+                    ],
+                }
+                for i in range(periods)
+            ],
+        }
@@ -0,0 +1,152 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import select, func, and_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Campaign, Scan, ScanDailyRollup
+
+GRANULARITIES = ("day", "week", "month")
+MAX_CAMPAIGNS = 50
+MAX_BUCKETS = 731
+
+class CampaignComparisonService:
+    """Side-by-side scan counts for a set of campaigns.
+
+    Daily counts for every campaign come back from a single query (raw scans
+    and retention rollups combined) and are scattered into a dense
+    campaign x bucket matrix; totals, shares, growth and ranks are then
+    computed on whole arrays.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def compare(
+        self,
+        campaign_ids: Sequence[str],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        granularity: str = "day"
+    ) -> Optional[Dict[str, Any]]:
+        """Returns None when any campaign does not exist; raises ValueError on a bad range."""
+        import numpy as np
+
+        campaign_ids = list(dict.fromkeys(campaign_ids))
+        end_date = end_date or datetime.utcnow().date()
+        start_date = start_date or end_date - timedelta(days=29)
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+        if not 0 < len(campaign_ids) <= MAX_CAMPAIGNS:
+            raise ValueError(f"Compare between 1 and {MAX_CAMPAIGNS} campaigns")
+        if start_date > end_date:
+            raise ValueError("start_date must not be after end_date")
+
+        result = await self.db.execute(
+            select(Campaign.campaign_id, Campaign.business_name).where(Campaign.campaign_id.in_(campaign_ids))
+        )
+        names = dict(result.all())
+        if len(names) != len(campaign_ids):
+            return None
+
+        # Bucket edges, as numpy dates
+        first = np.datetime64(start_date, "D")
+        last = np.datetime64(end_date, "D")
+        if granularity == "day":
+            edges = np.arange(first, last + 1, dtype="datetime64[D]")
+        elif granularity == "week":
+            # Weeks start on Monday; 1970-01-01 was a Thursday
+            monday = first - ((first.astype("int64") + 3) % 7)
+            edges = np.arange(monday, last + 1, 7, dtype="datetime64[D]")
+        else:
+            edges = np.arange(
+                first.astype("datetime64[M]"), last.astype("datetime64[M]") + 1, dtype="datetime64[M]"
+            ).astype("datetime64[D]")
+        if len(edges) > MAX_BUCKETS:
+            raise ValueError(f"Range covers more than {MAX_BUCKETS} buckets, use a coarser granularity")
+
+        rows = await self._daily_counts(campaign_ids, start_date, end_date)
+        ids = np.array(campaign_ids, dtype=object)
+        matrix = np.zeros((len(campaign_ids), len(edges)), dtype=np.int64)
+        if rows:
+            row_ids, row_days, row_counts = zip(*rows)
+            days = np.array([str(day)[:10] for day in row_days], dtype="datetime64[D]")
+            order = np.argsort(ids)
+            campaign_index = order[np.searchsorted(ids[order], np.array(row_ids, dtype=object))]
+            bucket_index = np.searchsorted(edges, days, side="right") - 1
+            np.add.at(matrix, (campaign_index, bucket_index), np.array(row_counts, dtype=np.int64))
+
+        return self._summarize(np, campaign_ids, names, edges, matrix, start_date, end_date, granularity)
+
+    async def _daily_counts(self, campaign_ids: List[str], start_date: date, end_date: date) -> List[tuple]:
+        start = datetime.combine(start_date, datetime.min.time())
+        end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        raw_day = func.date(Scan.timestamp)
+        raw = (
+            select(Scan.campaign_id.label("campaign_id"), raw_day.label("day"), func.count(Scan.id).label("scans"))
+            .where(and_(Scan.campaign_id.in_(campaign_ids), Scan.timestamp >= start, Scan.timestamp < end))
+            .group_by(Scan.campaign_id, raw_day)
+        )
+        compacted = (
+            select(
+                ScanDailyRollup.campaign_id.label("campaign_id"),
+                ScanDailyRollup.day.label("day"),
+                func.sum(ScanDailyRollup.scan_count).label("scans")
+            )
+            .where(and_(
+                ScanDailyRollup.campaign_id.in_(campaign_ids),
+                ScanDailyRollup.day >= start_date,
+                ScanDailyRollup.day <= end_date
+            ))
+            .group_by(ScanDailyRollup.campaign_id, ScanDailyRollup.day)
+        )
+        result = await self.db.execute(union_all(raw, compacted))
+        return [tuple(row) for row in result.all()]
+
+    @staticmethod
+    def _summarize(np, campaign_ids, names, edges, matrix, start_date, end_date, granularity) -> Dict[str, Any]:
+        totals = matrix.sum(axis=1)
+        grand_total = int(totals.sum())
+        column_totals = matrix.sum(axis=0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = np.where(grand_total > 0, totals / max(grand_total, 1), 0.0)
+            bucket_shares = np.where(column_totals > 0, matrix / np.maximum(column_totals, 1), 0.0)
+            # Period-over-period change; undefined where the previous bucket is empty
+            previous = matrix[:, :-1].astype(np.float64)
+            growth = np.where(previous > 0, matrix[:, 1:] / previous - 1.0, np.nan)
+
+        # Rank 1 = most scans in that bucket; ties keep request order
+        order = np.argsort(-matrix, axis=0, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(campaign_ids) + 1)[:, None], axis=0)
+        overall_rank = np.empty(len(campaign_ids), dtype=np.int64)
+        overall_rank[np.argsort(-totals, kind="stable")] = np.arange(1, len(campaign_ids) + 1)
+        rank_change = ranks[:, -2] - ranks[:, -1] if matrix.shape[1] > 1 else np.zeros(len(campaign_ids), dtype=np.int64)
+        latest_growth = growth[:, -1] if growth.shape[1] else np.full(len(campaign_ids), np.nan)
+
+        def nullable(values):
+            return [None if np.isnan(value) else round(float(value), 4) for value in values]
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "granularity": granularity,
+            "buckets": [str(edge) for edge in edges],
+            "total_scans": grand_total,
+            "bucket_totals": column_totals.tolist(),
+            "campaigns": [
+                {
+                    "campaign_id": campaign_id,
+                    "business_name": names[campaign_id],
+                    "total_scans": int(totals[i]),
+                    "share": round(float(shares[i]), 4),
+                    "rank": int(overall_rank[i]),
+                    "growth_rate": nullable([latest_growth[i]])[0],
+                    "rank_change": int(rank_change[i]),
+                    "series": matrix[i].tolist(),
+                    "share_series": np.round(bucket_shares[i], 4).tolist(),
+                    "growth_series": nullable(growth[i]),
+                    "rank_series": ranks[i].tolist(),
+                }
+                for i, campaign_id in enumerate(campaign_ids)
+            ],
+        }
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select, update, insert, delete, func, and_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Campaign, Scan, ScanDailyRollup, StatCounter
+from ..metrics import registry
+
+logger = logging.getLogger(__name__)
+
+stat_counter_drift_total = registry.counter(
+    "stat_counter_drift_total", "Absolute drift corrected by counter reconciliation", ("counter",)
+)
+
+SCANS = "scans"
+CAMPAIGNS = "campaigns"
+ACTIVE_CAMPAIGNS = "active_campaigns"
+ALL_TIME = ""
+
+# Live writers spread over shards 1..SHARDS; shard 0 is only written by
+# reconciliation, so its corrections never conflict with scan inserts
+SHARDS = 16
+RECONCILE_SHARD = 0
+# Per-day buckets older than this are dropped and no longer adjusted
+KEEP_DAYS = 7
+
+CounterKey = Tuple[str, str]
+
+def _day_bucket(value: Optional[datetime]) -> str:
+    return (value or datetime.utcnow()).date().isoformat()
+
+async def add_counts(db: AsyncSession, model, keys: Sequence[str], column: str, rows: List[Dict[str, Any]]) -> None:
+    """Upsert ``rows`` into ``model``, adding ``column`` to any existing row with the same ``keys``.
+
+    Rows are written in key order, so concurrent writers lock shared rows in
+    the same order and cannot deadlock on each other.
+    """
+    if not rows:
+        return
+    rows = sorted(rows, key=lambda row: tuple(row[key] for key in keys))
+    table_column = getattr(model, column)
+
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        # Core table, not the entity: skips the ORM's per-row bulk insert bookkeeping
+        table = model.__table__
+        statement = upsert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={column: table.c[column] + getattr(statement.excluded, column), "updated_at": func.now()}
+        )
+        await db.execute(statement, rows)
+        return
+
+    for row in rows:
+        result = await db.execute(
+            update(model)
+            .where(and_(*(getattr(model, key) == row[key] for key in keys)))
+            .values({column: table_column + row[column]})
+        )
+        if not result.rowcount:
+            await db.execute(insert(model), [row])
+
+async def increment_counters(
+    db: AsyncSession,
+    deltas: Dict[CounterKey, int],
+    shard: Optional[int] = None,
+    keep_zero: bool = False
+) -> None:
+    """Add ``deltas`` in the caller's transaction; the caller commits."""
+    rows = [
+        {"name": name, "bucket": bucket, "shard": random.randint(1, SHARDS) if shard is None else shard, "value": delta}
+        for (name, bucket), delta in deltas.items() if delta or keep_zero
+    ]
+    await add_counts(db, StatCounter, ("name", "bucket", "shard"), "value", rows)
+
+async def record_scans(db: AsyncSession, timestamps: Iterable[Optional[datetime]]) -> None:
+    """Count new scans, in the same transaction that inserts them."""
+    days = Counter(_day_bucket(timestamp) for timestamp in timestamps)
+    deltas = {(SCANS, day): count for day, count in days.items()}
+    deltas[(SCANS, ALL_TIME)] = sum(days.values())
+    await increment_counters(db, deltas)
+
+async def forget_scans(db: AsyncSession, timestamps: Iterable[Optional[datetime]]) -> None:
+    """Uncount deleted scans (not scans folded into rollups, which still count)."""
+    oldest = (datetime.utcnow().date() - timedelta(days=KEEP_DAYS)).isoformat()
+    days = Counter(_day_bucket(timestamp) for timestamp in timestamps)
+    deltas = {(SCANS, day): -count for day, count in days.items() if day >= oldest}
+    deltas[(SCANS, ALL_TIME)] = -sum(days.values())
+    await increment_counters(db, deltas)
+
+async def record_campaign_change(
+    db: AsyncSession, was_live: Optional[bool], is_live: bool, count: int = 1
+) -> None:
+    """Track ``count`` campaigns being created (``was_live`` None) or changing live state.
+
+    A campaign is live when it is active and not archived.
+    """
+    deltas = {(ACTIVE_CAMPAIGNS, ALL_TIME): (int(is_live) - int(bool(was_live))) * count}
+    if was_live is None:
+        deltas[(CAMPAIGNS, ALL_TIME)] = count
+    await increment_counters(db, deltas)
+
+def is_live(campaign: Campaign) -> bool:
+    return bool(campaign.active) and not campaign.archived
+
+async def read_counters(db: AsyncSession, keys: Iterable[CounterKey]) -> Dict[CounterKey, int]:
+    keys = list(keys)
+    result = await db.execute(
+        select(StatCounter.name, StatCounter.bucket, func.sum(StatCounter.value))
+        .where(tuple_(StatCounter.name, StatCounter.bucket).in_(keys))
+        .group_by(StatCounter.name, StatCounter.bucket)
+    )
+    return {(row[0], row[1]): int(row[2]) for row in result.all()}
+
+async def dashboard_counters(db: AsyncSession) -> Dict[str, int]:
+    """Totals for the admin dashboard from at most a few dozen counter rows."""
+    today = datetime.utcnow().date().isoformat()
+    keys = [(SCANS, ALL_TIME), (SCANS, today), (CAMPAIGNS, ALL_TIME), (ACTIVE_CAMPAIGNS, ALL_TIME)]
+    values = await read_counters(db, keys)
+    if (CAMPAIGNS, ALL_TIME) not in values:
+        # Never reconciled (fresh migration): seed from the tables once
+        await reconcile_counters(db)
+        values = await read_counters(db, keys)
+    return {
+        "total_scans": values.get((SCANS, ALL_TIME), 0),
+        "scans_today": values.get((SCANS, today), 0),
+        "total_campaigns": values.get((CAMPAIGNS, ALL_TIME), 0),
+        "active_campaigns": values.get((ACTIVE_CAMPAIGNS, ALL_TIME), 0),
+    }
+
+async def reconcile_counters(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Recount from the tables and fold any difference into the counters.
+
+    On Postgres the recount and the counter sums are read from one
+    REPEATABLE READ snapshot; since scans and their increments commit
+    together, the correction is exact even under concurrent inserts. The
+    snapshot needs a transaction of its own, so it runs in a separate
+    session: ``db`` may already have begun one (``dashboard_counters``),
+    and the isolation level of a started transaction cannot be changed.
+    """
+    if db.bind.dialect.name == "postgresql":
+        snapshot_engine = db.bind.execution_options(isolation_level="REPEATABLE READ")
+        async with AsyncSession(snapshot_engine, expire_on_commit=False) as snapshot:
+            return await _reconcile(snapshot, now)
+    return await _reconcile(db, now)
+
+async def _reconcile(db: AsyncSession, now: Optional[datetime]) -> Dict[str, Any]:
+    now = now or datetime.utcnow()
+    first_day = now.date() - timedelta(days=KEEP_DAYS)
+    truth: Dict[CounterKey, int] = {}
+
+    truth[(CAMPAIGNS, ALL_TIME)] = (await db.execute(select(func.count(Campaign.id)))).scalar() or 0
+    truth[(ACTIVE_CAMPAIGNS, ALL_TIME)] = (await db.execute(
+        select(func.count(Campaign.id)).where(and_(Campaign.active == True, Campaign.archived == False))
+    )).scalar() or 0
+
+    raw_scans = (await db.execute(select(func.count(Scan.id)))).scalar() or 0
+    compacted = (await db.execute(select(func.coalesce(func.sum(ScanDailyRollup.scan_count), 0)))).scalar()
+    truth[(SCANS, ALL_TIME)] = int(raw_scans) + int(compacted)
+
+    day = func.date(Scan.timestamp)
+    start = datetime.combine(first_day, datetime.min.time())
+    for bucket in range(KEEP_DAYS + 1):
+        truth[(SCANS, (first_day + timedelta(days=bucket)).isoformat())] = 0
+    result = await db.execute(select(day, func.count(Scan.id)).where(Scan.timestamp >= start).group_by(day))
+    for value, count in result.all():
+        truth[(SCANS, str(value))] = truth.get((SCANS, str(value)), 0) + count
+    result = await db.execute(
+        select(ScanDailyRollup.day, func.sum(ScanDailyRollup.scan_count))
+        .where(ScanDailyRollup.day >= first_day)
+        .group_by(ScanDailyRollup.day)
+    )
+    for value, count in result.all():
+        truth[(SCANS, value.isoformat())] = truth.get((SCANS, value.isoformat()), 0) + int(count)
+
+    current = await read_counters(db, truth.keys())
+    corrections = {key: value - current.get(key, 0) for key, value in truth.items()}
+    # Zero deltas are written too, so a reconciled empty database is not reconciled again
+    await increment_counters(db, corrections, shard=RECONCILE_SHARD, keep_zero=True)
+    await db.execute(
+        delete(StatCounter).where(and_(StatCounter.bucket != ALL_TIME, StatCounter.bucket < first_day.isoformat()))
+    )
+    await db.commit()
+
+    drift = {}
+    for (name, bucket), delta in corrections.items():
+        if delta:
+            stat_counter_drift_total.labels(name).inc(abs(delta))
+            drift[f"{name}:{bucket or 'all'}"] = delta
+    if drift and current:
+        logger.warning("Stat counters corrected", extra={"drift": drift})
+    elif drift:
+        logger.info("Stat counters seeded", extra={"drift": drift})
+    return {"checked": len(truth), "drift": drift}
+
+class CounterReconciler:
+    """Periodically reconciles ``stat_counters`` against the source tables."""
+
+    def __init__(self, interval: float = 300.0):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self, session_factory) -> Dict[str, Any]:
+        async with session_factory() as db:
+            return await reconcile_counters(db)
+
+    async def _loop(self, session_factory) -> None:
+        while True:
+            try:
+                await self.run_once(session_factory)
+            except Exception:
+                logger.exception("Stat counter reconciliation failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self, session_factory) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._loop(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+counter_reconciler = CounterReconciler()
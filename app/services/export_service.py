@@ -0,0 +1,67 @@
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Dict, List, Sequence
+
+class ExportService:
+    @staticmethod
+    def build_campaign_workbook(campaign_id: str, business_name: str, stats: Dict[str, Any]) -> BytesIO:
+        # xlsxwriter is only needed here; importing it lazily keeps it off the startup path
+        import xlsxwriter
+
+        output = BytesIO()
+        workbook = xlsxwriter.Workbook(output, {"in_memory": True, "remove_timezone": True})
+        header_format = workbook.add_format({"bold": True, "border": 1})
+        datetime_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+
+        def write_sheet(name: str, columns: Sequence[str], rows: List[Sequence[Any]]) -> None:
+            sheet = workbook.add_worksheet(name)
+            sheet.write_row(0, 0, columns, header_format)
+            for row_index, row in enumerate(rows, start=1):
+                for col_index, value in enumerate(row):
+                    if isinstance(value, datetime):
+                        sheet.write_datetime(row_index, col_index, value, datetime_format)
+                    elif value is None:
+                        sheet.write_blank(row_index, col_index, None)
+                    else:
+                        sheet.write(row_index, col_index, value)
+
+        # Summary sheet
+        write_sheet("Summary", ["Metric", "Value"], [
+            ["Campaign ID", campaign_id],
+            ["Business Name", business_name],
+            ["Total Scans", stats.get("total_scans", 0)],
+            ["Unique Visitors (estimated)" if stats.get("unique_visitors_estimated") else "Unique Visitors",
+             stats.get("unique_visitors", 0)],
+            ["Export Date", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+        ])
+
+        # Daily, hourly and geographic sheets keep the keys of the analytics payload as columns
+        for key, sheet_name in (
+            ("daily_data", "Daily Scans"),
+            ("hourly_data", "Hourly Breakdown"),
+            ("geographic_data", "Geographic Distribution"),
+        ):
+            records = stats.get(key)
+            if records:
+                columns = list(records[0].keys())
+                write_sheet(sheet_name, columns, [[record.get(column) for column in columns] for record in records])
+
+        # Device breakdown sheet
+        if stats.get("device_breakdown"):
+            write_sheet("Device Types", ["Device", "Scans"], list(stats["device_breakdown"].items()))
+
+        # Recent scans sheet (if available)
+        if stats.get("recent_activity"):
+            write_sheet("Recent Scans", ["Timestamp", "City", "Country", "Device"], [
+                [
+                    scan.get("timestamp", ""),
+                    scan.get("city", "Unknown"),
+                    scan.get("country", "Unknown"),
+                    scan.get("device_type", "Unknown"),
+                ]
+                for scan in stats["recent_activity"]
+            ])
+
+        workbook.close()
+        output.seek(0)
+        return output
@@ -0,0 +1,100 @@
+import random
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, insert, delete, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Scan, ScanHourlyCount
+from .counters import add_counts
+
+# Writers spread each campaign-hour over shards 1..SHARDS; 0 holds backfills and rebuilds
+SHARDS = 8
+
+ScanKey = Tuple[str, Optional[datetime]]
+
+def hour_start(moment: Optional[datetime]) -> datetime:
+    return (moment or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+
+async def record_hourly_counts(db: AsyncSession, scans: Iterable[ScanKey]) -> None:
+    """Add ``(campaign_id, timestamp)`` pairs, in the transaction that inserts the scans."""
+    buckets = Counter((campaign_id, hour_start(timestamp)) for campaign_id, timestamp in scans)
+    await add_counts(db, ScanHourlyCount, ("campaign_id", "hour", "shard"), "scan_count", [
+        {"campaign_id": campaign_id, "hour": hour, "shard": random.randint(1, SHARDS), "scan_count": count}
+        for (campaign_id, hour), count in buckets.items()
+    ])
+
+async def forget_hourly_counts(db: AsyncSession, scans: Iterable[ScanKey]) -> None:
+    """Subtract deleted scans (retention compaction keeps them counted)."""
+    buckets = Counter((campaign_id, hour_start(timestamp)) for campaign_id, timestamp in scans)
+    await add_counts(db, ScanHourlyCount, ("campaign_id", "hour", "shard"), "scan_count", [
+        {"campaign_id": campaign_id, "hour": hour, "shard": random.randint(1, SHARDS), "scan_count": -count}
+        for (campaign_id, hour), count in buckets.items()
+    ])
+
+async def load_hourly_counts(
+    db: AsyncSession,
+    campaign_id: str,
+    start: datetime,
+    end: datetime
+) -> Tuple[List[datetime], List[int]]:
+    """Non-empty UTC hours in ``[start, end)`` and their counts, oldest first."""
+    total = func.sum(ScanHourlyCount.scan_count)
+    result = await db.execute(
+        select(ScanHourlyCount.hour, total)
+        .where(and_(
+            ScanHourlyCount.campaign_id == campaign_id,
+            ScanHourlyCount.hour >= hour_start(start),
+            ScanHourlyCount.hour < end
+        ))
+        .group_by(ScanHourlyCount.hour)
+        .having(total > 0)
+        .order_by(ScanHourlyCount.hour)
+    )
+    rows = result.all()
+    return [row[0] for row in rows], [int(row[1]) for row in rows]
+
+async def hourly_total(
+    db: AsyncSession,
+    start: datetime,
+    end: Optional[datetime] = None,
+    campaign_id: Optional[str] = None
+) -> int:
+    """Scans in UTC hour buckets starting in ``[start, end)``, for one campaign or all."""
+    query = select(func.coalesce(func.sum(ScanHourlyCount.scan_count), 0)).where(ScanHourlyCount.hour >= start)
+    if end is not None:
+        query = query.where(ScanHourlyCount.hour < end)
+    if campaign_id is not None:
+        query = query.where(ScanHourlyCount.campaign_id == campaign_id)
+    return int((await db.execute(query)).scalar())
+
+def hour_expression(dialect: str):
+    # Must serialise like the application's DateTime values (see migration 0006)
+    if dialect == "postgresql":
+        return func.date_trunc("hour", Scan.timestamp)
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00.000000", Scan.timestamp)
+    raise RuntimeError(f"Hourly count rebuild is not supported on {dialect}")
+
+async def rebuild_hourly_counts(db: AsyncSession, since: datetime, campaign_id: Optional[str] = None) -> Dict[str, Any]:
+    """Recount complete hours from ``since`` up to the current hour from raw scans.
+
+    Hours whose raw scans were already compacted by retention would be lost,
+    so ``since`` should not reach back past the retention window.
+    """
+    start, end = hour_start(since), hour_start(datetime.utcnow())
+    hour = hour_expression(db.bind.dialect.name)
+    removed = delete(ScanHourlyCount).where(and_(ScanHourlyCount.hour >= start, ScanHourlyCount.hour < end))
+    recount = select(Scan.campaign_id, hour, func.count(Scan.id)).where(
+        and_(Scan.timestamp >= start, Scan.timestamp < end)
+    )
+    if campaign_id is not None:
+        removed = removed.where(ScanHourlyCount.campaign_id == campaign_id)
+        recount = recount.where(Scan.campaign_id == campaign_id)
+    await db.execute(removed)
+    result = await db.execute(
+        insert(ScanHourlyCount).from_select(
+            ["campaign_id", "hour", "scan_count"], recount.group_by(Scan.campaign_id, hour)
+        )
+    )
+    await db.commit()
+    return {"from": start, "to": end, "hours": max(result.rowcount or 0, 0)}
@@ -0,0 +1,292 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select, update, delete, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import PrivacyRequest, Scan, CompactScan
+from ..metrics import registry
+from ..utils import encode_visitor_id
+from .counters import forget_scans
+from .hourly_counts import forget_hourly_counts
+from .recent_scans import recent_scans
+
+logger = logging.getLogger(__name__)
+
+privacy_requests_processed_total = registry.counter(
+    "privacy_requests_processed_total", "Privacy requests finished by the processor", ("type", "status")
+)
+privacy_rows_deleted_total = registry.counter(
+    "privacy_rows_deleted_total", "Scan rows deleted for privacy requests", ("table",)
+)
+
+EXPORT_TYPES = ("access", "export")
+DELETE_TYPES = ("delete",)
+
+class PrivacyRequestProcessor:
+    """Works through pending ``PrivacyRequest`` rows in groups.
+
+    Up to ``group_size`` pending requests are claimed at once (with
+    ``SKIP LOCKED`` on Postgres, and a status-guarded update everywhere, so
+    several workers can run this concurrently). Their anonymous ids are then
+    resolved together through the ``anonymous_user_id`` index. Deletes run
+    in batches of ``batch_size`` rows, each in its own short transaction,
+    and the processor sleeps after each batch so it stays under
+    ``max_rows_per_second`` and never holds locks that stall scan inserts
+    for long. Daily rollups are unaffected because they carry no visitor ids.
+    Requests left in ``processing`` by a crashed worker are reclaimed after
+    ``stale_after`` seconds; re-running a delete is harmless.
+    """
+
+    def __init__(
+        self,
+        group_size: int = 100,
+        batch_size: int = 1000,
+        max_rows_per_second: float = 5000.0,
+        stale_after: float = 900.0,
+        interval: float = 60.0,
+        max_export_rows: int = 10_000
+    ):
+        self.group_size = group_size
+        self.batch_size = batch_size
+        self.max_rows_per_second = max_rows_per_second
+        self.stale_after = stale_after
+        self.interval = interval
+        self.max_export_rows = max_export_rows
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self, session_factory) -> Dict[str, Any]:
+        """Process groups until nothing is pending."""
+        started = time.perf_counter()
+        totals = {"requests": 0, "groups": 0, "rows_deleted": 0, "rows_exported": 0}
+        while True:
+            async with session_factory() as db:
+                summary = await self.process_group(db)
+            if summary is None:
+                break
+            totals["groups"] += 1
+            for key in ("requests", "rows_deleted", "rows_exported"):
+                totals[key] += summary[key]
+
+        elapsed = time.perf_counter() - started
+        totals["elapsed_s"] = round(elapsed, 3)
+        totals["requests_per_second"] = round(totals["requests"] / elapsed, 1) if elapsed > 0 else 0.0
+        totals["rows_per_second"] = round(totals["rows_deleted"] / elapsed, 1) if elapsed > 0 else 0.0
+        if totals["requests"]:
+            logger.info("Privacy requests processed", extra=totals)
+        return totals
+
+    async def process_group(self, db: AsyncSession) -> Optional[Dict[str, Any]]:
+        requests = await self._claim(db)
+        if not requests:
+            return None
+
+        summary = {"requests": len(requests), "rows_deleted": 0, "rows_exported": 0}
+        affected: Dict[Tuple[str, str], int] = defaultdict(int)
+        results: Dict[str, str] = {}
+        valid = []
+        for request in requests:
+            if not request.anonymous_user_id or request.request_type not in EXPORT_TYPES + DELETE_TYPES:
+                await self._finish(db, request, "failed", error="Missing anonymous_user_id or unknown request_type")
+            else:
+                valid.append(request)
+        if len(valid) < len(requests):
+            await db.commit()
+        # A rollback expires the claimed rows, and reloading them lazily is not possible on an AsyncSession
+        claimed = [(request.id, request.request_type) for request in valid]
+
+        try:
+            # Exports first, so a user who asked for both gets their data before it is erased
+            export_ids = sorted({r.anonymous_user_id for r in valid if r.request_type in EXPORT_TYPES})
+            if export_ids:
+                exported = await self._export(db, export_ids)
+                for user_id, scans in exported.items():
+                    truncated = len(scans) > self.max_export_rows
+                    scans = scans[:self.max_export_rows]
+                    results[user_id] = json.dumps(
+                        {"anonymous_user_id": user_id, "scans": scans, "truncated": truncated}, default=str
+                    )
+                    affected[("export", user_id)] = len(scans)
+                    summary["rows_exported"] += len(scans)
+
+            delete_ids = sorted({r.anonymous_user_id for r in valid if r.request_type in DELETE_TYPES})
+            if delete_ids:
+                deleted = await self._delete(db, delete_ids)
+                for user_id, count in deleted.items():
+                    affected[("delete", user_id)] = count
+                    summary["rows_deleted"] += count
+        except Exception as exc:
+            await db.rollback()
+            logger.exception("Privacy request group failed", extra={"requests": len(valid)})
+            await self._fail(db, claimed, str(exc)[:1000])
+            return summary
+
+        for request in valid:
+            if request.request_type in EXPORT_TYPES:
+                await self._finish(
+                    db, request, "completed",
+                    rows=affected[("export", request.anonymous_user_id)],
+                    result=results.get(request.anonymous_user_id,
+                                       json.dumps({"anonymous_user_id": request.anonymous_user_id, "scans": [], "truncated": False}))
+                )
+            else:
+                await self._finish(db, request, "completed", rows=affected[("delete", request.anonymous_user_id)])
+        await db.commit()
+        return summary
+
+    async def _claim(self, db: AsyncSession) -> List[PrivacyRequest]:
+        now = datetime.utcnow()
+        claimable = or_(
+            PrivacyRequest.status == "pending",
+            and_(PrivacyRequest.status == "processing", PrivacyRequest.claimed_at < now - timedelta(seconds=self.stale_after))
+        )
+        ids = (await db.execute(
+            select(PrivacyRequest.id).where(claimable)
+            .order_by(PrivacyRequest.created_at)
+            .limit(self.group_size)
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+        if not ids:
+            await db.rollback()
+            return []
+
+        token = str(uuid.uuid4())
+        # The status guard makes a concurrent claim of the same rows a no-op where SKIP LOCKED is unavailable
+        await db.execute(
+            update(PrivacyRequest)
+            .where(and_(PrivacyRequest.id.in_(ids), claimable))
+            .values(status="processing", claim_token=token, claimed_at=now)
+        )
+        await db.commit()
+        result = await db.execute(select(PrivacyRequest).where(PrivacyRequest.claim_token == token))
+        return list(result.scalars().all())
+
+    async def _export(self, db: AsyncSession, user_ids: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+        exported: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # The cap applies per user, so one heavy user cannot use up the rows of the rest of the group
+        oldest = func.row_number().over(
+            partition_by=Scan.anonymous_user_id, order_by=(Scan.timestamp, Scan.id)
+        ).label("oldest")
+        scans = select(
+            Scan.anonymous_user_id, Scan.campaign_id, Scan.timestamp,
+            Scan.city, Scan.country, Scan.device_type, oldest
+        ).where(Scan.anonymous_user_id.in_(user_ids)).subquery()
+        result = await db.execute(
+            select(
+                scans.c.anonymous_user_id, scans.c.campaign_id, scans.c.timestamp,
+                scans.c.city, scans.c.country, scans.c.device_type
+            )
+            # One row past the cap tells a truncated export apart from one that fits exactly
+            .where(scans.c.oldest <= self.max_export_rows + 1)
+            .order_by(scans.c.anonymous_user_id, scans.c.oldest)
+        )
+        for row in result.all():
+            exported[row.anonymous_user_id].append({
+                "campaign_id": row.campaign_id,
+                "timestamp": row.timestamp,
+                "city": row.city,
+                "country": row.country,
+                "device_type": row.device_type,
+            })
+        await db.commit()
+        return exported
+
+    async def _delete(self, db: AsyncSession, user_ids: Sequence[str]) -> Dict[str, int]:
+        deleted: Dict[str, int] = defaultdict(int)
+        while True:
+            rows = (await db.execute(
+                select(Scan.id, Scan.anonymous_user_id, Scan.campaign_id, Scan.timestamp)
+                .where(Scan.anonymous_user_id.in_(user_ids))
+                .limit(self.batch_size)
+            )).all()
+            if not rows:
+                break
+            await self.delete_scans(db, rows)
+            await db.commit()
+            for row in rows:
+                deleted[row.anonymous_user_id] += 1
+            privacy_rows_deleted_total.labels("scans").inc(len(rows))
+            await self._throttle(len(rows))
+
+        # The compact encoding is a copy of the same scans keyed by the packed id
+        visitor_ids = {encode_visitor_id(user_id): user_id for user_id in user_ids}
+        while True:
+            rows = (await db.execute(
+                select(CompactScan.id, CompactScan.visitor_id)
+                .where(CompactScan.visitor_id.in_(list(visitor_ids)))
+                .limit(self.batch_size)
+            )).all()
+            if not rows:
+                break
+            await db.execute(delete(CompactScan).where(CompactScan.id.in_([row.id for row in rows])))
+            await db.commit()
+            privacy_rows_deleted_total.labels("scans_compact").inc(len(rows))
+            await self._throttle(len(rows))
+        return deleted
+
+    async def delete_scans(self, db: AsyncSession, rows: Sequence[Any]) -> None:
+        """Delete one batch of raw scans; rows carry ``id``, ``campaign_id`` and ``timestamp``."""
+        await db.execute(delete(Scan).where(Scan.id.in_([row.id for row in rows])))
+        await forget_scans(db, [row.timestamp for row in rows])
+        await forget_hourly_counts(db, [(row.campaign_id, row.timestamp) for row in rows])
+        recent_scans.forget({row.campaign_id for row in rows})
+
+    async def _throttle(self, rows: int) -> None:
+        if self.max_rows_per_second > 0:
+            await asyncio.sleep(rows / self.max_rows_per_second)
+
+    async def _finish(
+        self,
+        db: AsyncSession,
+        request: PrivacyRequest,
+        status: str,
+        rows: Optional[int] = None,
+        result: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> None:
+        request.status = status
+        request.processed_at = datetime.utcnow()
+        request.rows_affected = rows
+        request.result = result
+        request.error = error
+        privacy_requests_processed_total.labels(request.request_type or "unknown", status).inc()
+
+    async def _fail(self, db: AsyncSession, claimed: Sequence[Tuple[str, str]], error: str) -> None:
+        """Mark claimed requests failed by id, without touching their (expired) ORM objects."""
+        if not claimed:
+            return
+        await db.execute(
+            update(PrivacyRequest)
+            .where(and_(PrivacyRequest.id.in_([request_id for request_id, _ in claimed]), PrivacyRequest.status == "processing"))
+            .values(status="failed", processed_at=datetime.utcnow(), rows_affected=None, result=None, error=error)
+        )
+        await db.commit()
+        for _, request_type in claimed:
+            privacy_requests_processed_total.labels(request_type or "unknown", "failed").inc()
+
+    async def _loop(self, session_factory) -> None:
+        while True:
+            try:
+                await self.run_once(session_factory)
+            except Exception:
+                logger.exception("Privacy request processing failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self, session_factory) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._loop(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+privacy_processor = PrivacyRequestProcessor()
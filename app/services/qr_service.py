@@ -1,6 +1,4 @@
-import qrcode
 from io import BytesIO
-from PIL import Image
 from typing import Optional
 from ..config import settings
 
@@ -11,6 +9,10 @@ class QRService:
         size: int = 300,
         format: str = "PNG"
     ) -> BytesIO:
+        # qrcode and PIL are only needed here, so keep them out of startup
+        import qrcode
+        from PIL import Image
+        
         # Create the tracking URL
         tracking_url = f"{settings.base_url}/scan/{campaign_id}"
         
@@ -43,6 +45,11 @@ class QRService:
     def get_tracking_url(campaign_id: str) -> str:
         return f"{settings.base_url}/scan/{campaign_id}"
     
+    @staticmethod
+    def get_download_url(campaign_id: str, size: int = 300, format: str = "PNG") -> str:
+        """The admin endpoint that renders the campaign's QR code."""
+        return f"{settings.base_url}/admin/campaigns/{campaign_id}/qr?size={size}&format={format}"
+    
     @staticmethod
     def validate_qr_scan(campaign_id: str) -> bool:
         # Basic validation - campaign ID should be 14 characters
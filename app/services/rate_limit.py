@@ -0,0 +1,149 @@
+import hashlib
+import mmap
+import os
+import struct
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+class Limit(NamedTuple):
+    """``count`` requests per ``period`` seconds, all of which may arrive at once."""
+    count: int
+    period: float
+
+def parse_limit(value: Optional[str]) -> Optional[Limit]:
+    """``"120/60"`` is 120 requests per 60 seconds; empty or ``"0"`` means no limit."""
+    value = (value or "").strip()
+    if not value or value == "0":
+        return None
+    count, _, period = value.partition("/")
+    limit = Limit(int(count), float(period or 1))
+    if limit.count < 0 or limit.period <= 0:
+        raise ValueError(f"Invalid rate limit {value!r}, expected COUNT/SECONDS")
+    return limit if limit.count else None
+
+Check = Tuple[str, Limit]
+
+# Set on the ASGI scope of a /scan request over its limit: it is still
+# redirected, only not recorded
+SCAN_RATE_LIMITED = "scan_rate_limited"
+
+def _advance(tat: Optional[float], limit: Limit, now: float) -> Tuple[float, float]:
+    """GCRA step: the bucket's next theoretical arrival time and, if denied, seconds to wait.
+
+    A token bucket of ``count`` tokens refilled at ``count / period`` per
+    second, kept as one float: the time at which the bucket would be full
+    again. A request is allowed while that is at most ``period`` ahead.
+    """
+    interval = limit.period / limit.count
+    tat = now if tat is None or tat < now else tat
+    wait = tat + interval - now - limit.period
+    return tat + interval, max(wait, 0.0)
+
+class MemoryBuckets:
+    """Token buckets of one worker, one float per key.
+
+    A bucket whose time has passed is full, the same as a missing one, so
+    such keys are swept once ``max_keys`` is reached; if the table is still
+    full the oldest keys are dropped, which can only let requests through.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tat: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def acquire(self, checks: Sequence[Check], now: float) -> Optional[Tuple[int, float]]:
+        """Take a token from every bucket, or from none.
+
+        Returns None when allowed, else the index of the first empty bucket's
+        check and the seconds until it has a token again.
+        """
+        updates: List[Tuple[str, float]] = []
+        for index, (key, limit) in enumerate(checks):
+            tat, wait = _advance(self._tat.get(key), limit, now)
+            if wait:
+                return index, wait
+            updates.append((key, tat))
+        if len(self._tat) + len(updates) > self.max_keys:
+            self._sweep(now)
+        for key, tat in updates:
+            self._tat[key] = tat
+        return None
+
+    def _sweep(self, now: float) -> None:
+        self._tat = {key: tat for key, tat in self._tat.items() if tat > now}
+        excess = len(self._tat) - self.max_keys * 3 // 4
+        if excess > 0:
+            for key in list(self._tat)[:excess]:
+                del self._tat[key]
+
+class SharedBuckets:
+    """Token buckets shared by the workers on one host through a memory-mapped file.
+
+    The file is a fixed open-addressing table of ``slots`` 16-byte entries
+    (64-bit key hash, next arrival time); a key probes at most ``probes``
+    slots and takes the first empty or expired one. Each acquire holds an
+    exclusive ``flock`` on the file for a few microseconds. When every
+    probed slot is live the request is allowed without being counted.
+    """
+
+    ENTRY = struct.Struct("<Qd")
+
+    def __init__(self, path: str, slots: int = 131_072, probes: int = 8):
+        import fcntl
+        self._fcntl = fcntl
+        self.path = path
+        self.slots = slots
+        self.probes = probes
+        size = slots * self.ENTRY.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def __len__(self) -> int:
+        return self.slots
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Stable across processes, unlike hash(); 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def _find(self, key_hash: int, now: float) -> Tuple[Optional[int], Optional[float]]:
+        free = None
+        for probe in range(self.probes):
+            offset = ((key_hash + probe) % self.slots) * self.ENTRY.size
+            stored, tat = self.ENTRY.unpack_from(self._map, offset)
+            if stored == key_hash:
+                return offset, tat
+            if free is None and (stored == 0 or tat <= now):
+                free = offset
+        return free, None
+
+    def acquire(self, checks: Sequence[Check], now: float) -> Optional[Tuple[int, float]]:
+        """Same contract as ``MemoryBuckets.acquire``."""
+        updates: List[Tuple[int, int, float]] = []
+        self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+        try:
+            for index, (key, limit) in enumerate(checks):
+                key_hash = self._hash(key)
+                offset, tat = self._find(key_hash, now)
+                tat, wait = _advance(tat, limit, now)
+                if wait:
+                    return index, wait
+                if offset is not None and all(offset != taken for taken, _, _ in updates):
+                    updates.append((offset, key_hash, tat))
+            for offset, key_hash, tat in updates:
+                self.ENTRY.pack_into(self._map, offset, key_hash, tat)
+            return None
+        finally:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,264 @@
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select, func, extract, cast, BigInteger
+from ..models import Scan
+from ..metrics import registry
+
+logger = logging.getLogger(__name__)
+
+recent_scan_campaigns = registry.gauge("recent_scan_campaigns", "Campaigns held by the in-memory recent scan store")
+recent_scan_bytes = registry.gauge("recent_scan_bytes", "Approximate memory used by the in-memory recent scan store")
+
+WINDOW_MINUTES = 48 * 60
+
+Details = Tuple[Optional[str], Optional[str], Optional[str]]  # city, country, device type
+
+def _epoch(moment: datetime) -> float:
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+def _utc(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+def single_process() -> bool:
+    """Whether this looks like the only app process.
+
+    ``WEB_CONCURRENCY`` above 1 (read by uvicorn and gunicorn) or a parent
+    that spawned this process (``uvicorn --workers``) means it is not.
+    """
+    try:
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        workers = 1
+    return workers <= 1 and multiprocessing.parent_process() is None
+
+class _CampaignScans:
+    """Per-minute counts over the window and the latest ``capacity`` scans of one campaign."""
+    __slots__ = ("minutes", "last_minute", "times", "details")
+
+    def __init__(self, capacity: int):
+        self.minutes = array("I", bytes(4 * WINDOW_MINUTES))
+        self.last_minute = 0
+        # Parallel arrays; a slot with time 0 is empty
+        self.times = array("d", bytes(8 * capacity))
+        self.details: List[Optional[Details]] = [None] * capacity
+
+    def tally(self, minute: int, count: int = 1) -> None:
+        if minute > self.last_minute:
+            # Slots between the previous newest minute and this one held counts from a window ago
+            stale = minute - self.last_minute
+            if stale >= WINDOW_MINUTES:
+                self.minutes = array("I", bytes(4 * WINDOW_MINUTES))
+            else:
+                for step in range(stale):
+                    self.minutes[(minute - step) % WINDOW_MINUTES] = 0
+            self.last_minute = minute
+        if minute > self.last_minute - WINDOW_MINUTES:
+            self.minutes[minute % WINDOW_MINUTES] += count
+
+    def remember(self, seconds: float, details: Details) -> None:
+        # Replaces the oldest entry, so late arrivals never push out newer scans
+        oldest = min(self.times)
+        if seconds > oldest:
+            slot = self.times.index(oldest)
+            self.times[slot] = seconds
+            self.details[slot] = details
+
+    def count(self, first_minute: int, end_minute: int) -> int:
+        """Scans in minutes ``[first_minute, end_minute)``."""
+        first_minute = max(first_minute, self.last_minute - WINDOW_MINUTES + 1)
+        end_minute = min(end_minute, self.last_minute + 1)
+        if end_minute <= first_minute:
+            return 0
+        start = first_minute % WINDOW_MINUTES
+        stop = start + end_minute - first_minute
+        if stop <= WINDOW_MINUTES:
+            return sum(self.minutes[start:stop])
+        return sum(self.minutes[start:]) + sum(self.minutes[:stop - WINDOW_MINUTES])
+
+class RecentScanStore:
+    """The last 48 hours of scans per campaign, kept in memory by this process.
+
+    The window is loaded from ``scans`` at startup, before anything in the
+    process writes scans, and every scan stored afterwards is added after
+    its commit, so "today", "last hour" and the latest scans of a campaign
+    need no query. Each campaign holds a fixed array of per-minute counts
+    for the window and its ``capacity`` newest scans; campaigns without
+    scans in the window take no memory. Beyond ``max_campaigns`` the
+    campaign with the oldest newest scan is evicted, and evicted campaigns
+    are answered from the database from then on.
+
+    The store only sees scans written by this process, so it is off by
+    default and only switched on for a single app process (see
+    ``single_process``), which is how ``python main.py`` starts the app.
+    Scans written by other processes (``replay-spool``, other replicas)
+    are not in it until the next start. Campaigns that lose scans to a
+    privacy delete are dropped with ``forget`` and read from the database.
+    """
+
+    def __init__(self, capacity: int = 50, max_campaigns: int = 5000):
+        self.capacity = capacity
+        self.max_campaigns = max_campaigns
+        self.enabled = False
+        self.ready = False
+        self._campaigns: Dict[str, _CampaignScans] = {}
+        self._evicted: Set[str] = set()
+        self._sized: Tuple[int, int] = (0, 0)
+
+    def __len__(self) -> int:
+        return len(self._campaigns)
+
+    @property
+    def campaign_bytes(self) -> int:
+        """Memory of one campaign's arrays, with every scan slot filled."""
+        if self._sized[0] != self.capacity:
+            sample = _CampaignScans(self.capacity)
+            self._sized = (self.capacity, (
+                sys.getsizeof(sample) + sys.getsizeof(sample.minutes) + sys.getsizeof(sample.times)
+                + sys.getsizeof(sample.details) + self.capacity * sys.getsizeof((None, None, None))
+            ))
+        return self._sized[1]
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._campaigns) * self.campaign_bytes
+
+    def covers(self, campaign_id: str) -> bool:
+        """Whether the store can answer for this campaign instead of the database."""
+        return self.enabled and self.ready and campaign_id not in self._evicted
+
+    def add(
+        self,
+        campaign_id: str,
+        timestamp: Optional[datetime],
+        city: Optional[str] = None,
+        country: Optional[str] = None,
+        device_type: Optional[str] = None
+    ) -> None:
+        """Add a committed scan; scans older than the window are ignored."""
+        if not self.ready or campaign_id in self._evicted:
+            return
+        seconds = _epoch(timestamp) if timestamp is not None else time.time()
+        if seconds < time.time() - WINDOW_MINUTES * 60:
+            return
+        scans = self._campaign(campaign_id)
+        scans.tally(int(seconds // 60))
+        scans.remember(seconds, (city, country, device_type))
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Add committed ``scans`` rows (dicts with the column names as keys)."""
+        for row in rows:
+            self.add(row["campaign_id"], row.get("timestamp"), row.get("city"), row.get("country"), row.get("device_type"))
+
+    def forget(self, campaign_ids: Iterable[str]) -> None:
+        """Drop campaigns whose scans were deleted; they are answered from the database from then on."""
+        for campaign_id in campaign_ids:
+            self._campaigns.pop(campaign_id, None)
+            self._evicted.add(campaign_id)
+        recent_scan_campaigns.set(len(self._campaigns))
+        recent_scan_bytes.set(self.memory_bytes)
+
+    def _campaign(self, campaign_id: str) -> _CampaignScans:
+        scans = self._campaigns.get(campaign_id)
+        if scans is None:
+            if len(self._campaigns) >= self.max_campaigns:
+                evicted = min(self._campaigns, key=lambda key: self._campaigns[key].last_minute)
+                del self._campaigns[evicted]
+                self._evicted.add(evicted)
+            scans = self._campaigns[campaign_id] = _CampaignScans(self.capacity)
+            recent_scan_campaigns.set(len(self._campaigns))
+            recent_scan_bytes.set(self.memory_bytes)
+        return scans
+
+    def count(self, campaign_id: str, start: datetime, end: Optional[datetime] = None) -> int:
+        """Scans in ``[start, end)``; ``start`` must be within the last 48 hours."""
+        scans = self._campaigns.get(campaign_id)
+        if scans is None:
+            return 0
+        end_minute = int(_epoch(end) // 60) if end is not None else scans.last_minute + 1
+        return scans.count(int(_epoch(start) // 60), end_minute)
+
+    def hourly(self, campaign_id: str, start: datetime, end: datetime) -> Tuple[List[datetime], List[int]]:
+        """Non-empty UTC hours in ``[start, end)`` and their counts, like ``load_hourly_counts``."""
+        scans = self._campaigns.get(campaign_id)
+        if scans is None:
+            return [], []
+        hours, counts = [], []
+        first_minute, end_minute = int(_epoch(start) // 60), int(_epoch(end) // 60)
+        hour = first_minute // 60
+        while hour * 60 < end_minute:
+            count = scans.count(max(hour * 60, first_minute), min(hour * 60 + 60, end_minute))
+            if count:
+                hours.append(_utc(hour * 3600))
+                counts.append(count)
+            hour += 1
+        return hours, counts
+
+    def latest(self, campaign_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """The newest scans, newest first, as ``recent_activity`` entries."""
+        scans = self._campaigns.get(campaign_id)
+        if scans is None:
+            return []
+        entries = sorted(
+            ((seconds, details) for seconds, details in zip(scans.times, scans.details) if seconds),
+            key=lambda entry: entry[0], reverse=True
+        )[:limit]
+        return [
+            {"timestamp": _utc(seconds), "city": city, "country": country, "device_type": device_type}
+            for seconds, (city, country, device_type) in entries
+        ]
+
+    async def load(self, session_factory) -> int:
+        """Fill the window from ``scans``; must finish before this process writes scans.
+
+        Counts per campaign and minute are grouped by the database, and
+        only the ``capacity`` newest scans of each campaign are fetched.
+        """
+        start = _utc(time.time() - WINDOW_MINUTES * 60)
+        newest = func.row_number().over(
+            partition_by=Scan.campaign_id, order_by=(Scan.timestamp.desc(), Scan.id.desc())
+        ).label("newest")
+        latest = select(
+            Scan.campaign_id, Scan.timestamp, Scan.city, Scan.country, Scan.device_type, newest
+        ).where(Scan.timestamp >= start).subquery()
+
+        self._campaigns.clear()
+        self._evicted.clear()
+        loaded = 0
+        async with session_factory() as db:
+            if db.bind.dialect.name == "postgresql":
+                # A cast to integer would round the fractional seconds
+                minute = func.floor(extract("epoch", Scan.timestamp) / 60)
+            else:
+                minute = cast(extract("epoch", Scan.timestamp), BigInteger) // 60
+            result = await db.execute(
+                select(Scan.campaign_id, minute, func.count()).where(Scan.timestamp >= start)
+                .group_by(Scan.campaign_id, minute)
+            )
+            for campaign_id, scan_minute, count in result.all():
+                if campaign_id not in self._evicted:
+                    self._campaign(campaign_id).tally(int(scan_minute), count)
+                    loaded += count
+            result = await db.execute(
+                select(latest.c.campaign_id, latest.c.timestamp, latest.c.city, latest.c.country, latest.c.device_type)
+                .where(latest.c.newest <= self.capacity)
+            )
+            for campaign_id, timestamp, city, country, device_type in result.all():
+                if campaign_id in self._campaigns:
+                    self._campaigns[campaign_id].remember(_epoch(timestamp), (city, country, device_type))
+        self.ready = True
+        logger.info(
+            "Recent scan store loaded",
+            extra={"scans": loaded, "campaigns": len(self._campaigns), "bytes": self.memory_bytes}
+        )
+        return loaded
+
+    def stop(self) -> None:
+        self.ready = False
+
+recent_scans = RecentScanStore()
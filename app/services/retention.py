@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, insert, delete, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Campaign, Scan, ScanDailyRollup, CampaignKey, CompactScan
+from .visitor_sketch import add_visitors
+
+logger = logging.getLogger(__name__)
+
+class ScanRetentionService:
+    """Folds old raw scans into ``scan_daily_rollups`` and purges them.
+
+    A campaign's raw scans are compacted when they are older than
+    ``raw_days`` whole days, or entirely once the campaign has been archived
+    for more than ``archived_days``; 0 disables either rule. Each batch of up
+    to ``batch_size`` scans is aggregated and deleted in one transaction, so
+    an interrupted run loses nothing and the next run simply continues with
+    whatever raw rows are still past the cutoff. The batch's visitors are
+    added to the campaign's ``CampaignVisitorSketch`` in the same
+    transaction; re-adding them after an interrupted run is a no-op. Copies of those scans in
+    ``scans_compact`` are then deleted in batches for the same cutoff; the
+    rollups already count them.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        raw_days: int = 0,
+        archived_days: int = 0,
+        batch_size: int = 5000,
+        pause: float = 0.1
+    ):
+        self.db = db
+        self.raw_days = raw_days
+        self.archived_days = archived_days
+        self.batch_size = batch_size
+        self.pause = pause
+
+    async def plan(self, now: Optional[datetime] = None) -> List[Tuple[str, datetime]]:
+        """Campaigns with a retention cutoff, and everything before it to compact."""
+        now = now or datetime.utcnow()
+        raw_cutoff = None
+        if self.raw_days > 0:
+            raw_cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=self.raw_days)
+        archived_before = now - timedelta(days=self.archived_days) if self.archived_days > 0 else None
+
+        result = await self.db.execute(
+            select(Campaign.campaign_id, Campaign.archived, Campaign.archived_at).order_by(Campaign.campaign_id)
+        )
+        plan = []
+        for row in result.all():
+            if archived_before and row.archived and row.archived_at and row.archived_at < archived_before:
+                plan.append((row.campaign_id, now))
+            elif raw_cutoff:
+                plan.append((row.campaign_id, raw_cutoff))
+        return plan
+
+    async def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        stats = {"campaigns": 0, "rows": 0, "rollup_rows": 0, "compact_rows": 0, "batches": 0}
+
+        for campaign_id, cutoff in await self.plan():
+            if dry_run:
+                rows = await self._count(campaign_id, cutoff)
+                compact_rows = await self._count_compact(campaign_id, cutoff)
+                stats["rows"] += rows
+                stats["compact_rows"] += compact_rows
+            else:
+                rows = await self._compact(campaign_id, cutoff, stats)
+                compact_rows = await self._purge_compact(campaign_id, cutoff, stats)
+            if rows or compact_rows:
+                stats["campaigns"] += 1
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed_s"] = round(elapsed, 2)
+        stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+        stats["dry_run"] = dry_run
+        logger.info("Scan retention run finished", extra=stats)
+        return stats
+
+    async def _count(self, campaign_id: str, cutoff: datetime) -> int:
+        result = await self.db.execute(
+            select(func.count(Scan.id)).where(and_(Scan.campaign_id == campaign_id, Scan.timestamp < cutoff))
+        )
+        return result.scalar() or 0
+
+    async def _campaign_key(self, campaign_id: str) -> Optional[int]:
+        result = await self.db.execute(select(CampaignKey.key).where(CampaignKey.campaign_id == campaign_id))
+        return result.scalar()
+
+    async def _count_compact(self, campaign_id: str, cutoff: datetime) -> int:
+        key = await self._campaign_key(campaign_id)
+        if key is None:
+            return 0
+        result = await self.db.execute(
+            select(func.count(CompactScan.id))
+            .where(and_(CompactScan.campaign_key == key, CompactScan.occurred_at < cutoff))
+        )
+        return result.scalar() or 0
+
+    async def _compact(self, campaign_id: str, cutoff: datetime, stats: Dict[str, Any]) -> int:
+        compacted = 0
+        while True:
+            # Oldest first via ix_scans_campaign_timestamp_id
+            ids = (await self.db.execute(
+                select(Scan.id)
+                .where(and_(Scan.campaign_id == campaign_id, Scan.timestamp < cutoff))
+                .order_by(Scan.timestamp)
+                .limit(self.batch_size)
+            )).scalars().all()
+            if not ids:
+                return compacted
+
+            day = func.date(Scan.timestamp)
+            aggregate = select(
+                Scan.campaign_id,
+                day,
+                Scan.device_type,
+                Scan.city,
+                Scan.country,
+                func.count(Scan.id),
+                func.count(func.distinct(Scan.anonymous_user_id)),
+            ).where(Scan.id.in_(ids)).group_by(Scan.campaign_id, day, Scan.device_type, Scan.city, Scan.country)
+            result = await self.db.execute(
+                insert(ScanDailyRollup).from_select(
+                    ["campaign_id", "day", "device_type", "city", "country", "scan_count", "visitor_count"],
+                    aggregate
+                )
+            )
+            # Rollup rows count visitors per group only; the sketch keeps them campaign-wide
+            visitors = (await self.db.execute(
+                select(Scan.anonymous_user_id).where(Scan.id.in_(ids)).distinct()
+            )).scalars().all()
+            await add_visitors(self.db, campaign_id, visitors)
+            await self.db.execute(delete(Scan).where(Scan.id.in_(ids)))
+            await self.db.commit()
+
+            compacted += len(ids)
+            stats["rows"] += len(ids)
+            stats["rollup_rows"] += max(result.rowcount or 0, 0)
+            stats["batches"] += 1
+            if self.pause:
+                # Leave room for live scan inserts between batches
+                await asyncio.sleep(self.pause)
+
+    async def _purge_compact(self, campaign_id: str, cutoff: datetime, stats: Dict[str, Any]) -> int:
+        key = await self._campaign_key(campaign_id)
+        if key is None:
+            return 0
+        purged = 0
+        while True:
+            # Oldest first via ix_scans_compact_campaign_occurred
+            ids = (await self.db.execute(
+                select(CompactScan.id)
+                .where(and_(CompactScan.campaign_key == key, CompactScan.occurred_at < cutoff))
+                .order_by(CompactScan.occurred_at)
+                .limit(self.batch_size)
+            )).scalars().all()
+            if not ids:
+                return purged
+
+            await self.db.execute(delete(CompactScan).where(CompactScan.id.in_(ids)))
+            await self.db.commit()
+
+            purged += len(ids)
+            stats["compact_rows"] += len(ids)
+            stats["batches"] += 1
+            if self.pause:
+                await asyncio.sleep(self.pause)
+
+async def rollup_totals(db: AsyncSession, campaign_id: Optional[str] = None, since: Optional[date] = None) -> int:
+    """Scans already compacted, for one campaign or all of them."""
+    query = select(func.coalesce(func.sum(ScanDailyRollup.scan_count), 0))
+    if campaign_id is not None:
+        query = query.where(ScanDailyRollup.campaign_id == campaign_id)
+    if since is not None:
+        query = query.where(ScanDailyRollup.day >= since)
+    return int((await db.execute(query)).scalar())
+
+async def rollup_totals_by_campaign(db: AsyncSession) -> Dict[str, int]:
+    result = await db.execute(
+        select(ScanDailyRollup.campaign_id, func.sum(ScanDailyRollup.scan_count))
+        .group_by(ScanDailyRollup.campaign_id)
+    )
+    return {row[0]: int(row[1]) for row in result.all()}
+
+async def rollup_breakdown(db: AsyncSession, campaign_id: str, column) -> Dict[Optional[str], int]:
+    """Compacted scan counts grouped by a rollup column (device_type, city, ...)."""
+    result = await db.execute(
+        select(column, func.sum(ScanDailyRollup.scan_count))
+        .where(ScanDailyRollup.campaign_id == campaign_id)
+        .group_by(column)
+    )
+    return {row[0]: int(row[1]) for row in result.all()}
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from urllib.parse import quote
+from sqlalchemy import select, and_
+from ..models import Campaign
+from ..metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Same safe set Starlette's RedirectResponse uses for the Location header
+_URL_SAFE_CHARS = ":/%#?=@[]!$&'()*+,;"
+
+class CampaignRoutingTable:
+    """In-memory map of live campaign ids to their encoded redirect target.
+
+    Only active, non-archived campaigns are present, so a hit means the scan
+    can be redirected without touching the database. The table is loaded at
+    startup, patched in place by ``CampaignService`` whenever this worker
+    changes a campaign, and fully reloaded every ``refresh_interval`` seconds
+    to pick up changes made by other workers.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._routes: Dict[str, bytes] = {}
+        self.loaded = False
+        self.loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def lookup(self, campaign_id: str) -> Optional[bytes]:
+        location = self._routes.get(campaign_id)
+        record_cache_lookup("routing_table", location is not None)
+        return location
+
+    def sync(self, campaign: Campaign) -> None:
+        """Apply the current state of one campaign to the table."""
+        if campaign.active and not campaign.archived:
+            self._routes[campaign.campaign_id] = self._encode(campaign.target_url)
+        else:
+            self._routes.pop(campaign.campaign_id, None)
+
+    def remove(self, campaign_id: str) -> None:
+        self._routes.pop(campaign_id, None)
+
+    @staticmethod
+    def _encode(target_url: str) -> bytes:
+        return quote(str(target_url), safe=_URL_SAFE_CHARS).encode("latin-1")
+
+    async def load(self, session_factory) -> int:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(Campaign.campaign_id, Campaign.target_url).where(
+                    and_(Campaign.active == True, Campaign.archived == False)
+                )
+            )
+            routes = {row.campaign_id: self._encode(row.target_url) for row in result.all()}
+
+        # Swap the whole dict so lookups never see a half-built table
+        self._routes = routes
+        self.loaded = True
+        self.loaded_at = time.time()
+        return len(routes)
+
+    async def _refresh_loop(self, session_factory) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load(session_factory)
+            except Exception:
+                logger.exception("Routing table refresh failed, keeping previous table")
+
+    def start(self, session_factory) -> None:
+        if self._task is None and self.refresh_interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+routing_table = CampaignRoutingTable()
@@ -0,0 +1,85 @@
+import time
+from collections import deque
+from typing import Deque, Optional, Set
+from ..metrics import registry
+
+scans_deduplicated_total = registry.counter(
+    "scans_deduplicated_total", "Repeat hits within the dedup window that were not stored as scans"
+)
+scan_dedup_entries = registry.gauge("scan_dedup_entries", "Fingerprints held by the scan dedup window")
+
+class ScanDeduplicator:
+    """Drops repeat hits of one visitor on one campaign within a short window.
+
+    Link previewers, prefetching browsers and double taps turn one human
+    scan into two or three requests within a second. Each hit is reduced to
+    a 64-bit fingerprint of (campaign, IP, user agent) and looked up in a
+    ring of ``generations + 1`` hash sets, each covering ``window /
+    generations`` seconds; the oldest set is dropped as time moves on. A
+    fingerprint therefore suppresses repeats for at least ``window`` and at
+    most ``window * (1 + 1 / generations)`` seconds after its first hit,
+    and repeats do not extend it, so a visitor scanning again later is
+    counted again.
+
+    Memory is bounded by ``max_entries``: when the newest set fills up the
+    ring rotates early, which only shortens the window (more scans are
+    stored, none are wrongly dropped). Each worker keeps its own window;
+    repeats on one connection land on the same worker.
+    """
+
+    def __init__(self, window: float = 2.0, generations: int = 4, max_entries: int = 100_000):
+        self.window = window
+        self.generations = generations
+        self.max_entries = max_entries
+        self._sets: Deque[Set[int]] = deque([set()], maxlen=generations + 1)
+        self._rotated_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return sum(len(fingerprints) for fingerprints in self._sets)
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def _rotate(self, now: float, force: bool = False) -> None:
+        span = self.window / self.generations
+        steps = 1 if force else int((now - self._rotated_at) // span)
+        if self._sets.maxlen != self.generations + 1:
+            self._sets = deque(self._sets, maxlen=self.generations + 1)
+        if steps > self.generations:
+            self._sets.clear()
+            self._sets.append(set())
+        else:
+            for _ in range(steps):
+                self._sets.append(set())
+        self._rotated_at = now if force or steps > self.generations else self._rotated_at + steps * span
+        scan_dedup_entries.set(len(self))
+
+    def is_duplicate(
+        self,
+        campaign_id: str,
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+        now: Optional[float] = None
+    ) -> bool:
+        """Record a hit and report whether it repeats one still in the window."""
+        if self.window <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        if now - self._rotated_at >= self.window / self.generations:
+            self._rotate(now)
+        fingerprint = hash((campaign_id, ip_address, user_agent))
+        for fingerprints in self._sets:
+            if fingerprint in fingerprints:
+                scans_deduplicated_total.inc()
+                return True
+        if len(self._sets[-1]) >= self.max_entries // (self.generations + 1):
+            self._rotate(now, force=True)
+        self._sets[-1].add(fingerprint)
+        return False
+
+    def clear(self) -> None:
+        self._sets = deque([set()], maxlen=self.generations + 1)
+        self._rotated_at = time.monotonic()
+
+scan_dedup = ScanDeduplicator()
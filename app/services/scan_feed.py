@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select, union_all, tuple_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Scan
+from ..utils import is_valid_campaign_id
+
+MAX_CAMPAIGNS = 50
+MAX_PAGE_SIZE = 10_000
+
+Key = Tuple[datetime, str]
+
+def encode_cursor(timestamp: datetime, scan_id: str) -> str:
+    raw = f"{timestamp.isoformat()}|{scan_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Key:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, scan_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), scan_id
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+class ScanFeedService:
+    """Raw scans in ``(timestamp, id)`` order, resumable from an opaque cursor.
+
+    Every page is an index range scan that starts right after the previous
+    page's last key, so a sync costs time proportional to what is new and
+    never uses OFFSET. Several campaigns are read as one ``UNION ALL`` of
+    per-campaign ranges on ``ix_scans_campaign_timestamp_id``, each limited
+    to the page size, and merged; without a campaign filter the feed walks
+    ``ix_scans_timestamp_id``.
+
+    Only scans older than ``settle_seconds`` are returned, so rows still in
+    flight in the ingest path are not skipped by a cursor that has already
+    moved past their timestamp. Scans that arrive with older timestamps
+    than that (bulk uploads, long outage replays) are not re-delivered; a
+    sync that needs them re-reads a window with ``since``.
+    """
+
+    def __init__(self, db: AsyncSession, settle_seconds: float = 30.0):
+        self.db = db
+        self.settle_seconds = settle_seconds
+
+    @staticmethod
+    def start_key(cursor: Optional[str] = None, since: Optional[datetime] = None) -> Optional[Key]:
+        """Position to read after: the cursor, or just before ``since``; raises ValueError."""
+        if cursor:
+            return decode_cursor(cursor)
+        if since is not None:
+            # "" sorts before every id, so scans at exactly ``since`` are included
+            return since, ""
+        return None
+
+    @staticmethod
+    def validate(campaign_ids: Optional[Sequence[str]]) -> List[str]:
+        campaign_ids = list(dict.fromkeys(campaign_ids or []))
+        if len(campaign_ids) > MAX_CAMPAIGNS:
+            raise ValueError(f"Filter on at most {MAX_CAMPAIGNS} campaigns")
+        for campaign_id in campaign_ids:
+            if not is_valid_campaign_id(campaign_id):
+                raise ValueError(f"Invalid campaign_id: {campaign_id}")
+        return campaign_ids
+
+    def _range(self, query, after: Optional[Key], until: datetime, limit: int):
+        if after is not None:
+            query = query.where(tuple_(Scan.timestamp, Scan.id) > tuple_(
+                literal(after[0], Scan.timestamp.type), literal(after[1], Scan.id.type)
+            ))
+        return query.where(Scan.timestamp < until).order_by(Scan.timestamp, Scan.id).limit(limit)
+
+    async def fetch(self, campaign_ids: List[str], after: Optional[Key], limit: int) -> List[Any]:
+        until = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        columns = (
+            Scan.id, Scan.campaign_id, Scan.timestamp, Scan.anonymous_user_id,
+            Scan.device_type, Scan.city, Scan.country
+        )
+        if len(campaign_ids) <= 1:
+            query = select(*columns)
+            if campaign_ids:
+                query = query.where(Scan.campaign_id == campaign_ids[0])
+            result = await self.db.execute(self._range(query, after, until, limit))
+            return result.all()
+
+        ranges = [
+            self._range(select(*columns).where(Scan.campaign_id == campaign_id), after, until, limit).subquery()
+            for campaign_id in campaign_ids
+        ]
+        merged = union_all(*(select(*part.c) for part in ranges)).subquery()
+        result = await self.db.execute(
+            select(*merged.c).order_by(merged.c.timestamp, merged.c.id).limit(limit)
+        )
+        return result.all()
+
+    @staticmethod
+    def to_dict(row) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "campaign_id": row.campaign_id,
+            "timestamp": row.timestamp.isoformat(),
+            "anonymous_user_id": row.anonymous_user_id,
+            "device_type": row.device_type,
+            "city": row.city,
+            "country": row.country,
+        }
+
+    async def page(
+        self,
+        campaign_ids: Optional[Sequence[str]] = None,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: int = 1000
+    ) -> Dict[str, Any]:
+        """One page; ``next_cursor`` is where the next call (or poll) continues."""
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        campaign_ids = self.validate(campaign_ids)
+        after = self.start_key(cursor, since)
+        rows = await self.fetch(campaign_ids, after, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+        else:
+            next_cursor = cursor or (encode_cursor(*after) if after else None)
+        return {"scans": [self.to_dict(row) for row in rows], "next_cursor": next_cursor, "has_more": has_more}
+
+    async def stream(
+        self,
+        campaign_ids: List[str],
+        after: Optional[Key],
+        page_size: int = 1000,
+        max_rows: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """NDJSON lines up to the settle point, each carrying its own ``cursor``.
+
+        A client that loses the connection resumes from the last line it
+        received. Each page runs in its own short transaction.
+        """
+        sent = 0
+        while max_rows is None or sent < max_rows:
+            size = page_size if max_rows is None else min(page_size, max_rows - sent)
+            rows = await self.fetch(campaign_ids, after, size)
+            await self.db.rollback()
+            for row in rows:
+                line = self.to_dict(row)
+                line["cursor"] = encode_cursor(row.timestamp, row.id)
+                yield (json.dumps(line) + "\n").encode()
+            sent += len(rows)
+            if len(rows) < size:
+                return
+            after = (rows[-1].timestamp, rows[-1].id)
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import insert
+from ..models import Scan
+from ..metrics import registry, scans_recorded_total
+from ..utils import generate_anonymous_user_id, parse_device_type
+from .counters import record_scans
+from .hourly_counts import record_hourly_counts
+from .recent_scans import recent_scans
+from .visitor_identity import visitor_salts
+
+logger = logging.getLogger(__name__)
+
+scan_queue_depth = registry.gauge("scan_queue_depth", "Scan events waiting to be written")
+scans_dropped_total = registry.counter("scans_dropped_total", "Scan events dropped before reaching the database", ("reason",))
+scan_batch_size = registry.histogram(
+    "scan_batch_size", "Rows per batched scan insert", buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+
+class ScanEvent:
+    """A scan as seen at the edge, before it is turned into a row."""
+    __slots__ = ("campaign_id", "timestamp", "ip_address", "user_agent")
+
+    def __init__(
+        self,
+        campaign_id: str,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        timestamp: Optional[datetime] = None
+    ):
+        self.campaign_id = campaign_id
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.timestamp = timestamp or datetime.utcnow()
+
+def build_scan_row(event: ScanEvent, salt: Optional[bytes] = None) -> Dict[str, Any]:
+    """Derive the stored ``scans`` row from a raw event, hashed with ``salt`` or its period's salt."""
+    user_agent = event.user_agent or ""
+    return {
+        "campaign_id": event.campaign_id,
+        "anonymous_user_id": generate_anonymous_user_id(
+            event.ip_address or "unknown", user_agent or "unknown",
+            salt if salt is not None else visitor_salts.salt_for(event.timestamp)
+        ),
+        "timestamp": event.timestamp,
+        "ip_address": event.ip_address,
+        "city": None,
+        "country": None,
+        "device_type": parse_device_type(user_agent),
+        "user_agent_hash": user_agent[:64] if user_agent else None,
+    }
+
+async def write_scan_rows(db, rows: List[Dict[str, Any]]) -> None:
+    """Insert already-built scan rows in one statement and commit."""
+    if not rows:
+        return
+    await db.execute(insert(Scan), rows)
+    await record_scans(db, [row["timestamp"] for row in rows])
+    await record_hourly_counts(db, [(row["campaign_id"], row["timestamp"]) for row in rows])
+    await db.commit()
+    scans_recorded_total.inc(len(rows))
+    recent_scans.add_rows(rows)
+
+class ScanIngestor:
+    """Buffers scan events in memory and writes them in batches.
+
+    ``submit`` is synchronous and never touches the database, so the redirect
+    path only pays for an append. A single background task drains the buffer
+    into multi-row inserts. If the database is unavailable the current batch
+    is retried with backoff; once the buffer reaches ``max_queue`` new events
+    are dropped and counted rather than growing memory without bound.
+
+    With a ``spool`` (see ``scan_spool``) events are appended to it instead
+    and the writer replays them from disk, so an outage only grows the spool
+    and nothing buffered is lost on a crash or shutdown.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.25, max_queue: int = 100_000, spool=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.spool = spool
+        self._queue: Deque[ScanEvent] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._session_factory = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def submit(self, event: ScanEvent) -> bool:
+        if self.spool is not None:
+            if not self.spool.append(event):
+                scans_dropped_total.labels("spool_full").inc()
+                return False
+            return True
+        if len(self._queue) >= self.max_queue:
+            scans_dropped_total.labels("queue_full").inc()
+            return False
+        self._queue.append(event)
+        if self._wakeup is not None and len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _take_batch(self) -> List[ScanEvent]:
+        count = min(self.batch_size, len(self._queue))
+        return [self._queue.popleft() for _ in range(count)]
+
+    async def _write(self, events: List[ScanEvent]) -> None:
+        rows = [build_scan_row(event) for event in events]
+        async with self._session_factory() as db:
+            await write_scan_rows(db, rows)
+        scan_batch_size.observe(len(rows))
+
+    async def _replay(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            try:
+                written = await self.spool.replay(self._session_factory, self.batch_size)
+                backoff = self.flush_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The events stay in the spool and are read again
+                logger.exception("Scan spool replay failed, retrying")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            if written:
+                scan_batch_size.observe(written)
+            if written < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+
+    async def _run(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            scan_queue_depth.set(len(self._queue))
+            if not self._queue:
+                continue
+
+            batch = self._take_batch()
+            try:
+                await self._write(batch)
+                backoff = self.flush_interval
+            except asyncio.CancelledError:
+                self._queue.extendleft(reversed(batch))
+                raise
+            except Exception:
+                logger.exception("Scan batch write failed, retrying", extra={"batch_size": len(batch)})
+                # Put the batch back in front so ordering is preserved
+                self._queue.extendleft(reversed(batch))
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def start(self, session_factory) -> None:
+        if self._task is None:
+            self._session_factory = session_factory
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._replay() if self.spool is not None else self._run())
+
+    async def stop(self, flush_timeout: float = 10.0) -> None:
+        """Stop the writer and try to flush whatever is still buffered."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self.spool is not None:
+            # Whatever is not replayed now stays on disk for the next start
+            self.spool.rewind()
+            try:
+                await self.spool.flush()
+                async with asyncio.timeout(flush_timeout):
+                    while await self.spool.replay(self._session_factory, self.batch_size):
+                        pass
+            except Exception:
+                logger.warning("Scans left in the spool on shutdown", exc_info=True)
+            return
+
+        try:
+            async with asyncio.timeout(flush_timeout):
+                while self._queue:
+                    await self._write(self._take_batch())
+        except Exception:
+            logger.exception("Could not flush buffered scans on shutdown", extra={"pending": len(self._queue)})
+            scans_dropped_total.labels("shutdown").inc(len(self._queue))
+            self._queue.clear()
+
+scan_ingestor = ScanIngestor()
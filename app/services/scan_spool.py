@@ -0,0 +1,383 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from ..metrics import registry
+from .scan_ingest import ScanEvent, build_scan_row, write_scan_rows
+
+logger = logging.getLogger(__name__)
+
+scan_spool_segments = registry.gauge("scan_spool_segments", "Segment files in the local scan spool")
+scan_spool_corrupt_bytes_total = registry.counter(
+    "scan_spool_corrupt_bytes_total", "Damaged spool bytes skipped during replay"
+)
+scan_spool_fsync_seconds = registry.histogram(
+    "scan_spool_fsync_seconds", "Duration of spool group commits", buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+)
+
+MAGIC = b"SCN1"
+# magic, payload length, crc32 of the payload
+HEADER = struct.Struct("<4sII")
+# timestamp (microseconds since the epoch), then campaign id, IP and user agent byte lengths
+FIELDS = struct.Struct("<qBBH")
+MAX_USER_AGENT = 1024
+MIN_SEGMENT_SIZE = 64 * 1024
+EPOCH = datetime(1970, 1, 1)
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT = "checkpoint.json"
+
+Position = Tuple[int, int]
+
+def _truncate(value: Optional[str], limit: int) -> bytes:
+    # Cut on a character boundary so the record always decodes
+    return (value or "").encode()[:limit].decode("utf-8", "ignore").encode()
+
+def encode_event(event: ScanEvent) -> bytes:
+    campaign_id = _truncate(event.campaign_id, 255)
+    ip_address = _truncate(event.ip_address, 255)
+    user_agent = _truncate(event.user_agent, MAX_USER_AGENT)
+    micros = (event.timestamp - EPOCH) // timedelta(microseconds=1)
+    payload = FIELDS.pack(micros, len(campaign_id), len(ip_address), len(user_agent)) + campaign_id + ip_address + user_agent
+    return HEADER.pack(MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+def decode_event(payload: bytes) -> ScanEvent:
+    micros, campaign_length, ip_length, user_agent_length = FIELDS.unpack_from(payload)
+    offset = FIELDS.size
+    campaign_id = payload[offset:offset + campaign_length].decode()
+    offset += campaign_length
+    ip_address = payload[offset:offset + ip_length].decode()
+    offset += ip_length
+    user_agent = payload[offset:offset + user_agent_length].decode()
+    return ScanEvent(
+        campaign_id,
+        ip_address=ip_address or None,
+        user_agent=user_agent or None,
+        timestamp=EPOCH + timedelta(microseconds=micros)
+    )
+
+def next_record(buffer, offset: int, end: int) -> Optional[Tuple[int, bytes]]:
+    """First intact record starting in ``[offset, end)``: its offset and payload.
+
+    Anything that is not a complete record with a matching checksum (a torn
+    write, pages lost in a crash, zeroed space) is skipped by searching for
+    the next magic marker.
+    """
+    while 0 <= offset and offset + HEADER.size <= end:
+        magic, length, crc = HEADER.unpack_from(buffer, offset)
+        stop = offset + HEADER.size + length
+        if magic == MAGIC and stop <= end:
+            payload = buffer[offset + HEADER.size:stop]
+            if zlib.crc32(payload) == crc:
+                return offset, payload
+        offset = buffer.find(MAGIC, offset + 1, end)
+    return None
+
+class ScanSpool:
+    """Local append-only log of scan events in memory-mapped segment files.
+
+    Records are length-prefixed and checksummed and are copied into a
+    preallocated, mmap'ed segment, so ``append`` never blocks on the disk or
+    the database. A background task flushes dirty segments every
+    ``fsync_interval`` seconds (group commit); only flushed records are
+    handed to ``replay``, which writes them to ``scans`` in bulk and then
+    persists a checkpoint, after which fully replayed segments are deleted.
+    A crash therefore loses at most the last ``fsync_interval`` of scans to
+    an OS failure (none to a process crash) and replays at most one batch
+    twice.
+
+    Each worker process locks its own ``slot-NN`` directory under
+    ``directory``; a slot left behind by a dead worker is taken over, and
+    replayed, by the next process that starts.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        segment_size: int = 16 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        fsync_interval: float = 0.05,
+        slots: int = 64
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+        self.slots = slots
+        self.path: Optional[Path] = None
+        self._lock_file = None
+        self._segments: List[int] = []
+        self._active_seq = 0
+        self._active_file = None
+        self._active_map: Optional[mmap.mmap] = None
+        self._write_offset = 0
+        self._dirty = False
+        self._new_files = False
+        self._sealed: List[Tuple[Any, mmap.mmap]] = []
+        self._durable: Position = (0, 0)
+        self._checkpoint: Position = (0, 0)
+        self._read_position: Position = (0, 0)
+        self._reader: Optional[Tuple[int, Any, mmap.mmap]] = None
+        self._flushing: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._active_map is not None
+
+    def open(self, slot: Optional[int] = None) -> Dict[str, Any]:
+        """Lock a slot, recover its segments and position the reader at the checkpoint.
+
+        Raises BlockingIOError when ``slot`` (or, with no slot, every slot) is in use.
+        """
+        import fcntl
+
+        self.segment_size = max(self.segment_size, MIN_SEGMENT_SIZE)
+        root = Path(self.directory)
+        for candidate in ([slot] if slot is not None else range(self.slots)):
+            path = root / f"slot-{candidate:02d}"
+            path.mkdir(parents=True, exist_ok=True)
+            lock_file = open(path / "lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            self.path, self._lock_file = path, lock_file
+            break
+        else:
+            raise BlockingIOError(f"No free scan spool slot under {root}")
+
+        checkpoint_path = self.path / CHECKPOINT
+        if checkpoint_path.exists():
+            saved = json.loads(checkpoint_path.read_text())
+            self._checkpoint = (saved["segment"], saved["offset"])
+        segments = sorted(int(name.stem) for name in self.path.glob(f"*{SEGMENT_SUFFIX}"))
+        for seq in segments:
+            if seq < self._checkpoint[0]:
+                self._segment_path(seq).unlink()
+        self._segments = [seq for seq in segments if seq >= self._checkpoint[0]]
+
+        if self._segments:
+            self._active_seq = self._segments[-1]
+            self._active_file = open(self._segment_path(self._active_seq), "r+b")
+            self._active_file.truncate(max(os.fstat(self._active_file.fileno()).st_size, self.segment_size))
+            self._active_map = mmap.mmap(self._active_file.fileno(), 0)
+            # Append after the last intact record; damage before it is skipped on replay
+            offset, position = 0, None
+            while True:
+                found = next_record(self._active_map, offset, len(self._active_map))
+                if found is None:
+                    break
+                position, payload = found
+                offset = position + HEADER.size + len(payload)
+            self._write_offset = offset if position is not None else 0
+            if self._checkpoint[0] == self._active_seq:
+                self._write_offset = max(self._write_offset, self._checkpoint[1])
+        else:
+            self._active_seq = self._checkpoint[0]
+            self._create_segment(self._active_seq)
+        if self._checkpoint[0] < self._segments[0]:
+            self._checkpoint = (self._segments[0], 0)
+        self._durable = (self._active_seq, self._write_offset)
+        self._read_position = self._checkpoint
+        scan_spool_segments.set(len(self._segments))
+        return {
+            "path": str(self.path),
+            "segments": len(self._segments),
+            "checkpoint": self._checkpoint,
+            "end": self._durable,
+        }
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.path / f"{seq:016d}{SEGMENT_SUFFIX}"
+
+    def _create_segment(self, seq: int) -> None:
+        # Sparse preallocation: the file never grows while it is mapped
+        segment = open(self._segment_path(seq), "w+b")
+        segment.truncate(self.segment_size)
+        self._active_file = segment
+        self._active_map = mmap.mmap(segment.fileno(), self.segment_size)
+        self._active_seq, self._write_offset = seq, 0
+        self._segments.append(seq)
+        self._new_files = True
+        scan_spool_segments.set(len(self._segments))
+
+    def append(self, event: ScanEvent) -> bool:
+        """Copy one event into the active segment; False when the spool is full."""
+        record = encode_event(event)
+        if self._write_offset + len(record) > len(self._active_map):
+            if (len(self._segments) + 1) * self.segment_size > self.max_bytes:
+                return False
+            self._sealed.append((self._active_file, self._active_map))
+            self._create_segment(self._active_seq + 1)
+        self._active_map[self._write_offset:self._write_offset + len(record)] = record
+        self._write_offset += len(record)
+        self._dirty = True
+        return True
+
+    def _sync(self, sealed: List[Tuple[Any, mmap.mmap]], active: mmap.mmap, new_files: bool) -> None:
+        for segment, mapped in sealed:
+            mapped.flush()
+            mapped.close()
+            segment.close()
+        active.flush()
+        if new_files:
+            directory = os.open(self.path, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    async def flush(self) -> None:
+        """Group commit: make everything appended so far durable and visible to ``replay``."""
+        if self._flushing is not None:
+            await asyncio.shield(self._flushing)
+        if not (self._dirty or self._sealed or self._new_files):
+            return
+        sealed, self._sealed = self._sealed, []
+        position = (self._active_seq, self._write_offset)
+        new_files, self._new_files = self._new_files, False
+        self._dirty = False
+        started = time.perf_counter()
+
+        def finished(future: asyncio.Future) -> None:
+            if future.cancelled() or future.exception() is not None:
+                self._dirty = True
+                return
+            self._durable = max(self._durable, position)
+            scan_spool_fsync_seconds.observe(time.perf_counter() - started)
+
+        self._flushing = asyncio.ensure_future(asyncio.to_thread(self._sync, sealed, self._active_map, new_files))
+        self._flushing.add_done_callback(finished)
+        # Shielded so a cancelled caller never closes a map that is still being flushed
+        await asyncio.shield(self._flushing)
+
+    def _buffer(self, seq: int):
+        if seq == self._active_seq:
+            return self._active_map
+        if self._reader is None or self._reader[0] != seq:
+            self._close_reader()
+            segment = open(self._segment_path(seq), "rb")
+            self._reader = (seq, segment, mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ))
+        return self._reader[2]
+
+    def _close_reader(self) -> None:
+        if self._reader is not None:
+            self._reader[2].close()
+            self._reader[1].close()
+            self._reader = None
+
+    def read(self, limit: int) -> Tuple[List[ScanEvent], Position]:
+        """Up to ``limit`` durable events after the read position, and the position after them."""
+        events: List[ScanEvent] = []
+        seq, offset = self._read_position
+        while len(events) < limit and (seq, offset) < self._durable:
+            buffer = self._buffer(seq)
+            end = self._durable[1] if seq == self._durable[0] else len(buffer)
+            found = next_record(buffer, offset, end)
+            if found is None:
+                if seq == self._durable[0]:
+                    offset = end
+                    break
+                seq, offset = self._segments[self._segments.index(seq) + 1], 0
+                continue
+            start, payload = found
+            if start > offset:
+                scan_spool_corrupt_bytes_total.inc(start - offset)
+                logger.warning("Skipped damaged scan spool bytes", extra={
+                    "segment": seq, "offset": offset, "bytes": start - offset
+                })
+            offset = start + HEADER.size + len(payload)
+            try:
+                events.append(decode_event(payload))
+            except (UnicodeDecodeError, struct.error):
+                logger.warning("Skipped undecodable scan spool record", extra={"segment": seq, "offset": start})
+        self._read_position = (seq, offset)
+        return events, self._read_position
+
+    def rewind(self) -> None:
+        """Forget uncommitted reads, so they are returned again."""
+        self._read_position = self._checkpoint
+
+    def _save_checkpoint(self, position: Position, consumed: List[int]) -> None:
+        temporary = self.path / f"{CHECKPOINT}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump({"segment": position[0], "offset": position[1]}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.path / CHECKPOINT)
+        for seq in consumed:
+            self._segment_path(seq).unlink(missing_ok=True)
+
+    async def commit(self, position: Position) -> None:
+        """Persist ``position`` as replayed and delete the segments before it."""
+        if position <= self._checkpoint:
+            return
+        consumed = [seq for seq in self._segments if seq < position[0]]
+        self._segments = [seq for seq in self._segments if seq >= position[0]]
+        if self._reader is not None and self._reader[0] < position[0]:
+            self._close_reader()
+        await asyncio.to_thread(self._save_checkpoint, position, consumed)
+        self._checkpoint = position
+        scan_spool_segments.set(len(self._segments))
+
+    async def replay(self, session_factory, limit: int = 500) -> int:
+        """Write the next batch of durable events to ``scans`` and checkpoint past them."""
+        events, position = self.read(limit)
+        try:
+            if events:
+                rows = [build_scan_row(event) for event in events]
+                async with session_factory() as db:
+                    await write_scan_rows(db, rows)
+            await self.commit(position)
+        except BaseException:
+            self.rewind()
+            raise
+        return len(events)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scan spool flush failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the flusher, make everything durable and release the slot."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_open:
+            await self.flush()
+            self.close()
+
+    def close(self) -> None:
+        self._close_reader()
+        for segment, mapped in self._sealed + [(self._active_file, self._active_map)]:
+            mapped.flush()
+            mapped.close()
+            segment.close()
+        self._sealed, self._active_map, self._active_file = [], None, None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+scan_spool = ScanSpool()
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select, insert, and_, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Scan, CampaignKey, City, CompactScan
+from ..utils import encode_device, encode_visitor_id, country_code
+from .checkpoints import load_checkpoint, save_checkpoint
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "scans_compact"
+
+class CompactScanConverter:
+    """Copies ``scans`` into ``scans_compact`` in bounded, resumable batches.
+
+    Rows are read in ``(created_at, id)`` keyset order and each batch commits
+    together with its checkpoint, so the job can be stopped at any point and
+    re-run to continue where it left off, or run periodically to pick up new
+    scans. Rows younger than ``settle_seconds`` are left for the next run
+    because scans with the same ``created_at`` may still be in flight.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        batch_size: int = 5000,
+        pause: float = 0.0,
+        settle_seconds: float = 60.0
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.pause = pause
+        self.settle_seconds = settle_seconds
+        self._campaign_keys: Dict[str, int] = {}
+        self._cities: Dict[Tuple[str, str], int] = {}
+
+    async def run(self, max_rows: Optional[int] = None) -> Dict[str, Any]:
+        position = await load_checkpoint(self.db, CHECKPOINT_NAME)
+        cutoff = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        converted = batches = 0
+        started = time.perf_counter()
+
+        while max_rows is None or converted < max_rows:
+            limit = self.batch_size if max_rows is None else min(self.batch_size, max_rows - converted)
+            count, position = await self._convert_batch(position, cutoff, limit)
+            if not count:
+                break
+            converted += count
+            batches += 1
+            if self.pause:
+                # Leave room for live traffic between batches
+                await asyncio.sleep(self.pause)
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "rows": converted,
+            "batches": batches,
+            "elapsed_s": round(elapsed, 2),
+            "rows_per_second": round(converted / elapsed, 1) if elapsed > 0 else 0.0,
+            "position": position,
+        }
+        logger.info("Compact scan conversion finished", extra=summary)
+        return summary
+
+    async def _convert_batch(
+        self,
+        position: Optional[Dict[str, Any]],
+        cutoff: datetime,
+        limit: int
+    ) -> Tuple[int, Optional[Dict[str, Any]]]:
+        query = select(
+            Scan.id, Scan.campaign_id, Scan.anonymous_user_id, Scan.timestamp,
+            Scan.created_at, Scan.city, Scan.country, Scan.device_type
+        ).where(Scan.created_at < cutoff)
+        if position:
+            after = datetime.fromisoformat(position["created_at"])
+            query = query.where(or_(
+                Scan.created_at > after,
+                and_(Scan.created_at == after, Scan.id > position["id"])
+            ))
+        rows = (await self.db.execute(query.order_by(Scan.created_at, Scan.id).limit(limit))).all()
+        if not rows:
+            return 0, position
+
+        campaign_keys = await self._resolve_campaign_keys({row.campaign_id for row in rows})
+        cities = await self._resolve_cities(
+            {(row.city, country_code(row.country) or "") for row in rows if row.city}
+        )
+
+        compact_rows = []
+        for row in rows:
+            code = country_code(row.country)
+            compact_rows.append({
+                "occurred_at": row.timestamp or row.created_at,
+                "campaign_key": campaign_keys[row.campaign_id],
+                "city_id": cities[(row.city, code or "")] if row.city else None,
+                "device": encode_device(row.device_type),
+                "country_code": code,
+                "visitor_id": encode_visitor_id(row.anonymous_user_id),
+            })
+        await self.db.execute(insert(CompactScan), compact_rows)
+
+        last = rows[-1]
+        position = {"created_at": last.created_at.isoformat(), "id": last.id}
+        await save_checkpoint(self.db, CHECKPOINT_NAME, position, len(rows))
+        await self.db.commit()
+        return len(rows), position
+
+    async def _resolve_campaign_keys(self, campaign_ids: Iterable[str]) -> Dict[str, int]:
+        missing = [campaign_id for campaign_id in campaign_ids if campaign_id not in self._campaign_keys]
+        if missing:
+            await self._load_campaign_keys(missing)
+            new = [campaign_id for campaign_id in missing if campaign_id not in self._campaign_keys]
+            if new:
+                await self.db.execute(insert(CampaignKey), [{"campaign_id": campaign_id} for campaign_id in new])
+                await self._load_campaign_keys(new)
+        return self._campaign_keys
+
+    async def _load_campaign_keys(self, campaign_ids: List[str]) -> None:
+        result = await self.db.execute(
+            select(CampaignKey.campaign_id, CampaignKey.key).where(CampaignKey.campaign_id.in_(campaign_ids))
+        )
+        self._campaign_keys.update(dict(result.all()))
+
+    async def _resolve_cities(self, places: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        missing = [place for place in places if place not in self._cities]
+        if missing:
+            await self._load_cities({name for name, _ in missing})
+            new = [place for place in missing if place not in self._cities]
+            if new:
+                await self.db.execute(insert(City), [{"name": name, "country_code": code} for name, code in new])
+                await self._load_cities({name for name, _ in new})
+        return self._cities
+
+    async def _load_cities(self, names: Iterable[str]) -> None:
+        result = await self.db.execute(
+            select(City.id, City.name, City.country_code).where(City.name.in_(list(names)))
+        )
+        for row in result.all():
+            self._cities[(row.name, row.country_code)] = row.id
+
+STORAGE_REPORT_TABLES = ("scans", "scans_compact", "cities", "campaign_keys")
+
+async def storage_report(db: AsyncSession, tables: Sequence[str] = STORAGE_REPORT_TABLES) -> Dict[str, Any]:
+    """On-disk size of each table and its indexes, plus bytes per row.
+
+    Uses ``pg_relation_size`` on Postgres (row counts are the planner's
+    estimate there, to avoid a full count) and the ``dbstat`` virtual table
+    on SQLite.
+    """
+    dialect = db.bind.dialect.name
+    report: Dict[str, Any] = {}
+
+    for table in tables:
+        if dialect == "postgresql":
+            sizes = (await db.execute(text(
+                "SELECT pg_relation_size(c.oid) AS table_bytes, "
+                "pg_total_relation_size(c.oid) - pg_relation_size(c.oid) - pg_indexes_size(c.oid) AS toast_bytes, "
+                "c.reltuples::bigint AS rows "
+                "FROM pg_class c WHERE c.oid = to_regclass(:table)"
+            ), {"table": table})).first()
+            if sizes is None:
+                continue
+            indexes = dict((await db.execute(text(
+                "SELECT indexrelname, pg_relation_size(indexrelid) FROM pg_stat_user_indexes WHERE relname = :table"
+            ), {"table": table})).all())
+            table_bytes = sizes.table_bytes + sizes.toast_bytes
+            rows = max(sizes.rows, 0)
+        elif dialect == "sqlite":
+            pages = dict((await db.execute(text(
+                "SELECT d.name, SUM(d.pgsize) FROM dbstat d "
+                "JOIN sqlite_master m ON m.name = d.name "
+                "WHERE m.tbl_name = :table GROUP BY d.name"
+            ), {"table": table})).all())
+            if table not in pages:
+                continue
+            table_bytes = pages.pop(table)
+            indexes = pages
+            rows = (await db.execute(text(f'SELECT COUNT(*) FROM "{table}"'))).scalar()
+        else:
+            raise RuntimeError(f"Storage report is not supported on {dialect}")
+
+        index_bytes = sum(indexes.values())
+        report[table] = {
+            "rows": rows,
+            "table_bytes": table_bytes,
+            "index_bytes": index_bytes,
+            "indexes": indexes,
+            "bytes_per_row": round(table_bytes / rows, 1) if rows else None,
+            "total_bytes_per_row": round((table_bytes + index_bytes) / rows, 1) if rows else None,
+        }
+
+    # Compact rows also pay for their dictionaries
+    if "scans" in report and "scans_compact" in report:
+        wide = report["scans"]
+        compact_total = sum(
+            report[name]["table_bytes"] + report[name]["index_bytes"]
+            for name in ("scans_compact", "cities", "campaign_keys") if name in report
+        )
+        compact_rows = report["scans_compact"]["rows"]
+        report["summary"] = {
+            "scans_total_bytes": wide["table_bytes"] + wide["index_bytes"],
+            "compact_total_bytes": compact_total,
+            "compact_total_bytes_per_row": round(compact_total / compact_rows, 1) if compact_rows else None,
+            "ratio": round(compact_total / (wide["table_bytes"] + wide["index_bytes"]), 3)
+                if compact_rows and wide["rows"] else None,
+        }
+    return report
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import secrets
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from ..models import VisitorSalt
+
+logger = logging.getLogger(__name__)
+
+ROTATIONS = ("day", "week", "month")
+
+def period_bounds(moment: datetime, rotation: str) -> Tuple[str, datetime, datetime]:
+    """Key and naive UTC ``[start, end)`` of the salt period containing ``moment``."""
+    day = moment.date()
+    if rotation == "day":
+        start = day
+        end = day + timedelta(days=1)
+        key = day.isoformat()
+    elif rotation == "week":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=7)
+        year, week, _ = start.isocalendar()
+        key = f"{year}-W{week:02d}"
+    elif rotation == "month":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        key = start.strftime("%Y-%m")
+    else:
+        raise ValueError(f"rotation must be one of {', '.join(ROTATIONS)}")
+    return key, datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+
+class VisitorSaltStore:
+    """Random salts for anonymous visitor ids, one per rotation period.
+
+    Salts live in ``visitor_salts`` so every worker hashes a visitor to the
+    same id, and are cached here so the scan write path never queries for
+    them. The current and the next period's salts are created ahead of
+    time; salts are deleted once ``keep_periods`` later periods have begun
+    (leaving room for late events), after which ids from that period can
+    no longer be linked back to an IP and user agent by anyone. Bulk
+    uploads may backfill ``backfill_days``, so every period overlapping
+    that window has a salt too, created if need be and kept until the
+    window has moved past it.
+    """
+
+    def __init__(
+        self,
+        rotation: str = "week",
+        refresh_interval: float = 300.0,
+        keep_periods: int = 1,
+        backfill_days: int = 0
+    ):
+        self.rotation = rotation
+        self.refresh_interval = refresh_interval
+        self.keep_periods = keep_periods
+        self.backfill_days = backfill_days
+        self._salts: Dict[str, bytes] = {}
+        self._local_salts: Dict[str, bytes] = {}
+        self._periods: Dict[date, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _period_key(self, moment: datetime) -> str:
+        key = self._periods.get(moment.date())
+        if key is None:
+            if len(self._periods) > 1024:
+                self._periods.clear()
+            key = self._periods[moment.date()] = period_bounds(moment, self.rotation)[0]
+        return key
+
+    def shared_salt(self, moment: datetime) -> Optional[bytes]:
+        """The salt every worker uses for ``moment``'s period, or None if it is not loaded or expired."""
+        return self._salts.get(self._period_key(moment))
+
+    def salt_for(self, moment: datetime) -> bytes:
+        key = self._period_key(moment)
+        salt = self._salts.get(key) or self._local_salts.get(key)
+        if salt is None:
+            # Not loaded (or long expired): a process-local salt still keeps ids
+            # unlinkable, it only splits visitors across workers for that period
+            salt = self._local_salts[key] = secrets.token_bytes(32)
+            logger.warning("No shared visitor salt loaded, using a local one", extra={"period": key})
+        return salt
+
+    async def load(self, session_factory, now: Optional[datetime] = None) -> int:
+        """Ensure salts from the backfill window to the next period exist, cache them and drop expired ones."""
+        now = now or datetime.utcnow()
+        _, start, end = period_bounds(now, self.rotation)
+        _, first, _ = period_bounds(now - timedelta(days=self.backfill_days), self.rotation)
+        oldest = start
+        for _ in range(self.keep_periods):
+            _, oldest, _ = period_bounds(oldest - timedelta(days=1), self.rotation)
+        oldest = min(oldest, first)
+
+        # Every period from the start of the backfill window up to and including the next one
+        periods = []
+        moment = first
+        while moment <= end:
+            period, period_start, moment = period_bounds(moment, self.rotation)
+            periods.append((period, period_start))
+
+        self._periods.clear()
+        async with session_factory() as db:
+            await db.execute(delete(VisitorSalt).where(VisitorSalt.starts_at < oldest))
+            await db.commit()
+            for period, period_start in periods:
+                exists = (await db.execute(select(VisitorSalt.period).where(VisitorSalt.period == period))).scalar()
+                if exists is None:
+                    db.add(VisitorSalt(period=period, salt=secrets.token_hex(32), starts_at=period_start))
+                    try:
+                        await db.commit()
+                    except IntegrityError:
+                        # Another worker created it first; use theirs
+                        await db.rollback()
+            result = await db.execute(select(VisitorSalt.period, VisitorSalt.salt))
+            self._salts = {period: bytes.fromhex(salt) for period, salt in result.all()}
+            self._local_salts = {}
+        return len(self._salts)
+
+    async def _loop(self, session_factory) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load(session_factory)
+            except Exception:
+                logger.exception("Visitor salt refresh failed")
+
+    def start(self, session_factory) -> None:
+        if self._task is None and self.refresh_interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._loop(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+visitor_salts = VisitorSaltStore()
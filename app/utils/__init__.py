@@ -6,10 +6,15 @@ from .helpers import (
     parse_device_type, get_city_from_ip, get_country_from_ip,
     is_valid_campaign_id, sanitize_url
 )
+from .encoding import encode_device, decode_device, encode_visitor_id, decode_visitor_id
+from .countries import country_code, country_name
+from .timezones import get_zone, is_valid_timezone
 
 __all__ = [
     "verify_password", "get_password_hash", "generate_campaign_id",
     "generate_anonymous_user_id", "create_access_token", "verify_token", "hash_user_agent",
     "parse_device_type", "get_city_from_ip", "get_country_from_ip",
-    "is_valid_campaign_id", "sanitize_url"
+    "is_valid_campaign_id", "sanitize_url",
+    "encode_device", "decode_device", "encode_visitor_id", "decode_visitor_id",
+    "country_code", "country_name", "get_zone", "is_valid_timezone"
 ]
\ No newline at end of file
@@ -0,0 +1,93 @@
+from typing import Dict, Optional
+
+# ISO 3166-1 alpha-2 codes keyed by the English short names ip-api.com returns
+COUNTRY_CODES: Dict[str, str] = {
+    "Afghanistan": "AF", "Åland": "AX", "Albania": "AL", "Algeria": "DZ",
+    "American Samoa": "AS", "Andorra": "AD", "Angola": "AO", "Anguilla": "AI",
+    "Antarctica": "AQ", "Antigua and Barbuda": "AG", "Argentina": "AR", "Armenia": "AM",
+    "Aruba": "AW", "Australia": "AU", "Austria": "AT", "Azerbaijan": "AZ",
+    "Bahamas": "BS", "Bahrain": "BH", "Bangladesh": "BD", "Barbados": "BB",
+    "Belarus": "BY", "Belgium": "BE", "Belize": "BZ", "Benin": "BJ",
+    "Bermuda": "BM", "Bhutan": "BT", "Bolivia": "BO", "Bonaire, Sint Eustatius, and Saba": "BQ",
+    "Bosnia and Herzegovina": "BA", "Botswana": "BW", "Bouvet Island": "BV", "Brazil": "BR",
+    "British Indian Ocean Territory": "IO", "British Virgin Islands": "VG", "Brunei": "BN", "Bulgaria": "BG",
+    "Burkina Faso": "BF", "Burundi": "BI", "Cabo Verde": "CV", "Cambodia": "KH",
+    "Cameroon": "CM", "Canada": "CA", "Cayman Islands": "KY", "Central African Republic": "CF",
+    "Chad": "TD", "Chile": "CL", "China": "CN", "Christmas Island": "CX",
+    "Cocos [Keeling] Islands": "CC", "Colombia": "CO", "Comoros": "KM", "Congo Republic": "CG",
+    "Cook Islands": "CK", "Costa Rica": "CR", "Croatia": "HR", "Cuba": "CU",
+    "Curaçao": "CW", "Cyprus": "CY", "Czechia": "CZ", "DR Congo": "CD",
+    "Denmark": "DK", "Djibouti": "DJ", "Dominica": "DM", "Dominican Republic": "DO",
+    "East Timor": "TL", "Ecuador": "EC", "Egypt": "EG", "El Salvador": "SV",
+    "Equatorial Guinea": "GQ", "Eritrea": "ER", "Estonia": "EE", "Eswatini": "SZ",
+    "Ethiopia": "ET", "Falkland Islands": "FK", "Faroe Islands": "FO", "Fiji": "FJ",
+    "Finland": "FI", "France": "FR", "French Guiana": "GF", "French Polynesia": "PF",
+    "French Southern Territories": "TF", "Gabon": "GA", "Gambia": "GM", "Georgia": "GE",
+    "Germany": "DE", "Ghana": "GH", "Gibraltar": "GI", "Greece": "GR",
+    "Greenland": "GL", "Grenada": "GD", "Guadeloupe": "GP", "Guam": "GU",
+    "Guatemala": "GT", "Guernsey": "GG", "Guinea": "GN", "Guinea-Bissau": "GW",
+    "Guyana": "GY", "Haiti": "HT", "Heard Island and McDonald Islands": "HM", "Honduras": "HN",
+    "Hong Kong": "HK", "Hungary": "HU", "Iceland": "IS", "India": "IN",
+    "Indonesia": "ID", "Iran": "IR", "Iraq": "IQ", "Ireland": "IE",
+    "Isle of Man": "IM", "Israel": "IL", "Italy": "IT", "Ivory Coast": "CI",
+    "Jamaica": "JM", "Japan": "JP", "Jersey": "JE", "Jordan": "JO",
+    "Kazakhstan": "KZ", "Kenya": "KE", "Kiribati": "KI", "Kosovo": "XK",
+    "Kuwait": "KW", "Kyrgyzstan": "KG", "Laos": "LA", "Latvia": "LV",
+    "Lebanon": "LB", "Lesotho": "LS", "Liberia": "LR", "Libya": "LY",
+    "Liechtenstein": "LI", "Lithuania": "LT", "Luxembourg": "LU", "Macao": "MO",
+    "Madagascar": "MG", "Malawi": "MW", "Malaysia": "MY", "Maldives": "MV",
+    "Mali": "ML", "Malta": "MT", "Marshall Islands": "MH", "Martinique": "MQ",
+    "Mauritania": "MR", "Mauritius": "MU", "Mayotte": "YT", "Mexico": "MX",
+    "Federated States of Micronesia": "FM", "Moldova": "MD", "Monaco": "MC", "Mongolia": "MN",
+    "Montenegro": "ME", "Montserrat": "MS", "Morocco": "MA", "Mozambique": "MZ",
+    "Myanmar": "MM", "Namibia": "NA", "Nauru": "NR", "Nepal": "NP",
+    "Netherlands": "NL", "New Caledonia": "NC", "New Zealand": "NZ", "Nicaragua": "NI",
+    "Niger": "NE", "Nigeria": "NG", "Niue": "NU", "Norfolk Island": "NF",
+    "North Korea": "KP", "North Macedonia": "MK", "Northern Mariana Islands": "MP", "Norway": "NO",
+    "Oman": "OM", "Pakistan": "PK", "Palau": "PW", "Palestine": "PS",
+    "Panama": "PA", "Papua New Guinea": "PG", "Paraguay": "PY", "Peru": "PE",
+    "Philippines": "PH", "Pitcairn Islands": "PN", "Poland": "PL", "Portugal": "PT",
+    "Puerto Rico": "PR", "Qatar": "QA", "Réunion": "RE", "Romania": "RO",
+    "Russia": "RU", "Rwanda": "RW", "Saint Barthélemy": "BL", "Saint Helena": "SH",
+    "St Kitts and Nevis": "KN", "Saint Lucia": "LC", "Saint Martin": "MF", "Saint Pierre and Miquelon": "PM",
+    "St Vincent and Grenadines": "VC", "Samoa": "WS", "San Marino": "SM", "São Tomé and Príncipe": "ST",
+    "Saudi Arabia": "SA", "Senegal": "SN", "Serbia": "RS", "Seychelles": "SC",
+    "Sierra Leone": "SL", "Singapore": "SG", "Sint Maarten": "SX", "Slovakia": "SK",
+    "Slovenia": "SI", "Solomon Islands": "SB", "Somalia": "SO", "South Africa": "ZA",
+    "South Georgia and the South Sandwich Islands": "GS", "South Korea": "KR", "South Sudan": "SS", "Spain": "ES",
+    "Sri Lanka": "LK", "Sudan": "SD", "Suriname": "SR", "Svalbard and Jan Mayen": "SJ",
+    "Sweden": "SE", "Switzerland": "CH", "Syria": "SY", "Taiwan": "TW",
+    "Tajikistan": "TJ", "Tanzania": "TZ", "Thailand": "TH", "Togo": "TG",
+    "Tokelau": "TK", "Tonga": "TO", "Trinidad and Tobago": "TT", "Tunisia": "TN",
+    "Turkey": "TR", "Turkmenistan": "TM", "Turks and Caicos Islands": "TC", "Tuvalu": "TV",
+    "U.S. Minor Outlying Islands": "UM", "U.S. Virgin Islands": "VI", "Uganda": "UG", "Ukraine": "UA",
+    "United Arab Emirates": "AE", "United Kingdom": "GB", "United States": "US", "Uruguay": "UY",
+    "Uzbekistan": "UZ", "Vanuatu": "VU", "Vatican City": "VA", "Venezuela": "VE",
+    "Vietnam": "VN", "Wallis and Futuna": "WF", "Western Sahara": "EH", "Yemen": "YE",
+    "Zambia": "ZM", "Zimbabwe": "ZW",
+}
+
+# Other spellings seen in older rows
+_ALIASES: Dict[str, str] = {
+    "usa": "US", "united states of america": "US", "uk": "GB", "great britain": "GB",
+    "czech republic": "CZ", "türkiye": "TR", "russian federation": "RU", "korea": "KR",
+    "republic of korea": "KR", "viet nam": "VN", "macedonia": "MK", "swaziland": "SZ",
+    "cape verde": "CV", "côte d'ivoire": "CI", "timor-leste": "TL", "holy see": "VA",
+    "republic of the congo": "CG", "democratic republic of the congo": "CD", "macau": "MO",
+}
+
+_BY_NAME: Dict[str, str] = {name.lower(): code for name, code in COUNTRY_CODES.items()}
+_BY_NAME.update(_ALIASES)
+_BY_CODE: Dict[str, str] = {code: name for name, code in COUNTRY_CODES.items()}
+
+def country_code(name: Optional[str]) -> Optional[str]:
+    """ISO 3166-1 alpha-2 code for a country name (or code), None if unknown."""
+    if not name:
+        return None
+    name = name.strip()
+    if len(name) == 2 and name.upper() in _BY_CODE:
+        return name.upper()
+    return _BY_NAME.get(name.lower())
+
+def country_name(code: Optional[str]) -> Optional[str]:
+    return _BY_CODE.get(code) if code else None
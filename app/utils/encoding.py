@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+
+# Small-int codes stored in scans_compact.device; append only, never reorder
+DEVICE_TYPES = ("unknown", "mobile", "desktop", "tablet")
+_DEVICE_CODES = {name: code for code, name in enumerate(DEVICE_TYPES)}
+
+VISITOR_ID_BYTES = 8
+
+def encode_device(device_type: Optional[str]) -> int:
+    return _DEVICE_CODES.get(device_type or "unknown", 0)
+
+def decode_device(code: Optional[int]) -> str:
+    if code is None or not 0 <= code < len(DEVICE_TYPES):
+        return "unknown"
+    return DEVICE_TYPES[code]
+
+def encode_visitor_id(anonymous_user_id: str) -> bytes:
+    """Pack the 16 hex chars of an anonymous user id into 8 bytes.
+
+    Ids that are not in that format are hashed down to the same width.
+    """
+    try:
+        raw = bytes.fromhex(anonymous_user_id)
+    except ValueError:
+        raw = b""
+    if len(raw) != VISITOR_ID_BYTES:
+        raw = hashlib.sha256(anonymous_user_id.encode()).digest()[:VISITOR_ID_BYTES]
+    return raw
+
+def decode_visitor_id(visitor_id: bytes) -> str:
+    return visitor_id.hex()
@@ -1,13 +1,18 @@
 import re
-import asyncio
-import aiohttp
+from functools import lru_cache
 from typing import Optional
-from user_agents import parse
 
+_CAMPAIGN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{14}$')
+
+# The same handful of user agents show up over and over, and parsing one
+# runs dozens of regexes, so results are memoized
+@lru_cache(maxsize=4096)
 def parse_device_type(user_agent: str) -> str:
     if not user_agent:
         return "unknown"
     
+    # Deferred: loading the user_agents regex tables is a large share of import time
+    from user_agents import parse
     user_agent_obj = parse(user_agent)
     
     if user_agent_obj.is_mobile:
@@ -24,6 +29,7 @@ async def get_city_from_ip(ip_address: str) -> Optional[str]:
         return None
         
     try:
+        import aiohttp
         async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
             async with session.get(f"http://ip-api.com/json/{ip_address}") as response:
                 if response.status == 200:
@@ -40,6 +46,7 @@ async def get_country_from_ip(ip_address: str) -> Optional[str]:
         return None
         
     try:
+        import aiohttp
         async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
             async with session.get(f"http://ip-api.com/json/{ip_address}") as response:
                 if response.status == 200:
@@ -61,7 +68,7 @@ def get_country_from_ip_sync(ip_address: str) -> Optional[str]:
     return None
 
 def is_valid_campaign_id(campaign_id: str) -> bool:
-    return bool(re.match(r'^[A-Za-z0-9_-]{14}$', campaign_id))
+    return bool(_CAMPAIGN_ID_PATTERN.match(campaign_id))
 
 def sanitize_url(url: str) -> str:
     if not url.startswith(('http://', 'https://')):
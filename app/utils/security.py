@@ -1,5 +1,6 @@
 import secrets
 import hashlib
+import hmac
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
@@ -17,9 +18,10 @@ def get_password_hash(password: str) -> str:
 def generate_campaign_id() -> str:
     return secrets.token_urlsafe(10)[:14]
 
-def generate_anonymous_user_id(ip_address: str, user_agent: str, timestamp: datetime) -> str:
-    data = f"{ip_address}:{user_agent}:{timestamp.isoformat()}"
-    return hashlib.sha256(data.encode()).hexdigest()[:16]
+def generate_anonymous_user_id(ip_address: str, user_agent: str, salt: bytes) -> str:
+    """Stable id for one visitor for as long as ``salt`` (one rotation period) is in use."""
+    data = f"{ip_address}:{user_agent}"
+    return hmac.new(salt, data.encode(), hashlib.sha256).hexdigest()[:16]
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DEFAULT_TIMEZONE = "UTC"
+EPOCH = date(1970, 1, 1)
+
+@lru_cache(maxsize=512)
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo for an IANA name; raises ValueError for unknown zones."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        get_zone(name)
+        return True
+    except ValueError:
+        return False
+
+def utc_offset_minutes(zone: ZoneInfo, moment: datetime) -> int:
+    """Offset of ``zone`` at a naive UTC ``moment``, in minutes."""
+    local = moment.replace(tzinfo=timezone.utc).astimezone(zone)
+    return int(local.utcoffset().total_seconds() // 60)
+
+def local_midnight_utc(zone: ZoneInfo, day: date) -> datetime:
+    """Naive UTC instant at which ``day`` starts in ``zone``.
+
+    Midnight that falls in a DST gap resolves to the first valid instant.
+    """
+    local = datetime(day.year, day.month, day.day, tzinfo=zone)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+def local_range_utc(zone: ZoneInfo, start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """Naive UTC bounds ``[start, end)`` of local days ``start_date``..``end_date``."""
+    return local_midnight_utc(zone, start_date), local_midnight_utc(zone, end_date + timedelta(days=1))
+
+def local_today(zone: ZoneInfo, now: Optional[datetime] = None) -> date:
+    now = now or datetime.utcnow()
+    return now.replace(tzinfo=timezone.utc).astimezone(zone).date()
+
+def offset_transitions(zone: ZoneInfo, start: datetime, end: datetime) -> Tuple[List[datetime], List[int]]:
+    """Points where the UTC offset of ``zone`` changes within ``[start, end)``.
+
+    Returns naive UTC instants and the offset (minutes) in effect from each
+    one on; the first entry is ``start`` itself. Probes once per day and
+    bisects to the minute only around a change, so a year costs a few
+    hundred lookups whatever is being bucketed.
+    """
+    points = [start]
+    offsets = [utc_offset_minutes(zone, start)]
+    probe = start
+    while probe < end:
+        step = min(probe + timedelta(days=1), end)
+        offset = utc_offset_minutes(zone, step)
+        if offset != offsets[-1]:
+            low, high = probe, step
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if utc_offset_minutes(zone, middle) == offsets[-1]:
+                    low = middle
+                else:
+                    high = middle
+            points.append(high.replace(second=0, microsecond=0))
+            offsets.append(offset)
+        probe = step
+    return points, offsets
+
+def to_local_hours(zone: ZoneInfo, hours: Sequence[datetime], start: datetime, end: datetime):
+    """Local wall-clock hours (since the epoch) of naive UTC hour buckets in ``[start, end)``.
+
+    Returns a NumPy int64 array; ``// 24`` gives local epoch days, ``% 24``
+    the local hour. Buckets are shifted by the offset in effect at their
+    start, so in half-hour zones a UTC hour maps to the local hour it starts in.
+    """
+    import numpy as np
+
+    utc_minutes = np.array(hours, dtype="datetime64[m]").astype(np.int64)
+    points, offsets = offset_transitions(zone, start, end)
+    transitions = np.array(points, dtype="datetime64[m]").astype(np.int64)
+    # A bucket that starts before ``start`` (half-hour zones) takes the first offset
+    index = np.maximum(np.searchsorted(transitions, utc_minutes, side="right") - 1, 0)
+    offset = np.array(offsets, dtype=np.int64)[index]
+    return (utc_minutes + offset) // 60
+
+def epoch_day(day: date) -> int:
+    return (day - EPOCH).days
@@ -0,0 +1,104 @@
+"""Bulk scan ingestion throughput (``POST /admin/scans/bulk``).
+
+Builds a gzip'd NDJSON upload of synthetic events for the seeded campaigns,
+posts it through the ASGI app in-process, then posts it again to measure
+the idempotent (all-duplicates) path::
+
+    python -m benchmarks.run --scenarios scan --requests 1 --output /dev/null   # seed once
+    python -m benchmarks.bulk_ingest --events 100000
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+
+def build_upload(campaign_ids: List[str], events: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    agents = [
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+        "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/120.0 Mobile Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36",
+    ]
+    lines = []
+    for _ in range(events):
+        lines.append(json.dumps({
+            "event_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "campaign_id": rng.choice(campaign_ids),
+            "timestamp": (now - timedelta(seconds=rng.randint(0, 7 * 86400))).isoformat() + "Z",
+            "ip_address": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            "user_agent": rng.choice(agents),
+        }))
+    return gzip.compress(("\n".join(lines) + "\n").encode())
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    from sqlalchemy import select
+    from main import app
+    from app.database import AsyncSessionLocal, engine
+    from app.models import Campaign
+    from benchmarks.run import _admin_token
+
+    async with AsyncSessionLocal() as db:
+        campaign_ids = list((await db.execute(select(Campaign.campaign_id))).scalars().all())
+    token = await _admin_token(AsyncSessionLocal)
+    body = build_upload(campaign_ids, args.events, args.seed)
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/x-ndjson",
+        "Content-Encoding": "gzip",
+    }
+
+    runs = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in ("first_upload", "repeat_upload"):
+                started = time.perf_counter()
+                response = await client.post("/admin/scans/bulk", content=body, headers=headers)
+                elapsed = time.perf_counter() - started
+                response.raise_for_status()
+                summary = response.json()
+                runs[name] = {
+                    "seconds": round(elapsed, 3),
+                    "events_per_second": round(args.events / elapsed, 1),
+                    **{key: summary[key] for key in ("received", "inserted", "duplicates", "rejected")},
+                }
+                print(f"{name:>14}: {runs[name]['events_per_second']:>10.1f} events/s", file=sys.stderr)
+
+    await engine.dispose()
+    return {
+        "database": args.database_url.split("://", 1)[0],
+        "parameters": {"events": args.events, "compressed_bytes": len(body), "seed": args.seed},
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    from benchmarks.run import DEFAULT_DATABASE_URL
+
+    parser = argparse.ArgumentParser(description="Benchmark the bulk scan ingestion endpoint")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Must happen before anything imports app.config
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, default=str), file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Cold-start time of a worker for each database startup mode.
+
+Every run is a fresh interpreter that imports ``main`` and runs the lifespan
+startup against an already initialised database, the way an extra worker or
+replica boots. ``create`` is the old behaviour (create_all plus the admin
+check on every boot), ``verify`` only reads the Alembic revision::
+
+    python -m benchmarks.cold_start --runs 10
+    python -m benchmarks.cold_start --database-url postgresql+asyncpg://...
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+MODES = ["create", "verify"]
+
+_CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from sqlalchemy import event
+queries = []
+event.listen(main.engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(1))
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+    await main.engine.dispose()
+    return ready
+
+ready = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "total_ms": (ready - started) * 1000,
+    "queries": len(queries),
+}))
+"""
+
+
+def run_child(env: Dict[str, str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True, check=True
+    )
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        key: round(statistics.median(sample[key] for sample in samples), 2)
+        for key in ("import_ms", "startup_ms", "total_ms", "process_ms", "queries")
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure worker cold-start time per DB_STARTUP_MODE")
+    parser.add_argument("--database-url",
+                        default=f"sqlite+aiosqlite:///{tempfile.gettempdir()}/cold_start.db")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = args.database_url
+    env.setdefault("ENVIRONMENT", "benchmark")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    # Initialise once, as the release step would, so every mode boots against
+    # the same migrated database
+    subprocess.run([sys.executable, "-m", "app.cli", "init"], env=env, check=True)
+
+    report = {}
+    for mode in args.modes:
+        mode_env = dict(env, DB_STARTUP_MODE=mode)
+        samples = [run_child(mode_env) for _ in range(args.runs)]
+        report[mode] = summarize(samples)
+        print(
+            f"{mode:>8}: import {report[mode]['import_ms']:8.1f} ms  "
+            f"startup {report[mode]['startup_ms']:8.1f} ms  "
+            f"process {report[mode]['process_ms']:8.1f} ms  "
+            f"queries {report[mode]['queries']:.0f}",
+            file=sys.stderr,
+        )
+
+    output = json.dumps({"database": args.database_url.split("://", 1)[0], "runs": args.runs, "modes": report}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
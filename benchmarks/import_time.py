@@ -0,0 +1,89 @@
+"""Import-time profile of the Railway entrypoint with a budget check.
+
+Runs ``python -X importtime -c "import main"`` in fresh interpreters, keeps
+the fastest run, prints the most expensive top-level imports and fails when
+the total exceeds ``--budget-ms`` or when a module that should be deferred
+to its code path (pandas, qrcode, PIL, ...) is imported at startup::
+
+    python -m benchmarks.import_time --budget-ms 1200
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+# Only needed on specific request paths; importing them at startup slows cold starts
+DEFERRED_MODULES = ["pandas", "qrcode", "PIL", "aiohttp", "user_agents", "xlsxwriter", "numpy"]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_once(target: str, env: Dict[str, str]) -> List[Tuple[int, int, int, str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), len(indent), name))
+    return entries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile and budget startup import time")
+    parser.add_argument("--target", default="main", help="module to import")
+    parser.add_argument("--budget-ms", type=float, default=1200.0)
+    parser.add_argument("--runs", type=int, default=3, help="keep the fastest of N runs")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--allow", nargs="*", default=[], help="deferred modules allowed at startup")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Point at a throwaway database so importing the app has no side effects
+    env.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.gettempdir()}/import_time.db")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    best = None
+    for _ in range(args.runs):
+        entries = profile_once(args.target, env)
+        total = next((cumulative for _, cumulative, _, name in entries if name == args.target), 0)
+        if best is None or total < best[0]:
+            best = (total, entries)
+
+    total_us, entries = best
+    imported = {name for _, _, _, name in entries}
+
+    print(f"import {args.target}: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"\nTop {args.top} imports by cumulative time:")
+    top_level = sorted(
+        (entry for entry in entries if entry[2] == 3),
+        key=lambda entry: entry[1], reverse=True,
+    )
+    for _, cumulative, _, name in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_us / 1000 > args.budget_ms:
+        failures.append(f"import time {total_us / 1000:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    for module in DEFERRED_MODULES:
+        if module in imported and module not in args.allow:
+            failures.append(f"{module} is imported at startup; import it where it is used")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nOK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Measure what the metrics collectors and middleware cost per request.
+
+Runs a trivial ASGI app with and without ``MetricsMiddleware`` so the number
+reflects only the instrumentation, not the database or the router::
+
+    python -m benchmarks.metrics_overhead --iterations 200000
+
+For an end-to-end view of the ``/scan`` path run the main harness twice::
+
+    METRICS_ENABLED=false python -m benchmarks.run --scenarios scan --output off.json
+    METRICS_ENABLED=true  python -m benchmarks.run --scenarios scan --reuse-db --baseline off.json
+"""
+import argparse
+import asyncio
+import json
+import time
+
+
+async def _noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 302, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class _Route:
+    path = "/scan/{campaign_id}"
+
+
+async def _drive(app, iterations: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        scope = {"type": "http", "method": "GET", "path": "/scan/abcdefghijklmn", "route": _Route}
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+
+def _time_calls(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from app.metrics import Counter, Histogram
+    from app.middleware import MetricsMiddleware
+
+    n = args.iterations
+    counter = Counter("bench_counter", "benchmark")
+    histogram = Histogram("bench_histogram", "benchmark", ("route",))
+    child = histogram.labels("/scan/{campaign_id}")
+
+    baseline = asyncio.run(_drive(_noop_app, n))
+    instrumented = asyncio.run(_drive(MetricsMiddleware(_noop_app), n))
+
+    report = {
+        "iterations": n,
+        "counter_inc_ns": round(_time_calls(counter.inc, n) / n * 1e9, 1),
+        "histogram_observe_ns": round(_time_calls(lambda: child.observe(0.0012), n) / n * 1e9, 1),
+        "bare_request_us": round(baseline / n * 1e6, 3),
+        "instrumented_request_us": round(instrumented / n * 1e6, 3),
+        "middleware_overhead_us": round((instrumented - baseline) / n * 1e6, 3),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
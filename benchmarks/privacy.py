@@ -0,0 +1,140 @@
+"""Privacy request processing throughput and its impact on live scan inserts.
+
+Queues delete requests for the visitors with the most scans, then measures
+concurrent single-row scan inserts (the standard ``/scan`` write path) once
+on their own and once while the processor works through the queue::
+
+    python -m benchmarks.run --scenarios scan --requests 1 --output /dev/null   # seed once
+    python -m benchmarks.privacy --requests 50 --max-rows-per-second 5000
+    python -m benchmarks.privacy --requests 50 --max-rows-per-second 0          # unthrottled
+
+Each run deletes data, so reseed before comparing settings.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+
+
+async def _queue_requests(session_factory, count: int) -> List[str]:
+    from sqlalchemy import select, func, insert
+    from app.models import Scan, PrivacyRequest
+
+    async with session_factory() as db:
+        result = await db.execute(
+            select(Scan.anonymous_user_id, func.count(Scan.id))
+            .group_by(Scan.anonymous_user_id)
+            .order_by(func.count(Scan.id).desc())
+            .limit(count)
+        )
+        visitors = [row[0] for row in result.all()]
+        await db.execute(insert(PrivacyRequest), [
+            {"id": str(uuid.uuid4()), "request_type": "delete", "anonymous_user_id": visitor, "status": "pending"}
+            for visitor in visitors
+        ])
+        await db.commit()
+    return visitors
+
+
+async def _insert_load(session_factory, campaign_ids: List[str], concurrency: int, stop: asyncio.Event) -> Dict[str, Any]:
+    from app.models import Scan
+    from benchmarks.run import summarize
+
+    latencies: List[float] = []
+    errors = 0
+    rng = random.Random(7)
+
+    async def worker():
+        nonlocal errors
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                async with session_factory() as db:
+                    db.add(Scan(
+                        campaign_id=rng.choice(campaign_ids),
+                        anonymous_user_id=f"{rng.getrandbits(64):016x}",
+                        timestamp=datetime.utcnow(),
+                        device_type="mobile",
+                    ))
+                    await db.commit()
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal, engine
+    from app.models import Campaign
+    from app.services.privacy_service import PrivacyRequestProcessor
+
+    async with AsyncSessionLocal() as db:
+        campaign_ids = list((await db.execute(select(Campaign.campaign_id))).scalars().all())
+
+    stop = asyncio.Event()
+    load = asyncio.create_task(_insert_load(AsyncSessionLocal, campaign_ids, args.concurrency, stop))
+    await asyncio.sleep(args.baseline_seconds)
+    stop.set()
+    baseline = await load
+
+    visitors = await _queue_requests(AsyncSessionLocal, args.requests)
+    processor = PrivacyRequestProcessor(
+        group_size=args.group_size,
+        batch_size=args.batch_size,
+        max_rows_per_second=args.max_rows_per_second,
+    )
+    stop = asyncio.Event()
+    load = asyncio.create_task(_insert_load(AsyncSessionLocal, campaign_ids, args.concurrency, stop))
+    processed = await processor.run_once(AsyncSessionLocal)
+    stop.set()
+    during = await load
+
+    await engine.dispose()
+    return {
+        "database": args.database_url.split("://", 1)[0],
+        "parameters": {
+            "requests": len(visitors),
+            "group_size": args.group_size,
+            "batch_size": args.batch_size,
+            "max_rows_per_second": args.max_rows_per_second,
+            "concurrency": args.concurrency,
+        },
+        "processor": processed,
+        "inserts_baseline": baseline,
+        "inserts_during_processing": during,
+    }
+
+
+def main() -> None:
+    from benchmarks.run import DEFAULT_DATABASE_URL
+
+    parser = argparse.ArgumentParser(description="Benchmark privacy request processing under insert load")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--requests", type=int, default=50, help="delete requests to queue")
+    parser.add_argument("--group-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-rows-per-second", type=float, default=5000.0, help="0 = unthrottled")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent scan inserters")
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    # Must happen before anything imports app.config
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, default=str), file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measure what the rate limiter costs per public request.
+
+Runs a trivial ASGI app with and without ``RateLimitMiddleware`` (per-worker
+and shared buckets) on ``/scan/{id}`` hits from ``--ips`` distinct client
+addresses, with limits high enough that every request is allowed, then
+times a scan over its limit (passed on to be redirected, not recorded)::
+
+    python -m benchmarks.rate_limit --iterations 200000 --ips 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+async def _noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 302, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _drive(app, iterations: int, ips: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    clients = [(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 40000) for i in range(ips)]
+    started = time.perf_counter()
+    for i in range(iterations):
+        scope = {"type": "http", "method": "GET", "path": "/scan/abcdefghijklmn", "client": clients[i % ips]}
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--ips", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from app.middleware import RateLimitMiddleware
+    from app.services.rate_limit import Limit, MemoryBuckets, SharedBuckets
+
+    n = args.iterations
+    allow_all = {"scan": (Limit(n, 60), Limit(n, 60))}
+    deny_all = {"scan": (Limit(1, 3600), None)}
+
+    path = os.path.join(tempfile.mkdtemp(), "rate_limit.bin")
+    shared = SharedBuckets(path, slots=max(args.ips * 2, 1024))
+    try:
+        baseline = asyncio.run(_drive(_noop_app, n, args.ips))
+        memory = asyncio.run(_drive(RateLimitMiddleware(_noop_app, MemoryBuckets(), allow_all), n, args.ips))
+        shared_time = asyncio.run(_drive(RateLimitMiddleware(_noop_app, shared, allow_all), n, args.ips))
+        # One client past its limit: every request after the first is over it
+        over_limit = asyncio.run(_drive(RateLimitMiddleware(_noop_app, MemoryBuckets(), deny_all), n, 1))
+    finally:
+        shared.close()
+        os.unlink(path)
+
+    report = {
+        "iterations": n,
+        "client_ips": args.ips,
+        "bare_request_us": round(baseline / n * 1e6, 3),
+        "memory_buckets_overhead_us": round((memory - baseline) / n * 1e6, 3),
+        "shared_buckets_overhead_us": round((shared_time - baseline) / n * 1e6, 3),
+        "over_limit_request_us": round(over_limit / n * 1e6, 3),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
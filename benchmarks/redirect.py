@@ -0,0 +1,59 @@
+"""Compare the standard and fast ``/scan`` redirect modes.
+
+``REDIRECT_MODE`` is read at import time, so each mode runs in its own
+process against the same seeded database::
+
+    python -m benchmarks.run --scenarios scan --requests 1 --output /dev/null   # seed once
+    python -m benchmarks.redirect --requests 5000 --concurrency 50
+
+Both runs are in-process (one worker), so requests/sec is per worker.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    env = dict(os.environ, REDIRECT_MODE=mode)
+    command = [
+        sys.executable, "-m", "benchmarks.run",
+        "--reuse-db", "--scenarios", "scan",
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--database-url", args.database_url,
+        "--output", output,
+    ]
+    subprocess.run(command, env=env, check=True)
+    with open(output) as f:
+        report = json.load(f)
+    os.unlink(output)
+    return report["scenarios"]["scan"]
+
+
+def main() -> None:
+    from benchmarks.run import DEFAULT_DATABASE_URL
+
+    parser = argparse.ArgumentParser(description="Benchmark /scan in standard vs fast redirect mode")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    standard = run_mode("standard", args)
+    fast = run_mode("fast", args)
+    report = {
+        "standard": standard,
+        "fast": fast,
+        "speedup": round(fast["throughput_rps"] / standard["throughput_rps"], 2)
+        if standard["throughput_rps"] else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
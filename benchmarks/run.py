@@ -0,0 +1,316 @@
+"""Load-testing harness for the main request paths.
+
+Seeds a benchmark database, drives the FastAPI app in-process through
+httpx's ASGI transport and reports throughput and latency percentiles per
+scenario as JSON. Passing ``--baseline`` compares the run against an earlier
+report and exits non-zero when any scenario regresses by more than
+``--threshold``.
+
+Usage::
+
+    python -m benchmarks.run --campaigns 200 --scans 100000 --concurrency 20 \\
+        --output bench.json
+    python -m benchmarks.run --reuse-db --baseline bench.json --threshold 0.15
+
+Use ``--database-url postgresql+asyncpg://...`` to benchmark against a local
+Postgres instead of the default throwaway SQLite file. The database is
+dropped and recreated unless ``--reuse-db`` is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCENARIOS = ["scan", "stats", "export", "admin_campaigns", "qr"]
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///./bench.db"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if count else 0.0,
+        },
+    }
+
+
+def compare_reports(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+) -> List[str]:
+    """Return a human readable line for every metric that regressed."""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+
+        old_rps = previous["throughput_rps"]
+        new_rps = result["throughput_rps"]
+        if old_rps > 0 and new_rps < old_rps * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {new_rps:.1f} rps vs baseline {old_rps:.1f} rps"
+            )
+
+        for key in ("p50", "p95", "p99"):
+            old_latency = previous["latency_ms"][key]
+            new_latency = result["latency_ms"][key]
+            if old_latency > 0 and new_latency > old_latency * (1 + threshold):
+                regressions.append(
+                    f"{name}: {key} {new_latency:.2f} ms vs baseline {old_latency:.2f} ms"
+                )
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+async def _load_targets(session_factory) -> Dict[str, List[Tuple[str, float]]]:
+    """Pick request targets weighted by how many scans each campaign has."""
+    from sqlalchemy import select, func
+    from app.models import Campaign, Scan
+
+    async with session_factory() as db:
+        counts = dict((await db.execute(
+            select(Scan.campaign_id, func.count(Scan.id)).group_by(Scan.campaign_id)
+        )).all())
+        campaigns = (await db.execute(
+            select(Campaign.campaign_id, Campaign.active, Campaign.archived, Campaign.client_access_enabled)
+        )).all()
+
+    def weighted(rows):
+        return [(row.campaign_id, float(counts.get(row.campaign_id, 0) + 1)) for row in rows]
+
+    return {
+        "live": weighted([c for c in campaigns if c.active and not c.archived]),
+        "dashboard": weighted([c for c in campaigns if c.client_access_enabled and not c.archived]),
+        "any": weighted(campaigns),
+    }
+
+
+async def _admin_token(session_factory) -> str:
+    from app.api.auth import create_initial_admin
+    from app.config import settings
+    from app.utils import create_access_token
+
+    async with session_factory() as db:
+        await create_initial_admin(db)
+    return create_access_token(data={"sub": settings.admin_email})
+
+
+def _build_scenarios(targets, token: str) -> Dict[str, Tuple[Callable[[random.Random], str], Dict[str, str], int]]:
+    auth = {"Authorization": f"Bearer {token}"}
+
+    def picker(pool):
+        ids = [campaign_id for campaign_id, _ in pool]
+        weights = [weight for _, weight in pool]
+        return lambda rng: rng.choices(ids, weights=weights, k=1)[0]
+
+    live = picker(targets["live"])
+    dashboard = picker(targets["dashboard"])
+    anything = picker(targets["any"])
+
+    return {
+        "scan": (lambda rng: f"/scan/{live(rng)}", {}, 302),
+        "stats": (lambda rng: f"/api/campaigns/{dashboard(rng)}/stats", {}, 200),
+        "export": (lambda rng: f"/api/campaigns/{dashboard(rng)}/export", {}, 200),
+        "admin_campaigns": (lambda rng: "/admin/campaigns", auth, 200),
+        "qr": (lambda rng: f"/admin/campaigns/{anything(rng)}/qr", auth, 200),
+    }
+
+
+async def run_scenario(
+    client,
+    path_for: Callable[[random.Random], str],
+    headers: Dict[str, str],
+    expected_status: int,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await client.get(path_for(rng), headers=headers)
+
+    paths = [path_for(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < len(paths):
+            path = paths[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                await response.aread()
+                ok = response.status_code == expected_status
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    from benchmarks.seed import seed_database
+
+    seed_info = None
+    if not args.reuse_db:
+        started = time.perf_counter()
+        seed_info = await seed_database(
+            campaigns=args.campaigns, scans=args.scans, days=args.days, seed=args.seed
+        )
+        seed_info["seed_time_s"] = round(time.perf_counter() - started, 2)
+
+    from main import app
+    from app.database import AsyncSessionLocal, engine
+
+    targets = await _load_targets(AsyncSessionLocal)
+    token = await _admin_token(AsyncSessionLocal)
+    scenarios = _build_scenarios(targets, token)
+    rng = random.Random(args.seed)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in args.scenarios:
+                path_for, headers, expected_status = scenarios[name]
+                requests = args.requests
+                if name in ("export", "qr"):
+                    requests = max(1, requests // args.heavy_divisor)
+                results[name] = await run_scenario(
+                    client, path_for, headers, expected_status,
+                    requests=requests,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                    rng=rng,
+                )
+                print(
+                    f"{name:>16}: {results[name]['throughput_rps']:>9.1f} rps  "
+                    f"p50 {results[name]['latency_ms']['p50']:>8.2f} ms  "
+                    f"p95 {results[name]['latency_ms']['p95']:>8.2f} ms  "
+                    f"p99 {results[name]['latency_ms']['p99']:>8.2f} ms  "
+                    f"errors {results[name]['errors']}",
+                    file=sys.stderr,
+                )
+
+    await engine.dispose()
+
+    return {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "database": args.database_url.split("://", 1)[0],
+        "parameters": {
+            "campaigns": args.campaigns,
+            "scans": args.scans,
+            "days": args.days,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "seed": seed_info,
+        "scenarios": results,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the QR Analytics API in-process")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--campaigns", type=int, default=200)
+    parser.add_argument("--scans", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--heavy-divisor", type=int, default=10,
+                        help="run export and qr with requests / N because they are much slower")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--reuse-db", action="store_true", help="skip seeding and use the existing data")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against an earlier JSON report")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed relative regression before failing (0.10 = 10%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    # Must happen before anything imports app.config
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+    # Per-request log lines would dominate the measurement
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2, default=str)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.threshold)
+        if regressions:
+            print("Performance regressions detected:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Seed a database with synthetic campaigns and scans for benchmarking.
+
+The distributions are meant to look like production traffic rather than
+uniform noise: campaign popularity follows a heavy-tailed (Pareto) curve,
+scans follow a diurnal pattern, devices are mostly mobile and a share of
+visitors come back more than once.
+
+The app modules are imported lazily so callers can point ``DATABASE_URL``
+at a throwaway database before ``app.config`` reads it.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+DEVICE_WEIGHTS = {"mobile": 0.74, "desktop": 0.18, "tablet": 0.06, "unknown": 0.02}
+
+CITY_WEIGHTS = {
+    ("London", "United Kingdom"): 0.22,
+    ("Manchester", "United Kingdom"): 0.09,
+    ("Birmingham", "United Kingdom"): 0.07,
+    ("Dublin", "Ireland"): 0.05,
+    ("Paris", "France"): 0.06,
+    ("Berlin", "Germany"): 0.05,
+    ("New York", "United States"): 0.08,
+    ("Sydney", "Australia"): 0.04,
+    ("Dubai", "United Arab Emirates"): 0.04,
+    (None, None): 0.30,
+}
+
+# Relative scan volume per UTC hour, peaking in the early evening
+HOURLY_WEIGHTS = [
+    1, 1, 1, 1, 1, 2, 3, 5, 7, 8, 8, 9,
+    10, 10, 9, 9, 10, 12, 14, 13, 11, 8, 5, 2,
+]
+
+USER_AGENTS = {
+    "mobile": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+              "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
+    "desktop": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+               "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "tablet": "Mozilla/5.0 (iPad; CPU OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+              "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
+    "unknown": "curl/8.4.0",
+}
+
+
+def campaign_weights(count: int, rng: random.Random, alpha: float = 1.2) -> List[float]:
+    """Heavy-tailed popularity: a few campaigns get most of the scans."""
+    weights = [rng.paretovariate(alpha) for _ in range(count)]
+    total = sum(weights)
+    return [w / total for w in weights]
+
+
+def _weighted_choices(rng: random.Random, weights: Dict[Any, float], k: int) -> List[Any]:
+    keys = list(weights.keys())
+    return rng.choices(keys, weights=list(weights.values()), k=k)
+
+
+def generate_campaign_rows(count: int, rng: random.Random, now: datetime) -> List[Dict[str, Any]]:
+    rows = []
+    for i in range(count):
+        created_at = now - timedelta(days=rng.randint(1, 365))
+        archived = rng.random() < 0.1
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "campaign_id": f"bench{i:09d}",
+            "business_name": f"Benchmark Business {i}",
+            "target_url": f"https://example.com/landing/{i}",
+            "description": "Synthetic campaign for benchmarking",
+            "created_at": created_at,
+            "active": True,
+            "client_access_enabled": rng.random() < 0.9,
+            "archived": archived,
+            "archived_at": now - timedelta(days=rng.randint(0, 60)) if archived else None,
+        })
+    return rows
+
+
+def generate_scan_rows(
+    campaign_ids: List[str],
+    weights: List[float],
+    count: int,
+    days: int,
+    rng: random.Random,
+    now: datetime,
+    repeat_visitor_rate: float = 0.3,
+) -> List[Dict[str, Any]]:
+    targets = rng.choices(campaign_ids, weights=weights, k=count)
+    devices = _weighted_choices(rng, DEVICE_WEIGHTS, count)
+    places = _weighted_choices(rng, CITY_WEIGHTS, count)
+    hours = rng.choices(range(24), weights=HOURLY_WEIGHTS, k=count)
+    visitor_pool_size = max(1, int(count * (1 - repeat_visitor_rate)))
+
+    rows = []
+    for i in range(count):
+        # Recent days are busier than old ones
+        day_offset = min(days - 1, int(rng.expovariate(3.0 / max(days, 1))))
+        timestamp = (now - timedelta(days=day_offset)).replace(
+            hour=hours[i], minute=rng.randint(0, 59), second=rng.randint(0, 59), microsecond=0
+        )
+        if timestamp > now:
+            timestamp -= timedelta(days=1)
+        visitor = rng.randrange(visitor_pool_size)
+        city, country = places[i]
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "campaign_id": targets[i],
+            "anonymous_user_id": f"{visitor:016x}",
+            "timestamp": timestamp,
+            "ip_address": f"10.{(visitor >> 16) & 255}.{(visitor >> 8) & 255}.{visitor & 255}",
+            "city": city,
+            "country": country,
+            "device_type": devices[i],
+            "user_agent_hash": USER_AGENTS[devices[i]][:64],
+            "created_at": timestamp,
+        })
+    return rows
+
+
+async def seed_database(
+    campaigns: int = 200,
+    scans: int = 100_000,
+    days: int = 90,
+    seed: int = 42,
+    chunk_size: int = 5000,
+) -> Dict[str, Any]:
+    """Recreate the schema and fill it with synthetic data."""
+    from sqlalchemy import insert
+    from app.database import engine, Base, stamp_revision
+    from app.models import Campaign, Scan
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    campaign_rows = generate_campaign_rows(campaigns, rng, now)
+    weights = campaign_weights(campaigns, rng)
+    campaign_ids = [row["campaign_id"] for row in campaign_rows]
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        # Matches the models, so the app starts in verify mode without migrating
+        await conn.run_sync(stamp_revision)
+        await conn.execute(insert(Campaign), campaign_rows)
+
+    remaining = scans
+    while remaining > 0:
+        batch = min(chunk_size, remaining)
+        rows = generate_scan_rows(campaign_ids, weights, batch, days, rng, now)
+        async with engine.begin() as conn:
+            await conn.execute(insert(Scan), rows)
+        remaining -= batch
+
+    return {"campaigns": campaigns, "scans": scans, "days": days, "seed": seed}
@@ -0,0 +1,131 @@
+"""Response serialization cost and bytes on the wire for the main JSON endpoints.
+
+Loads the payloads of ``GET /api/campaigns/{id}/stats`` and
+``GET /admin/campaigns`` from the seeded database and renders them the old
+way (``jsonable_encoder`` + stdlib ``json``) and the current way (response
+model + orjson), then reports the body size raw, gzip'd and (if the
+``brotli`` package is installed) brotli compressed::
+
+    python -m benchmarks.run --scenarios scan --requests 1 --output /dev/null   # seed once
+    python -m benchmarks.serialization --iterations 500
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+
+def _time(render: Callable[[], bytes], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        render()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1] * 1000, 4),
+    }
+
+
+def measure(payload: Any, model: Any, iterations: int, gzip_level: int, brotli_quality: int) -> Dict[str, Any]:
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(model)
+
+    def stdlib() -> bytes:
+        # What JSONResponse did with an untyped dict
+        return json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode()
+
+    def typed_orjson() -> bytes:
+        # What FastAPI does with a response_model and ORJSONResponse
+        content = adapter.dump_python(adapter.validate_python(payload), mode="json")
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+    if json.loads(stdlib()) != json.loads(typed_orjson()):
+        raise SystemExit("Typed and untyped renderings differ")
+
+    body = typed_orjson()
+    wire = {"identity": len(body), "gzip": len(gzip.compress(body, gzip_level, mtime=0))}
+    try:
+        import brotli
+        wire["br"] = len(brotli.compress(body, quality=brotli_quality))
+    except ImportError:
+        pass
+    return {
+        "stdlib_json": _time(stdlib, iterations),
+        "typed_orjson": _time(typed_orjson, iterations),
+        "bytes": wire,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from sqlalchemy import select, func
+    from app.database import AsyncSessionLocal, engine
+    from app.models import Campaign, Scan
+    from app.schemas import AnalyticsData, CampaignWithStats
+    from app.services.analytics_service import AnalyticsService
+    from app.services.campaign_service import CampaignService
+
+    async with AsyncSessionLocal() as db:
+        # The busiest campaign gives the largest stats payload
+        campaign_id = (await db.execute(
+            select(Scan.campaign_id).join(Campaign, Campaign.campaign_id == Scan.campaign_id)
+            .where(Campaign.client_access_enabled == True)
+            .group_by(Scan.campaign_id).order_by(func.count(Scan.id).desc()).limit(1)
+        )).scalar()
+        stats = await AnalyticsService(db).get_campaign_analytics(campaign_id)
+        campaigns = await CampaignService(db).get_all_campaigns(include_archived=True)
+    await engine.dispose()
+
+    endpoints: Dict[str, Any] = {}
+    for name, payload, model in (
+        ("campaign_stats", stats, AnalyticsData),
+        ("admin_campaigns", campaigns, List[CampaignWithStats]),
+    ):
+        endpoints[name] = measure(payload, model, args.iterations, args.gzip_level, args.brotli_quality)
+        result = endpoints[name]
+        print(
+            f"{name:>16}: stdlib {result['stdlib_json']['p50_ms']:.3f} ms, "
+            f"orjson {result['typed_orjson']['p50_ms']:.3f} ms, bytes {result['bytes']}",
+            file=sys.stderr
+        )
+    return {
+        "database": args.database_url.split("://", 1)[0],
+        "parameters": {
+            "iterations": args.iterations, "campaigns": len(campaigns),
+            "gzip_level": args.gzip_level, "brotli_quality": args.brotli_quality,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main() -> None:
+    from benchmarks.run import DEFAULT_DATABASE_URL
+
+    parser = argparse.ArgumentParser(description="Benchmark JSON response serialization and compression")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=4)
+    args = parser.parse_args()
+
+    # Must happen before anything imports app.config
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, default=str), file=sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,30 @@ from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import logging
 import os
 
+# Logging first, so import-time messages already go through the async pipeline
+try:
+    from app.log import configure_logging
+    configure_logging()
+except Exception:
+    logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger("main")
+
 # Try to import database components - graceful fallback if they fail
 try:
     from app.config import settings
-    from app.database import create_tables, get_database
+    from app.database import (
+        create_tables, get_database, engine, AsyncSessionLocal,
+        get_current_revision, get_expected_revision
+    )
     from app.api.auth import create_initial_admin
-    print("✅ Database components imported successfully")
+    logger.info("Database components imported successfully")
     database_available = True
 except Exception as e:
-    print(f"⚠️ Database import failed: {e}")
+    logger.warning("Database import failed: %s", e)
     database_available = False
     # Create minimal settings fallback
     class Settings:
@@ -23,49 +36,331 @@ except Exception as e:
 # Try to import API routers - graceful fallback if they fail
 routers_available = False
 try:
-    from app.api import public, auth, admin
-    print("✅ API routers imported successfully")
+    from app.api import public, auth, admin, metrics
+    logger.info("API routers imported successfully")
     routers_available = True
 except Exception as e:
-    print(f"⚠️ API routers import failed: {e}")
+    logger.warning("API routers import failed: %s", e)
     routers_available = False
 
+# Metrics are optional too - the app must still boot without them
+metrics_enabled = False
+try:
+    from app.metrics import event_loop_monitor, install_query_metrics
+    from app.middleware import MetricsMiddleware
+    metrics_enabled = getattr(settings, "metrics_enabled", False)
+    if metrics_enabled and database_available:
+        install_query_metrics(engine)
+except Exception as e:
+    logger.warning("Metrics import failed: %s", e)
+    metrics_enabled = False
+
+# Query profiling is opt-in: it fingerprints every statement
+profiling_enabled = False
+try:
+    if getattr(settings, "query_profiling_enabled", False) and database_available:
+        from app.profiling import install_query_profiler, slow_query_table
+        from app.middleware import QueryProfilerMiddleware
+        install_query_profiler(engine)
+        slow_query_table.window_seconds = settings.query_profiling_window_seconds
+        profiling_enabled = True
+        logger.info("Query profiling enabled")
+except Exception as e:
+    logger.warning("Query profiling setup failed: %s", e)
+    profiling_enabled = False
+
+# Fast redirect mode serves /scan from memory and writes scans in batches
+fast_redirect_enabled = False
+try:
+    if getattr(settings, "redirect_mode", "standard") == "fast" and database_available:
+        from app.services.routing_table import routing_table
+        from app.services.scan_ingest import scan_ingestor
+        from app.middleware import ScanRedirectMiddleware
+        routing_table.refresh_interval = settings.routing_table_refresh_seconds
+        scan_ingestor.batch_size = settings.scan_batch_size
+        scan_ingestor.flush_interval = settings.scan_flush_interval
+        scan_ingestor.max_queue = settings.scan_queue_max
+        fast_redirect_enabled = True
+except Exception as e:
+    logger.warning("Fast redirect setup failed, using standard handler: %s", e)
+    fast_redirect_enabled = False
+
+# Bot hits are counted instead of stored as scans (either redirect mode)
+bot_filter_enabled = False
+try:
+    from app.services.bot_filter import bot_filter, IPRangeSet, DEFAULT_CRAWLER_RANGES
+    bot_filter.enabled = getattr(settings, "bot_filter_enabled", False) and database_available
+    if bot_filter.enabled:
+        if settings.bot_ip_ranges_file:
+            bot_filter.ip_ranges = IPRangeSet.from_file(settings.bot_ip_ranges_file, extra=DEFAULT_CRAWLER_RANGES)
+        bot_filter.max_hits_per_minute = settings.bot_max_hits_per_minute
+        bot_filter.flush_interval = settings.bot_flush_interval
+        bot_filter_enabled = True
+except Exception as e:
+    logger.warning("Bot filter setup failed: %s", e)
+    bot_filter_enabled = False
+
+# Short in-memory window suppressing repeat hits of one scan (either redirect mode)
+scan_dedup = None
+try:
+    from app.services.scan_dedup import scan_dedup
+    scan_dedup.window = getattr(settings, "scan_dedup_window_seconds", 0)
+    scan_dedup.max_entries = getattr(settings, "scan_dedup_max_entries", 100_000)
+    if not scan_dedup.enabled:
+        scan_dedup = None
+except Exception as e:
+    logger.warning("Scan dedup setup failed: %s", e)
+    scan_dedup = None
+
+# Durable on-disk spool in front of scan inserts (either redirect mode)
+scan_spool_enabled = False
+try:
+    if getattr(settings, "scan_spool_dir", "") and database_available:
+        from app.services.routing_table import routing_table
+        from app.services.scan_ingest import scan_ingestor
+        from app.services.scan_spool import scan_spool
+        scan_spool.directory = settings.scan_spool_dir
+        scan_spool.segment_size = settings.scan_spool_segment_bytes
+        scan_spool.max_bytes = settings.scan_spool_max_bytes
+        scan_spool.fsync_interval = settings.scan_spool_fsync_interval
+        routing_table.refresh_interval = settings.routing_table_refresh_seconds
+        scan_ingestor.batch_size = settings.scan_batch_size
+        scan_ingestor.flush_interval = settings.scan_flush_interval
+        scan_spool_enabled = True
+except Exception as e:
+    logger.warning("Scan spool setup failed: %s", e)
+    scan_spool_enabled = False
+
+# Periodic recount of the incrementally maintained dashboard counters
+counter_reconciler_enabled = False
+try:
+    if getattr(settings, "counter_reconcile_interval", 0) > 0 and database_available:
+        from app.services.counters import counter_reconciler
+        counter_reconciler.interval = settings.counter_reconcile_interval
+        counter_reconciler_enabled = True
+except Exception as e:
+    logger.warning("Counter reconciler setup failed: %s", e)
+    counter_reconciler_enabled = False
+
+# Shared rotating salts for anonymous visitor ids
+visitor_salts_enabled = False
+try:
+    if database_available:
+        from app.services.visitor_identity import visitor_salts
+        visitor_salts.rotation = settings.visitor_id_rotation
+        visitor_salts.refresh_interval = settings.visitor_salt_refresh_seconds
+        visitor_salts.backfill_days = settings.bulk_ingest_max_age_days
+        visitor_salts_enabled = True
+except Exception as e:
+    logger.warning("Visitor salt setup failed: %s", e)
+    visitor_salts_enabled = False
+
+# The last 48 hours of scans in memory, for "today", "last hour" and recent activity
+recent_scans_enabled = False
+try:
+    from app.services.recent_scans import recent_scans, single_process
+    recent_scans.enabled = getattr(settings, "recent_scans_enabled", False) and database_available
+    if recent_scans.enabled and not single_process():
+        # Each worker would only count the scans it wrote itself
+        logger.warning("RECENT_SCANS_ENABLED needs a single app process, stats read the database")
+        recent_scans.enabled = False
+    if recent_scans.enabled:
+        recent_scans.capacity = settings.recent_scans_per_campaign
+        recent_scans.max_campaigns = settings.recent_scans_max_campaigns
+        recent_scans_enabled = True
+except Exception as e:
+    logger.warning("Recent scan store setup failed: %s", e)
+    recent_scans_enabled = False
+
+# orjson renders responses several times faster than the stdlib json module
+default_response_class = JSONResponse
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401
+    default_response_class = ORJSONResponse
+except ImportError as e:
+    logger.warning("orjson unavailable, using the standard JSON encoder: %s", e)
+
+# Token bucket rate limits on the public endpoints, checked before routing
+rate_limit_enabled = False
+try:
+    if getattr(settings, "rate_limit_enabled", False):
+        from app.middleware import RateLimitMiddleware
+        from app.services.rate_limit import MemoryBuckets, SharedBuckets, parse_limit
+        rate_limits = {
+            route_class: (
+                parse_limit(getattr(settings, f"rate_limit_{route_class}_per_ip")),
+                parse_limit(getattr(settings, f"rate_limit_{route_class}_per_campaign"))
+            )
+            for route_class in ("scan", "analytics", "export")
+        }
+        if settings.rate_limit_shared_path:
+            rate_limit_buckets = SharedBuckets(settings.rate_limit_shared_path, slots=settings.rate_limit_max_keys)
+        else:
+            rate_limit_buckets = MemoryBuckets(settings.rate_limit_max_keys)
+        rate_limit_enabled = True
+except Exception as e:
+    logger.warning("Rate limiting setup failed: %s", e)
+    rate_limit_enabled = False
+
+# Compression of large JSON/NDJSON responses
+compression_enabled = False
+try:
+    if getattr(settings, "response_compression_min_bytes", 0) > 0:
+        from app.middleware import CompressionMiddleware
+        compression_enabled = True
+except Exception as e:
+    logger.warning("Response compression setup failed: %s", e)
+    compression_enabled = False
+
+# Background worker for GDPR access/delete requests
+privacy_processor_enabled = False
+try:
+    if getattr(settings, "privacy_processor_interval", 0) > 0 and database_available:
+        from app.services.privacy_service import privacy_processor
+        privacy_processor.interval = settings.privacy_processor_interval
+        privacy_processor.group_size = settings.privacy_group_size
+        privacy_processor.batch_size = settings.privacy_batch_size
+        privacy_processor.max_rows_per_second = settings.privacy_max_rows_per_second
+        privacy_processor_enabled = True
+except Exception as e:
+    logger.warning("Privacy request processor setup failed: %s", e)
+    privacy_processor_enabled = False
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Starting QR Analytics Platform...")
+    logger.info("Starting QR Analytics Platform")
+    
+    if metrics_enabled:
+        event_loop_monitor.interval = settings.event_loop_lag_interval
+        event_loop_monitor.start()
     
     if database_available:
         try:
-            # Create database tables
-            await create_tables()
-            print("✅ Database tables created")
+            if settings.db_startup_mode == "create":
+                # Create database tables
+                await create_tables()
+                logger.info("Database tables created")
+                
+                # Create initial admin user if none exists
+                async for db in get_database():
+                    await create_initial_admin(db)
+                    logger.info("Initial admin user checked/created")
+                    break
+            else:
+                # Schema and admin are handled by `python -m app.cli init`;
+                # workers only confirm they are talking to a migrated database
+                current, expected = await get_current_revision(), get_expected_revision()
+                if current != expected:
+                    logger.error(
+                        "Database schema is not at the expected revision, run `python -m app.cli migrate`",
+                        extra={"current_revision": current, "expected_revision": expected}
+                    )
+                else:
+                    logger.info("Database schema verified", extra={"revision": current})
+            
+            if visitor_salts_enabled:
+                # Before the ingestor starts, so the first scans get shared ids;
+                # on failure scans fall back to per-process salts until a refresh succeeds
+                try:
+                    await visitor_salts.load(AsyncSessionLocal)
+                except Exception:
+                    logger.exception("Loading visitor salts failed")
+                visitor_salts.start(AsyncSessionLocal)
+            
+            if recent_scans_enabled:
+                # Before the ingestor and spool start, so no scan is both loaded and added;
+                # on failure stats keep reading the database
+                try:
+                    await recent_scans.load(AsyncSessionLocal)
+                except Exception:
+                    logger.exception("Loading the recent scan store failed")
+            
+            if scan_spool_enabled:
+                # Recovers and replays whatever a previous process left in its slot
+                try:
+                    spool = scan_spool.open()
+                    scan_spool.start()
+                    scan_ingestor.spool = scan_spool
+                    scan_ingestor.start(AsyncSessionLocal)
+                    logger.info("Scan spool enabled", extra=spool)
+                except Exception:
+                    logger.exception("Opening the scan spool failed, scans are written directly")
+                if scan_ingestor.spool is not None and not fast_redirect_enabled:
+                    # Standard mode redirects from the routing table when the campaign lookup fails
+                    try:
+                        await routing_table.load(AsyncSessionLocal)
+                    except Exception:
+                        logger.exception("Loading the routing table failed, retrying on the next refresh")
+                    routing_table.start(AsyncSessionLocal)
+            
+            if fast_redirect_enabled:
+                routes = await routing_table.load(AsyncSessionLocal)
+                routing_table.start(AsyncSessionLocal)
+                scan_ingestor.start(AsyncSessionLocal)
+                logger.info("Fast redirect mode enabled", extra={"routes": routes})
+            
+            if bot_filter_enabled:
+                bot_filter.start(AsyncSessionLocal)
             
-            # Create initial admin user if none exists
-            async for db in get_database():
-                await create_initial_admin(db)
-                print("✅ Initial admin user checked/created")
-                break
+            if privacy_processor_enabled:
+                privacy_processor.start(AsyncSessionLocal)
             
-            print(f"✅ Application started with database on {settings.base_url}")
+            if counter_reconciler_enabled:
+                counter_reconciler.start(AsyncSessionLocal)
+            
+            logger.info("Application started with database", extra={"base_url": settings.base_url})
         except Exception as e:
-            print(f"⚠️ Database initialization failed: {e}")
-            print("App will continue without database functionality")
+            logger.exception("Database initialization failed, continuing without database functionality")
     else:
-        print("⚠️ Starting without database functionality")
+        logger.warning("Starting without database functionality")
     
     yield
     
     # Shutdown
-    print("Shutting down QR Analytics Platform...")
+    logger.info("Shutting down QR Analytics Platform")
+    if fast_redirect_enabled:
+        await routing_table.stop()
+        await scan_ingestor.stop()
+    if scan_spool_enabled:
+        await routing_table.stop()
+        await scan_ingestor.stop()
+        await scan_spool.stop()
+    if visitor_salts_enabled:
+        await visitor_salts.stop()
+    if bot_filter_enabled:
+        await bot_filter.stop(AsyncSessionLocal)
+    if recent_scans_enabled:
+        recent_scans.stop()
+    if privacy_processor_enabled:
+        await privacy_processor.stop()
+    if counter_reconciler_enabled:
+        await counter_reconciler.stop()
+    if metrics_enabled:
+        await event_loop_monitor.stop()
 
 app = FastAPI(
     title="QR Analytics Platform", 
     description="Self-hosted QR code analytics platform for marketing agencies",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=default_response_class
 )
 
+# Added first so it sits innermost: a fast-path hit skips the router entirely
+# but is still timed, logged and counted by the middleware registered below
+if fast_redirect_enabled:
+    app.add_middleware(
+        ScanRedirectMiddleware, routing_table=routing_table, ingestor=scan_ingestor,
+        bots=bot_filter if bot_filter_enabled else None, dedup=scan_dedup
+    )
+
+# Outside the fast redirect path, so an over-limit scan is redirected without
+# reaching the ingestor, and inside CORS, so the client dashboard can read a 429
+if rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware, buckets=rate_limit_buckets, limits=rate_limits)
+
 # Configure CORS - Explicit production domains for security
 allowed_origins = ["*"] if settings.environment == "development" else [
     "https://thepostingco-analytics.netlify.app",  # Production frontend
@@ -82,27 +377,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Inside the metrics and request-log middleware, so they see the compressed size and time
+if compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.response_compression_min_bytes,
+        gzip_level=settings.response_gzip_level,
+        brotli_quality=settings.response_brotli_quality
+    )
+
+if profiling_enabled:
+    app.add_middleware(
+        QueryProfilerMiddleware,
+        n_plus_one_threshold=settings.query_profiling_n_plus_one_threshold
+    )
+
+# Registered after CORS so it wraps the whole stack, preflight requests included
+if metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Outermost but for the X-Forwarded-For rewrite, so every log line emitted while handling a request has its id
+try:
+    from app.middleware import RequestContextMiddleware
+    app.add_middleware(RequestContextMiddleware, log_requests=getattr(settings, "log_requests", True))
+except Exception as e:
+    logger.warning("Request context middleware unavailable: %s", e)
+
+# Around everything else, so rate limits, bot checks, visitor ids and logs see the client, not the proxy
+if getattr(settings, "trusted_proxy_hops", 0) > 0:
+    try:
+        from app.middleware import ForwardedForMiddleware
+        app.add_middleware(ForwardedForMiddleware, trusted_hops=settings.trusted_proxy_hops)
+    except Exception as e:
+        logger.warning("Forwarded-for middleware unavailable: %s", e)
+
 # Include API routers if available
 if routers_available:
     try:
         app.include_router(public.router, tags=["Public"])
-        print("✅ Public router included")
+        logger.info("Public router included")
     except Exception as e:
-        print(f"⚠️ Failed to include public router: {e}")
+        logger.warning("Failed to include public router: %s", e)
     
     try:
         app.include_router(auth.router, tags=["Authentication"])
-        print("✅ Auth router included")
+        logger.info("Auth router included")
     except Exception as e:
-        print(f"⚠️ Failed to include auth router: {e}")
+        logger.warning("Failed to include auth router: %s", e)
     
     try:
         app.include_router(admin.router, tags=["Admin"])
-        print("✅ Admin router included")
+        logger.info("Admin router included")
     except Exception as e:
-        print(f"⚠️ Failed to include admin router: {e}")
+        logger.warning("Failed to include admin router: %s", e)
+    
+    if metrics_enabled:
+        try:
+            app.include_router(metrics.router, tags=["Metrics"])
+            logger.info("Metrics router included")
+        except Exception as e:
+            logger.warning("Failed to include metrics router: %s", e)
 else:
-    print("⚠️ API routers not available - running with basic endpoints only")
+    logger.warning("API routers not available - running with basic endpoints only")
 
 @app.get("/")
 async def root():
@@ -128,6 +464,11 @@ async def health_check():
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
+    logger.error(
+        "Unhandled exception",
+        exc_info=exc,
+        extra={"method": request.method, "path": request.url.path}
+    )
     if settings.environment == "development":
         import traceback
         return JSONResponse(
@@ -147,7 +488,14 @@ async def global_exception_handler(request, exc):
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    print(f"🚀 Starting server on 0.0.0.0:{port}")
-    print(f"🌐 PORT environment variable: {os.getenv('PORT', 'NOT SET')}")
-    print(f"🔗 Expected external URL: {settings.base_url}")
-    uvicorn.run("main:app", host="0.0.0.0", port=port)
\ No newline at end of file
+    logger.info(
+        "Starting server",
+        extra={"host": "0.0.0.0", "port": port, "port_env": os.getenv("PORT", "NOT SET"), "base_url": settings.base_url}
+    )
+    if database_available and getattr(settings, "run_migrations_on_start", False):
+        # Once, in the launcher process, before uvicorn imports the app
+        from app.cli import init_database
+        init_database()
+    # log_config=None keeps uvicorn from installing its own synchronous handlers;
+    # access lines come from RequestContextMiddleware instead
+    uvicorn.run("main:app", host="0.0.0.0", port=port, log_config=None, access_log=False)
\ No newline at end of file
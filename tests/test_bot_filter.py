@@ -0,0 +1,49 @@
+import pytest
+from app.services.bot_filter import is_bot_user_agent
+
+# Webviews and in-app browsers of QR scanner apps: real scans
+QR_SCANNER_USER_AGENTS = [
+    # iOS Camera opens Safari
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.5 Mobile/15E148 Safari/604.1",
+    # Google Lens hands off to Chrome
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/126.0.6478.122 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; SM-A536B Build/TP1A.220624.014; wv) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Version/4.0 Chrome/125.0.6422.165 Mobile Safari/537.36 QR Scanner/3.4.1",
+    "Mozilla/5.0 (Linux; Android 12; Redmi Note 11 Build/SKQ1.211103.001; wv) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Version/4.0 Chrome/124.0.6367.179 Mobile Safari/537.36 QR & Barcode Scanner/2.2.60",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Mobile/15E148 QRReader/5.1 Scanner Pro",
+    "Mozilla/5.0 (Linux; Android 11; moto g(30) Build/RRMS31.Q1-12-52-6; wv) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Version/4.0 Chrome/120.0.6099.230 Mobile Safari/537.36 BarcodeScanner QRPreview",
+    "Mozilla/5.0 (Linux; Android 13; SM-S911B) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "SamsungBrowser/25.0 Chrome/121.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 10; CUBOT_X30) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/118.0.0.0 Mobile Safari/537.36",
+    # WhatsApp's in-app browser (its link previewer sends a bare "WhatsApp/..." instead)
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Mobile/15E148 WhatsApp/24.10.74",
+]
+
+BOT_USER_AGENTS = [
+    "",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "WhatsApp/2.23.20.0 A",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)",
+    "Mozilla/5.0 (Windows NT 6.1; WOW64) SkypeUriPreview Preview/0.5 skype-url-preview@microsoft.com",
+    "Mozilla/5.0 (compatible; UptimeRobot/2.0; http://www.uptimerobot.com/)",
+    "Pingdom.com_bot_version_1.4_(http://www.pingdom.com/)",
+    "Mozilla/5.0 (compatible; CensysInspect/1.1; +https://about.censys.io/)",
+    "curl/8.4.0",
+    "python-requests/2.31.0",
+]
+
+@pytest.mark.parametrize("user_agent", QR_SCANNER_USER_AGENTS)
+def test_qr_scanner_apps_are_not_bots(user_agent):
+    assert not is_bot_user_agent(user_agent)
+
+@pytest.mark.parametrize("user_agent", BOT_USER_AGENTS)
+def test_bots_are_detected(user_agent):
+    assert is_bot_user_agent(user_agent)
@@ -0,0 +1,25 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from app.services import bulk_ingest
+from app.services.visitor_identity import VisitorSaltStore
+
+def event(moment):
+    return json.dumps({
+        "event_id": moment.isoformat(), "campaign_id": "abcdefghijklmn",
+        "timestamp": moment.isoformat(), "ip_address": "203.0.113.7",
+    }).encode()
+
+@pytest.mark.parametrize("rotation", ["day", "week", "month"])
+def test_backfill_window_has_shared_salts(run_with_database, monkeypatch, rotation):
+    # A Monday, so the day before is in the previous ISO week
+    now = datetime(2026, 10, 19, 9, 0)
+    salts = VisitorSaltStore(rotation=rotation, backfill_days=7)
+    monkeypatch.setattr(bulk_ingest, "visitor_salts", salts)
+    run_with_database(lambda session_factory: salts.load(session_factory, now=now))
+
+    oldest = now - timedelta(days=7)
+    for moment in (now - timedelta(days=1), oldest + timedelta(minutes=1), now):
+        assert bulk_ingest.parse_event(event(moment), now, oldest)["anonymous_user_id"]
+    with pytest.raises(ValueError, match="backfill window"):
+        bulk_ingest.parse_event(event(oldest - timedelta(minutes=1)), now, oldest)
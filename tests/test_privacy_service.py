@@ -0,0 +1,61 @@
+import json
+from datetime import datetime
+from sqlalchemy import select
+from app.models import PrivacyRequest, Scan
+from app.services.privacy_service import PrivacyRequestProcessor
+
+def add_scans(db, campaign_id, user_id, count):
+    for minute in range(count):
+        db.add(Scan(campaign_id=campaign_id, anonymous_user_id=user_id, timestamp=datetime(2026, 10, 1, 12, minute)))
+
+def test_failed_group_marks_requests_failed(run_with_database):
+    async def scenario(session_factory):
+        async with session_factory() as db:
+            add_scans(db, "campaign", "user-a", 3)
+            db.add_all([
+                PrivacyRequest(anonymous_user_id="user-a", request_type="export"),
+                PrivacyRequest(anonymous_user_id="user-a", request_type="delete"),
+            ])
+            await db.commit()
+
+        processor = PrivacyRequestProcessor(max_rows_per_second=0)
+
+        async def broken_delete(db, user_ids):
+            # Fail inside an open transaction, so the rollback expires the claimed requests
+            await db.execute(select(Scan.id).where(Scan.anonymous_user_id.in_(user_ids)))
+            raise RuntimeError("delete failed")
+        processor._delete = broken_delete
+
+        summary = await processor.run_once(session_factory)
+        async with session_factory() as db:
+            requests = (await db.execute(select(PrivacyRequest))).scalars().all()
+            scans = (await db.execute(select(Scan))).scalars().all()
+        return summary, requests, scans
+
+    summary, requests, scans = run_with_database(scenario)
+    assert summary["groups"] == 1
+    assert [request.status for request in requests] == ["failed", "failed"]
+    assert all(request.error == "delete failed" and request.processed_at for request in requests)
+    assert len(scans) == 3
+
+def test_export_cap_applies_per_user(run_with_database):
+    async def scenario(session_factory):
+        async with session_factory() as db:
+            add_scans(db, "campaign", "user-a", 5)
+            add_scans(db, "campaign", "user-b", 2)
+            db.add_all([
+                PrivacyRequest(anonymous_user_id="user-a", request_type="export"),
+                PrivacyRequest(anonymous_user_id="user-b", request_type="export"),
+            ])
+            await db.commit()
+
+        await PrivacyRequestProcessor(max_export_rows=2).run_once(session_factory)
+        async with session_factory() as db:
+            requests = (await db.execute(select(PrivacyRequest).order_by(PrivacyRequest.anonymous_user_id))).scalars().all()
+        return requests
+
+    heavy, light = run_with_database(scenario)
+    assert (heavy.status, heavy.rows_affected) == ("completed", 2)
+    assert json.loads(heavy.result)["truncated"] is True
+    assert (light.status, light.rows_affected) == ("completed", 2)
+    assert json.loads(light.result)["truncated"] is False
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+from app.models import Campaign, Scan
+from app.services.campaign_service import CampaignService
+from app.services.retention import ScanRetentionService
+
+def test_compacted_visitors_are_counted_once(run_with_database):
+    async def scenario(session_factory):
+        now = datetime.utcnow()
+        async with session_factory() as db:
+            db.add(Campaign(campaign_id="campaign", business_name="Cafe", target_url="https://example.com"))
+            # One visitor on several days and devices, in both compacted and raw scans
+            for days_ago, device in ((40, "mobile"), (35, "desktop"), (1, "mobile")):
+                db.add(Scan(campaign_id="campaign", anonymous_user_id="visitor-a",
+                            timestamp=now - timedelta(days=days_ago), device_type=device))
+            for days_ago, visitor in ((40, "visitor-b"), (1, "visitor-c")):
+                db.add(Scan(campaign_id="campaign", anonymous_user_id=visitor, timestamp=now - timedelta(days=days_ago)))
+            await db.commit()
+
+            before = await CampaignService(db).get_campaign_stats("campaign")
+            # Batches of one also split the compacted visitors across batches
+            await ScanRetentionService(db, raw_days=30, batch_size=1, pause=0).run()
+            after = await CampaignService(db).get_campaign_stats("campaign")
+        return before, after
+
+    before, after = run_with_database(scenario)
+    assert (before["unique_visitors"], before["unique_visitors_estimated"]) == (3, False)
+    assert (after["total_scans"], after["unique_visitors"], after["unique_visitors_estimated"]) == (5, 3, True)
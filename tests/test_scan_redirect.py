@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from app.middleware.scan_redirect import ScanRedirectMiddleware
+
+class RoutingTable:
+    def lookup(self, campaign_id):
+        return b"https://example.com/menu"
+
+class Ingestor:
+    running = True
+
+    def __init__(self):
+        self.events = []
+
+    def submit(self, event):
+        self.events.append(event)
+        return True
+
+def request(middleware, method):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": "/scan/abcdefghijklmn", "headers": [], "client": ("203.0.113.7", 0)}
+    asyncio.run(middleware(scope, None, send))
+    return sent[0]
+
+@pytest.mark.parametrize("method, recorded", [("GET", 1), ("HEAD", 0)])
+def test_only_get_is_recorded(method, recorded):
+    ingestor = Ingestor()
+    response = request(ScanRedirectMiddleware(None, RoutingTable(), ingestor), method)
+    assert response["status"] == 302
+    assert len(ingestor.events) == recorded